@@ -1,344 +1,2944 @@
 import argparse
+import bisect
+import csv
+import functools
+import hashlib
+import inspect
+import json
 import logging
 import math
+import multiprocessing
+import os
+import queue
 import random
+import re
+import sys
+import threading
+from collections.abc import ItemsView, Mapping, ValuesView
+from itertools import accumulate, product
 from pprint import pprint
 
-import matplotlib
-
-matplotlib.use('Qt5Agg')  # Or another backend like 'GTK3Agg', 'WXAgg', etc.
-import matplotlib.pyplot as plt
+import numpy as np
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+GRAVITY = 9.8  # Gravity in m/s^2
+
+DEFAULT_NUM_FLOORS = 100
+
+# Upper bound on the number of (trial, floor) cells the vectorized engine holds in memory at once
+BATCH_CELL_BUDGET = 2 ** 20
+
+# Number of trials drawn from each independently seeded random stream in seeded and parallel runs
+SEED_BLOCK_SIZE = 10000
+
+# Attempt tables of (start floor, breaking floor) are used up to this many floors; a table holds floors^2 counts
+ATTEMPT_TABLE_MAX_FLOORS = 2000
+
+# Strategies without a vectorized attempt counter replay their probe search for every table cell, so their tables are
+# only built up to this many floors; larger buildings run them on the scalar engine
+PROBE_TABLE_MAX_FLOORS = 500
+
+# Directory the attempt tables are cached in between runs, or None to keep them in memory only
+ATTEMPT_TABLE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.attempt_tables')
+
+# Version of the cached tables, part of their file names together with the source code of the strategy they belong to.
+# Bump it when shared code that tables are computed with changes, so tables cached by the old code are not reused
+ATTEMPT_TABLE_VERSION = 1
+_attempt_tables = {}
+_drop_tables = {}
+_drop_table_rows = {}
+
+# Prior-aware searches use an optimal decision tree up to this many floors; the tree's table holds floors^2 probes and
+# takes O(floors^2) to build. Larger buildings bisect the prior's probability mass instead
+PRIOR_TREE_MAX_FLOORS = 1000
+
+# Probability mass spread evenly over the floors before planning prior-aware searches, so floors the prior rules out
+# are still bisected rather than searched one by one
+PRIOR_SMOOTHING = 1e-6
+_prior_weights = {}
+_prior_tables = {}
+_prior_table_rows = {}
+
+# Grid points per floor height range in the exact mode's drop height distributions, and a cap on the grid size
+EXACT_GRID_STEPS = 128
+EXACT_GRID_MAX_POINTS = 2 ** 22
+
+# Exact mode builds the drop height distributions of floors up to this high on the grid; the drop heights of higher
+# floors, sums of more floor heights, follow a second-order Edgeworth expansion to within 2e-6
+EXACT_GRID_FLOORS = 16
+
+# Standard deviations either side of a drop height's mean that exact mode integrates over
+EXACT_SPREAD = 8
+
+# Buildings with more floors than this are plotted as min/max/mean envelopes of bins of floors instead of a marker or
+# bar per floor, with at most PLOT_MAX_POINTS bins: about one per pixel column of the figure
+PLOT_BINNED_FLOORS = 500
+PLOT_MAX_POINTS = 1500
+
+# Per-probe tracing. Hot paths only test this flag, so tracing costs nothing while it is switched off. Debug logging
+# is independent of it and follows the log level
+TRACE_ENABLED = False
+_tracer = None
+
+
+class ProbeTracer:
+    """
+    Write structured per-probe trace events to a JSON lines file.
+
+    The probe loop only appends a tuple to an in-memory buffer. Full buffers are handed to a background thread, which
+    does the JSON formatting and file writes.
+    """
+
+    def __init__(self, trace_path, buffer_size=4096):
+        """
+        :param trace_path: Path of the JSON lines file to write.
+        :param buffer_size: Number of events collected before they are handed to the writer thread.
+        """
+        self.trace_path = trace_path
+        self.buffer_size = buffer_size
+        self.trial = -1
+        self._buffer = []
+        self._pending = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_events, name='probe-tracer', daemon=True)
+        self._writer.start()
+
+    def start_trial(self, trial=None):
+        """
+        Move on to the next trial, labelling the following events with its index.
+        :param trial: Optional index of the trial to move to instead, e.g. when replaying a single trial.
+        """
+        self.trial = self.trial + 1 if trial is None else trial
+
+    def probe(self, strategy, start_floor, floor, force, did_break):
+        """
+        Record one probe.
+        :param strategy: Name of the strategy that made the probe.
+        :param start_floor: Starting floor of the strategy run.
+        :param floor: Probed floor.
+        :param force: Impact force at the probed floor.
+        :param did_break: Whether the plate broke.
+        """
+        self._buffer.append((strategy, self.trial, start_floor, floor, force, did_break))
+        if len(self._buffer) >= self.buffer_size:
+            self._pending.put(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        """
+        Flush the remaining events and wait for the writer thread to finish.
+        """
+        self._pending.put(self._buffer)
+        self._buffer = []
+        self._pending.put(None)
+        self._writer.join()
+
+    def _write_events(self):
+        with open(self.trace_path, 'w') as trace_file:
+            while True:
+                events = self._pending.get()
+                if events is None:
+                    break
+                trace_file.writelines(
+                    json.dumps({'strategy': strategy, 'trial': trial, 'start_floor': start_floor, 'floor': floor,
+                                'force': force, 'outcome': 'break' if did_break else 'intact'}) + '\n'
+                    for strategy, trial, start_floor, floor, force, did_break in events)
+
+
+def enable_tracing(trace_path):
+    """
+    Start writing per-probe trace events to a file. Tracing runs the simulation on the scalar engine in one process.
+    :param trace_path: Path of the JSON lines file to write.
+    """
+    global TRACE_ENABLED, _tracer
+    disable_tracing()
+    _tracer = ProbeTracer(trace_path)
+    TRACE_ENABLED = True
+
+
+def disable_tracing():
+    """
+    Stop tracing and flush any buffered events to the trace file.
+    """
+    global TRACE_ENABLED, _tracer
+    TRACE_ENABLED = False
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+def trace_probe(strategy, start_floor, floor, force, did_break):
+    """
+    Record a probe with the active tracer. Callers check TRACE_ENABLED first so disabled tracing costs nothing.
+    """
+    _tracer.probe(strategy, start_floor, floor, force, did_break)
+
+
+def calculate_impact_force(height, weight):
+    """
+    Calculate the impact force of the ball.
+    :param height: Drop height in meters.
+    :param weight: Weight of the ball in kg.
+    :return: Impact force in Newtons.
+    """
+    g = GRAVITY
+    velocity = math.sqrt(2 * g * height)
+    force = weight * velocity
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Calculated impact force: Height = %s m, Weight = %s kg, Force = %s N", height, weight, force)
+    return force
+
+
+def cumulative_height(floor_heights, floor):
+    """
+    Calculate the cumulative height up to a given floor.
+    :param floor_heights: List of heights for each floor.
+    :param floor: Target floor number.
+    :return: Cumulative height up to the given floor.
+    """
+    cumulative_height_calc = sum(floor_heights[:floor])
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Cumulative height calculated up to floor %s: %s m", floor, cumulative_height_calc)
+    return cumulative_height_calc
+
+
+class Building:
+    """
+    Prefix-sum index over the floor heights of a single trial.
+
+    Cumulative heights are summed once on construction and the impact force for every floor is computed once per ball
+    weight, so strategies can look up the height or force of any floor in O(1) instead of re-summing the heights on
+    every probe. A Building still behaves like the plain list of floor heights it wraps.
+    """
+
+    def __init__(self, floor_heights):
+        """
+        :param floor_heights: Heights of each floor in meters.
+        """
+        self.floor_heights = floor_heights
+        # Index 0 is the ground, so cumulative_heights[floor] matches cumulative_height(floor_heights, floor)
+        self.cumulative_heights = [0] + list(accumulate(floor_heights))
+        # Cumulative heights, and so impact forces, only grow with the floor when no floor height is negative
+        self.heights_increasing = all(height >= 0 for height in floor_heights)
+        self._ball_weight = None
+        self._impact_forces = None
+        self._oracle_key = None
+        self._oracle = None
+
+    def __len__(self):
+        return len(self.floor_heights)
+
+    def __getitem__(self, index):
+        return self.floor_heights[index]
+
+    def __iter__(self):
+        return iter(self.floor_heights)
+
+    def height_at(self, floor):
+        """
+        Get the cumulative height up to a given floor.
+        :param floor: Target floor number.
+        :return: Cumulative height up to the given floor.
+        """
+        return self.cumulative_heights[floor]
+
+    def impact_forces(self, ball_weight):
+        """
+        Get the impact force for every floor, computing them only when the ball weight changes.
+        :param ball_weight: Weight of the ball in kg.
+        :return: List of impact forces in Newtons indexed by floor number (index 0 is the ground).
+        """
+        if self._impact_forces is None or ball_weight != self._ball_weight:
+            self._impact_forces = [calculate_impact_force(height, ball_weight) for height in self.cumulative_heights]
+            self._ball_weight = ball_weight
+        return self._impact_forces
+
+    def oracle(self, ball_weight, plate_strength):
+        """
+        Get the break oracle for a trial, building it only when the ball weight or plate strength changes.
+        :param ball_weight: Weight of the ball in kg.
+        :param plate_strength: Strength of the plate in Newtons.
+        :return: BreakOracle shared by every strategy and start floor of the trial.
+        """
+        if self._oracle is None or (ball_weight, plate_strength) != self._oracle_key:
+            self._oracle = BreakOracle(self, ball_weight, plate_strength)
+            self._oracle_key = (ball_weight, plate_strength)
+        return self._oracle
+
+
+class BreakOracle:
+    """
+    Answers whether the plate breaks at a floor for a single trial.
+
+    When the impact force grows with the floor, the minimum breaking floor is found once by bisection, computing the
+    force at only O(log n) floors, and the outcome of every floor follows from it. Otherwise the outcome of every floor
+    is computed from its impact force. Either way a probe is a single list lookup in outcomes, indexed by floor number,
+    so strategies count attempts without doing any physics work.
+    """
+
+    def __init__(self, building, ball_weight, plate_strength):
+        """
+        :param building: Building of the trial.
+        :param ball_weight: Weight of the ball in kg.
+        :param plate_strength: Strength of the plate in Newtons.
+        """
+        self.building = building
+        self.ball_weight = ball_weight
+        num_floors = len(building)
+
+        if building.heights_increasing and ball_weight >= 0:
+            # Bisect for the lowest floor whose impact force breaks the plate (num_floors + 1 if none does)
+            low, high = 0, num_floors + 1
+            while low < high:
+                mid = (low + high) // 2
+                if calculate_impact_force(building.cumulative_heights[mid], ball_weight) > plate_strength:
+                    high = mid
+                else:
+                    low = mid + 1
+            self.breaking_floor = low
+            self.outcomes = [False] * low + [True] * (num_floors + 1 - low)
+        else:
+            self.outcomes = [force > plate_strength for force in building.impact_forces(ball_weight)]
+            self.breaking_floor = self.outcomes.index(True) if True in self.outcomes else num_floors + 1
+
+    def force(self, floor):
+        """
+        Calculate the impact force at a floor, only needed when tracing probes.
+        :param floor: Floor number.
+        :return: Impact force in Newtons.
+        """
+        return calculate_impact_force(self.building.height_at(floor), self.ball_weight)
+
+
+def as_building(floor_heights):
+    """
+    Wrap floor heights in a Building unless they already are one.
+    :param floor_heights: List of heights for each floor or a Building.
+    :return: Building for the given floor heights.
+    """
+    if isinstance(floor_heights, Building):
+        return floor_heights
+    return Building(floor_heights)
+
+
+def run_probe_search(search, name, floor_heights, ball_weight, plate_strength, start_floor):
+    """
+    Run a strategy's probe search for one trial from one start floor.
+    The search only decides which floor to probe next. The engine hands it a probe callback that answers from the
+    trial's shared break oracle, counts the attempts and traces the probes, and exits before the first probe when even
+    the highest floor does not break the plate.
+    :param search: Probe search function taking (probe, start_floor, num_floors) and returning the breaking floor it
+    found, or None.
+    :param name: Name of the strategy in trace events.
+    :param floor_heights: Heights of each floor, or a Building.
+    :param ball_weight: Weight of the ball.
+    :param plate_strength: Strength of the plate.
+    :param start_floor: Starting floor for the simulation.
+    :return: Number of attempts to find the minimum breaking floor, a flag indicating if a break occurred and the
+    breaking floor.
+    """
+    # Check the log level once per run, so runs without debug logging skip formatting its arguments
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    if debug:
+        logging.debug("Starting %s strategy from floor %s", name, start_floor)
+
+    # Share the trial's break oracle, then check whether the highest floor breaks the plate at all
+    oracle = as_building(floor_heights).oracle(ball_weight, plate_strength)
+    breaks = oracle.outcomes
+    num_floors = len(floor_heights)
+    if not breaks[num_floors]:
+        # If the max force doesn't break the plate, exit early
+        if debug:
+            logging.debug("Maximum force doesn't break the plate. Exiting early.")
+        return 0, False, None
+
+    attempts = 0
+
+    def probe(floor):
+        nonlocal attempts
+        attempts += 1
+        return breaks[floor]
+
+    def traced_probe(floor):
+        nonlocal attempts
+        attempts += 1
+        broke = breaks[floor]
+        trace_probe(name, start_floor, floor, oracle.force(floor), broke)
+        return broke
+
+    # Only traced runs pay for the tracing check, once per run rather than once per probe
+    breaking_floor = search(traced_probe if TRACE_ENABLED else probe, start_floor, num_floors)
+
+    if debug:
+        logging.debug("%s Result: %s attempts, Break occurred: %s, Breaking floor: %s",
+                      name, attempts, breaking_floor is not None, breaking_floor)
+    return attempts, breaking_floor is not None, breaking_floor
+
+
+def linear_search_probes(probe, start_floor, num_floors):
+    """
+    Probe floor by floor from the start floor: downwards if the plate breaks there, otherwise upwards.
+    :param probe: Callback returning whether the plate breaks at a floor.
+    :param start_floor: Starting floor.
+    :param num_floors: Number of floors in the building.
+    :return: Minimum breaking floor, or None if none was found.
+    """
+    floor = start_floor
+
+    # Initially check if the plate breaks or not at the starting floor
+    if probe(floor):
+        # If it breaks, go down to find the minimum breaking floor
+        while floor > 0:
+            floor -= 1
+            if not probe(floor):
+                # Found the floor just before it stops breaking
+                return floor + 1
+        return None
+
+    # If it doesn't break, go up to find the breaking floor
+    while floor < num_floors:
+        floor += 1
+        if probe(floor):
+            return floor
+    return None
+
+
+def linear_search_simulation_with_flag(floor_heights, ball_weight, plate_strength, start_floor):
+    """
+    Apply a linear search strategy to find the minimum breaking floor from a given start floor.
+    :param floor_heights: Heights of each floor.
+    :param ball_weight: Weight of the ball.
+    :param plate_strength: Strength of the plate.
+    :param start_floor: Starting floor for the simulation.
+    :return: Number of attempts to find the minimum breaking floor and a flag indicating if a break occurred.
+    """
+    return run_probe_search(linear_search_probes, 'linear_search', floor_heights, ball_weight, plate_strength,
+                            start_floor)
+
+
+def precise_halving_probes(probe, start_floor, num_floors):
+    """
+    Halve the range of candidate floors from the start floor, falling back to a linear search upwards from the start
+    floor if halving found no break.
+    :param probe: Callback returning whether the plate breaks at a floor.
+    :param start_floor: Starting floor.
+    :param num_floors: Number of floors in the building.
+    :return: Minimum breaking floor, or None if none was found.
+    """
+    breaking_floor = None
+
+    # Set initial high and low bounds for halving
+    low = 0
+    high = num_floors
+    floor = start_floor
+
+    # Halving strategy
+    while low < high:
+        if probe(floor):
+            # If current force breaks the plate, decrease the high bound and set breaking_floor
+            high = floor - 1
+            breaking_floor = floor
+        else:
+            # If current force doesn't break the plate, increase the low bound
+            low = floor + 1
+
+        # Update the floor based on new high and low
+        floor = (low + high) // 2
+
+    # Check the floor if low and high have converged
+    if low == high and probe(low):
+        breaking_floor = low
+
+    # If the halving strategy did not find a breaking floor, perform a linear search upwards
+    if breaking_floor is None:
+        logging.debug("No break found in halving strategy. Switching to linear search upwards.")
+        for floor in range(start_floor, num_floors):
+            if probe(floor):
+                return floor
+
+    return breaking_floor
+
+
+def precise_halving_strategy_simulation_with_flag(floor_heights, ball_weight, plate_strength, start_floor):
+    """
+    Apply the precise halving strategy to find the minimum breaking floor from a given start floor.
+    :param floor_heights:
+    :param ball_weight:
+    :param plate_strength:
+    :param start_floor:
+    :return:
+    """
+    return run_probe_search(precise_halving_probes, 'precise_halving', floor_heights, ball_weight, plate_strength,
+                            start_floor)
+
+
+def binary_search_probes(probe, start_floor, num_floors):
+    """
+    Walk down from the start floor if the plate breaks there, otherwise binary search the floors above it.
+    :param probe: Callback returning whether the plate breaks at a floor.
+    :param start_floor: Starting floor.
+    :param num_floors: Number of floors in the building.
+    :return: Minimum breaking floor, or None if none was found.
+    """
+    # Check if the starting floor breaks the plate
+    if probe(start_floor):
+        breaking_floor = start_floor
+        # Since the plate broke at the starting floor, search downwards for the actual breaking floor
+        while breaking_floor > 1:
+            breaking_floor -= 1
+            if not probe(breaking_floor):
+                # Found the actual breaking floor
+                return breaking_floor + 1
+        return breaking_floor
+
+    # If the plate does not break at the starting floor, perform binary search upwards
+    breaking_floor = None
+    low = start_floor + 1
+    high = num_floors
+    while low <= high:
+        mid = (low + high) // 2
+        if probe(mid):
+            breaking_floor = mid
+            high = mid - 1
+        else:
+            low = mid + 1
+    return breaking_floor
+
+
+def binary_search_strategy(floor_heights, ball_weight, plate_strength, start_floor):
+    """
+    Apply the binary search strategy to find the minimum breaking floor.
+    :param floor_heights:
+    :param ball_weight:
+    :param plate_strength:
+    :param start_floor:
+    :return:
+    """
+    return run_probe_search(binary_search_probes, 'binary_search', floor_heights, ball_weight, plate_strength,
+                            start_floor)
+
+
+def galloping_search_probes(probe, start_floor, num_floors):
+    """
+    Gallop away from the start floor in doubling steps until the breaking floor is bracketed, then bisect the bracket.
+    Costs O(log d) probes for a breaking floor d floors from the start.
+    :param probe: Callback returning whether the plate breaks at a floor.
+    :param start_floor: Starting floor.
+    :param num_floors: Number of floors in the building.
+    :return: Minimum breaking floor, or None if none was found.
+    """
+    # The breaking floor is above low, which holds (the ground always does), and at most high, which breaks
+    step = 1
+    if probe(start_floor):
+        low, high = 0, start_floor
+        while low == 0 and high > 1:
+            floor = max(high - step, 1)
+            if probe(floor):
+                high = floor
+            else:
+                low = floor
+            step *= 2
+    else:
+        # num_floors + 1 stands for "above the building" until a floor breaks
+        low, high = start_floor, num_floors + 1
+        while high > num_floors and low < num_floors:
+            floor = min(low + step, num_floors)
+            if probe(floor):
+                high = floor
+            else:
+                low = floor
+            step *= 2
+
+    while high - low > 1:
+        mid = (low + high) // 2
+        if probe(mid):
+            high = mid
+        else:
+            low = mid
+    return high if high <= num_floors else None
+
+
+def galloping_search_strategy(floor_heights, ball_weight, plate_strength, start_floor):
+    """
+    Apply the galloping (exponential) search strategy to find the minimum breaking floor from a given start floor.
+    :param floor_heights: Heights of each floor.
+    :param ball_weight: Weight of the ball.
+    :param plate_strength: Strength of the plate.
+    :param start_floor: Starting floor for the simulation.
+    :return: Number of attempts to find the minimum breaking floor, a flag indicating if a break occurred and the
+    breaking floor.
+    """
+    return run_probe_search(galloping_search_probes, 'galloping', floor_heights, ball_weight, plate_strength,
+                            start_floor)
+
+
+def interpolation_search_probes(probe, start_floor, num_floors):
+    """
+    Bisect the candidate floors in impact force rather than in floors.
+    The impact force grows with the square root of the drop height, so with floors of equal height the force halfway
+    between two floors is reached at the square of the mean of their square roots, below their midpoint. Interpolating
+    the next probe there only needs floor numbers, so the attempts still only depend on the start and breaking floors.
+    :param probe: Callback returning whether the plate breaks at a floor.
+    :param start_floor: Starting floor.
+    :param num_floors: Number of floors in the building.
+    :return: Minimum breaking floor, or None if none was found.
+    """
+    # The breaking floor is above low, which holds, and at most high; num_floors + 1 stands for "above the building"
+    low, high = 0, num_floors + 1
+    floor = start_floor
+    while high - low > 1:
+        if probe(floor):
+            high = floor
+        else:
+            low = floor
+        floor = min(max(round(((math.sqrt(low) + math.sqrt(high)) / 2) ** 2), low + 1), high - 1)
+    return high if high <= num_floors else None
+
+
+def interpolation_search_strategy(floor_heights, ball_weight, plate_strength, start_floor):
+    """
+    Apply the force interpolation search strategy to find the minimum breaking floor from a given start floor.
+    :param floor_heights: Heights of each floor.
+    :param ball_weight: Weight of the ball.
+    :param plate_strength: Strength of the plate.
+    :param start_floor: Starting floor for the simulation.
+    :return: Number of attempts to find the minimum breaking floor, a flag indicating if a break occurred and the
+    breaking floor.
+    """
+    return run_probe_search(interpolation_search_probes, 'interpolation', floor_heights, ball_weight, plate_strength,
+                            start_floor)
+
+
+class OptimalDropStrategy:
+    """
+    Minimax-optimal strategy with a limited number of plates.
+
+    The first drop is from the start floor. Every drop after it follows the decision table of optimal_drop_table: with
+    b plates left and m floors still to search, drop from the floor that leaves the fewest drops in the worst case,
+    looked up in O(log n). A broken plate is used up, and the last plate searches floor by floor. Instances behave like
+    the strategy functions and can be pickled for worker processes.
+    """
+
+    def __init__(self, balls):
+        """
+        :param balls: Number of plates available to the search.
+        """
+        self.balls = balls
+        self.__name__ = f'optimal_{balls}_ball_strategy'
+
+    def __call__(self, floor_heights, ball_weight, plate_strength, start_floor):
+        """
+        Apply the strategy to find the minimum breaking floor from a given start floor.
+        :param floor_heights: Heights of each floor.
+        :param ball_weight: Weight of the ball.
+        :param plate_strength: Strength of the plate.
+        :param start_floor: Starting floor for the simulation.
+        :return: Number of attempts to find the minimum breaking floor, a flag indicating if a break occurred and the
+        breaking floor.
+        """
+        return run_probe_search(self.probes, f'optimal_{self.balls}_balls', floor_heights, ball_weight,
+                                plate_strength, start_floor)
+
+    @property
+    def cache_sources(self):
+        # Code the drop tables are built with, which the cached attempt tables depend on besides this class
+        return optimal_drop_table, _optimal_drop_rows
+
+    def __eq__(self, other):
+        return isinstance(other, OptimalDropStrategy) and other.balls == self.balls
+
+    def __hash__(self):
+        return hash((OptimalDropStrategy, self.balls))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.balls})'
+
+    def probes(self, probe, start_floor, num_floors):
+        """
+        Probe search of the strategy.
+        :param probe: Callback returning whether the plate breaks at a floor.
+        :param start_floor: Starting floor.
+        :param num_floors: Number of floors in the building.
+        :return: Minimum breaking floor, or None if it was not found before the plates ran out.
+        """
+        table = _optimal_drop_rows(self.balls, num_floors)
+        # The breaking floor is above low, which holds, and at most high; num_floors + 1 stands for "above the building"
+        low, high, balls = 0, num_floors + 1, self.balls
+        floor = start_floor
+        while True:
+            if probe(floor):
+                high = floor
+                balls -= 1
+            else:
+                low = floor
+            remaining = high - low - 1
+            if remaining == 0 or balls == 0:
+                break
+            if balls == 1:
+                floor = low + 1
+            else:
+                drops = bisect.bisect_left(table[balls], remaining)
+                floor = low + table[balls - 1][drops - 1] + 1
+
+        return high if remaining == 0 and high <= num_floors else None
+
+    def attempts(self, start_floors, breaking_floors, num_floors):
+        """
+        Vectorized attempt counts of the strategy.
+        :param start_floors: Integer array of starting floors.
+        :param breaking_floors: Integer array of true minimum breaking floors (0 if the plate never breaks),
+        broadcastable against start_floors.
+        :param num_floors: Number of floors in the building.
+        :return: Integer array of attempts for every (start floor, breaking floor) pair.
+        """
+        table = optimal_drop_table(self.balls, num_floors)
+        max_drops = table.shape[1] - 1
+        # Offset every row of the table past the previous one, so a single sorted search finds the fewest drops in
+        # each search's own row
+        row_stride = num_floors + 2
+        offset_table = (table + np.arange(self.balls + 1)[:, None] * row_stride).ravel()
+
+        start_floors, breaking_floors = np.broadcast_arrays(start_floors, breaking_floors)
+        attempts = np.zeros(start_floors.shape, dtype=np.int64)
+        flat_attempts = attempts.reshape(-1)
+
+        # Step the unfinished searches in lockstep, dropping each search from the arrays once it is done
+        index = np.arange(flat_attempts.size)
+        breaking = breaking_floors.ravel().astype(np.int64)
+        floor = start_floors.ravel().astype(np.int64)
+        low = np.zeros(index.size, dtype=np.int64)
+        high = np.full(index.size, num_floors + 1, dtype=np.int64)
+        balls = np.full(index.size, self.balls, dtype=np.int64)
+        while index.size:
+            flat_attempts[index] += 1
+            broke = floor >= breaking
+            high = np.where(broke, floor, high)
+            low = np.where(broke, low, floor)
+            balls -= broke
+            remaining = high - low - 1
+
+            # The last plate walks up floor by floor until it breaks or runs out of floors, so count its drops at once
+            last_plate = (remaining > 0) & (balls == 1)
+            flat_attempts[index[last_plate]] += np.minimum(breaking - low, remaining)[last_plate]
+
+            active = (remaining > 0) & (balls > 1)
+            index, breaking, low, high, balls, remaining = (
+                index[active], breaking[active], low[active], high[active], balls[active], remaining[active])
+            drops = np.searchsorted(offset_table, remaining + balls * row_stride) - balls * (max_drops + 1)
+            floor = low + table[balls - 1, drops - 1] + 1
+
+        return np.where(breaking_floors == 0, 0, attempts)
+
+
+optimal_two_ball_strategy = OptimalDropStrategy(2)
+optimal_three_ball_strategy = OptimalDropStrategy(3)
+
+
+class PriorSearchStrategy:
+    """
+    Strategy that needs the fewest attempts on average, knowing the ranges the trials' parameters are drawn from.
+    The breaking floor is far from uniform: the ranges make some floors much more likely than others, see
+    breaking_floor_distribution. The first drop is from the start floor. Every drop after it follows a decision tree
+    built once per parameter set and building size, which weights each split by the probability of the floors on
+    either side instead of halving the floors. Buildings of up to PRIOR_TREE_MAX_FLOORS floors use the optimal tree of
+    prior_search_table; larger ones probe at the floor that halves the probability mass left. Instances can be pickled
+    for worker processes, and rebuilt for other ranges with for_parameters.
+    """
+
+    def __init__(self, ball_weight_range, plate_strength_range, floor_height_range):
+        """
+        :param ball_weight_range: Tuple representing the range of ball weight in kg.
+        :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+        :param floor_height_range: Tuple representing the range of floor heights in meters.
+        :raises ValueError: If the breaking floor distribution can't be computed for the ranges, see
+        check_distribution_ranges.
+        """
+        # The prior is the breaking floor distribution, so reject ranges it can't be computed for right away
+        check_distribution_ranges(ball_weight_range, plate_strength_range, floor_height_range)
+        self.parameters = (tuple(ball_weight_range), tuple(plate_strength_range), tuple(floor_height_range))
+        # Attempt tables are cached by name, so the name tells the priors apart
+        self.__name__ = f'prior_search_strategy_{_parameter_digest(*self.parameters)}'
+
+    def for_parameters(self, ball_weight_range, plate_strength_range, floor_height_range):
+        """
+        Get the same strategy for other parameter ranges.
+        :param ball_weight_range: Tuple representing the range of ball weight in kg.
+        :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+        :param floor_height_range: Tuple representing the range of floor heights in meters.
+        :return: PriorSearchStrategy for the given ranges.
+        """
+        return type(self)(ball_weight_range, plate_strength_range, floor_height_range)
+
+    def __call__(self, floor_heights, ball_weight, plate_strength, start_floor):
+        """
+        Apply the strategy to find the minimum breaking floor from a given start floor.
+        :param floor_heights: Heights of each floor.
+        :param ball_weight: Weight of the ball.
+        :param plate_strength: Strength of the plate.
+        :param start_floor: Starting floor for the simulation.
+        :return: Number of attempts to find the minimum breaking floor, a flag indicating if a break occurred and the
+        breaking floor.
+        """
+        return run_probe_search(self.probes, 'prior_search', floor_heights, ball_weight, plate_strength, start_floor)
+
+    @property
+    def cache_sources(self):
+        # Code the decision trees are built with, which the cached attempt tables depend on besides this class
+        return _prior_cache_sources()
+
+    def __eq__(self, other):
+        return isinstance(other, PriorSearchStrategy) and other.parameters == self.parameters
+
+    def __hash__(self):
+        return hash((PriorSearchStrategy, self.parameters))
+
+    def __repr__(self):
+        return f'{type(self).__name__}{self.parameters}'
+
+    def probes(self, probe, start_floor, num_floors):
+        """
+        Probe search of the strategy. The engine only runs it when the highest floor breaks the plate, so the highest
+        floor is never probed unless it is the start floor.
+        :param probe: Callback returning whether the plate breaks at a floor.
+        :param start_floor: Starting floor.
+        :param num_floors: Number of floors in the building.
+        :return: Minimum breaking floor.
+        """
+        if num_floors <= PRIOR_TREE_MAX_FLOORS:
+            table = _prior_search_rows(num_floors, *self.parameters)
+
+            def next_floor(low, high):
+                return table[low][high]
+        else:
+            weights = prior_cumulative_weights(num_floors, *self.parameters).tolist()
+
+            def next_floor(low, high):
+                # The floor where the probability mass between low and high is split in half
+                return min(bisect.bisect_left(weights, (weights[low] + weights[high]) / 2, low + 1, high), high - 1)
+
+        # The breaking floor is above low, which holds, and at most high, which breaks
+        low, high = 0, num_floors
+        floor = start_floor
+        while True:
+            if probe(floor):
+                high = floor
+            else:
+                low = floor
+            if high - low <= 1:
+                return high
+            floor = next_floor(low, high)
+
+    def attempts(self, start_floors, breaking_floors, num_floors):
+        """
+        Vectorized attempt counts of the strategy.
+        :param start_floors: Integer array of starting floors.
+        :param breaking_floors: Integer array of true minimum breaking floors (0 if the plate never breaks),
+        broadcastable against start_floors.
+        :param num_floors: Number of floors in the building.
+        :return: Integer array of attempts for every (start floor, breaking floor) pair.
+        """
+        if num_floors <= PRIOR_TREE_MAX_FLOORS:
+            table = prior_search_table(num_floors, *self.parameters)
+        else:
+            weights = prior_cumulative_weights(num_floors, *self.parameters)
+
+        start_floors, breaking_floors = np.broadcast_arrays(start_floors, breaking_floors)
+        attempts = np.zeros(start_floors.shape, dtype=np.int64)
+        flat_attempts = attempts.reshape(-1)
+
+        # Step the unfinished searches in lockstep, dropping each search from the arrays once it is done
+        index = np.arange(flat_attempts.size)
+        breaking = breaking_floors.ravel().astype(np.int64)
+        floor = start_floors.ravel().astype(np.int64)
+        low = np.zeros(index.size, dtype=np.int64)
+        high = np.full(index.size, num_floors, dtype=np.int64)
+        while index.size:
+            flat_attempts[index] += 1
+            broke = floor >= breaking
+            high = np.where(broke, floor, high)
+            low = np.where(broke, low, floor)
+
+            active = high - low > 1
+            index, breaking, low, high = index[active], breaking[active], low[active], high[active]
+            if num_floors <= PRIOR_TREE_MAX_FLOORS:
+                floor = table[low, high].astype(np.int64)
+            else:
+                floor = np.searchsorted(weights, (weights[low] + weights[high]) / 2)
+                floor = np.clip(floor, low + 1, high - 1)
+
+        return np.where(breaking_floors == 0, 0, attempts)
+
+
+def linear_search_attempts(start_floors, breaking_floors, num_floors):
+    """
+    Vectorized attempt counts of linear_search_simulation_with_flag.
+    :param start_floors: Integer array of starting floors.
+    :param breaking_floors: Integer array of true minimum breaking floors (0 if the plate never breaks), broadcastable
+    against start_floors.
+    :param num_floors: Number of floors in the building.
+    :return: Integer array of attempts for every (start floor, breaking floor) pair.
+    """
+    # Breaking at or below the start walks down to the floor below the break, otherwise walks up to the break
+    attempts = np.where(breaking_floors <= start_floors, start_floors - breaking_floors + 2,
+                        breaking_floors - start_floors + 1)
+    return np.where(breaking_floors == 0, 0, attempts)
+
+
+def precise_halving_attempts(start_floors, breaking_floors, num_floors):
+    """
+    Vectorized attempt counts of precise_halving_strategy_simulation_with_flag.
+    :param start_floors: Integer array of starting floors.
+    :param breaking_floors: Integer array of true minimum breaking floors (0 if the plate never breaks), broadcastable
+    against start_floors.
+    :param num_floors: Number of floors in the building.
+    :return: Integer array of attempts for every (start floor, breaking floor) pair.
+    """
+    start_floors, breaking_floors = np.broadcast_arrays(start_floors, breaking_floors)
+    low = np.zeros(start_floors.shape, dtype=np.int64)
+    high = np.full(start_floors.shape, num_floors, dtype=np.int64)
+    floor = start_floors.astype(np.int64)
+    attempts = np.zeros(start_floors.shape, dtype=np.int64)
+
+    # Step every halving search in lockstep, freezing the ones whose bounds have already converged
+    active = low < high
+    while active.any():
+        attempts += active
+        broke = floor >= breaking_floors
+        high = np.where(active & broke, floor - 1, high)
+        low = np.where(active & ~broke, floor + 1, low)
+        floor = (low + high) // 2
+        active = low < high
+
+    # Final check of the converged floor
+    attempts += low == high
+    return np.where(breaking_floors == 0, 0, attempts)
+
+
+def binary_search_attempts(start_floors, breaking_floors, num_floors):
+    """
+    Vectorized attempt counts of binary_search_strategy.
+    :param start_floors: Integer array of starting floors.
+    :param breaking_floors: Integer array of true minimum breaking floors (0 if the plate never breaks), broadcastable
+    against start_floors.
+    :param num_floors: Number of floors in the building.
+    :return: Integer array of attempts for every (start floor, breaking floor) pair.
+    """
+    start_floors, breaking_floors = np.broadcast_arrays(start_floors, breaking_floors)
+
+    # Breaking at or below the start walks down, stopping early at floor 1
+    attempts = np.where(breaking_floors > 1, start_floors - breaking_floors + 2, start_floors)
+
+    # Otherwise binary search upwards from the floor above the start, in lockstep
+    searching_up = breaking_floors > start_floors
+    low = start_floors + 1
+    high = np.full(start_floors.shape, num_floors, dtype=np.int64)
+    up_attempts = np.ones(start_floors.shape, dtype=np.int64)
+    active = searching_up & (low <= high)
+    while active.any():
+        up_attempts += active
+        mid = (low + high) // 2
+        broke = mid >= breaking_floors
+        high = np.where(active & broke, mid - 1, high)
+        low = np.where(active & ~broke, mid + 1, low)
+        active &= low <= high
+
+    attempts = np.where(searching_up, up_attempts, attempts)
+    return np.where(breaking_floors == 0, 0, attempts)
+
+
+# Vectorized attempt counters of the strategies, used by the batch simulation engine
+VECTORIZED_STRATEGY_ATTEMPTS = {}
+
+# Probe searches behind the strategy functions, replayed to tabulate the attempts of strategies without a vectorized
+# counter
+PROBE_SEARCHES = {}
+
+# Strategies selectable by name, e.g. with --strategies
+STRATEGIES = {}
+
+# Strategies built for the parameter ranges being simulated, selectable by name like STRATEGIES. Each factory takes
+# (ball_weight_range, plate_strength_range, floor_height_range)
+STRATEGY_FACTORIES = {}
+
+# Strategies simulated when none are selected
+DEFAULT_STRATEGIES = ['linear_search', 'precise_halving', 'binary_search']
+
+
+def register_strategy(name, strategy, search=None, vectorized_attempts=None):
+    """
+    Make a strategy selectable by name. Strategies registered with their probe search get the fast engine
+    automatically, through attempt tables replayed from the search, up to PROBE_TABLE_MAX_FLOORS floors.
+    Strategy functions must be defined at module level, so worker processes can unpickle them.
+    :param name: Name to select the strategy by.
+    :param strategy: Strategy function taking (floor_heights, ball_weight, plate_strength, start_floor) and returning
+    (attempts, did_break, breaking_floor).
+    :param search: Optional probe search function the strategy runs through run_probe_search.
+    :param vectorized_attempts: Optional vectorized attempt counter taking (start_floors, breaking_floors, num_floors).
+    """
+    STRATEGIES[name] = strategy
+    if search is not None:
+        PROBE_SEARCHES[strategy] = search
+    if vectorized_attempts is not None:
+        VECTORIZED_STRATEGY_ATTEMPTS[strategy] = vectorized_attempts
+
+
+register_strategy('linear_search', linear_search_simulation_with_flag, linear_search_probes, linear_search_attempts)
+register_strategy('precise_halving', precise_halving_strategy_simulation_with_flag, precise_halving_probes,
+                  precise_halving_attempts)
+register_strategy('binary_search', binary_search_strategy, binary_search_probes, binary_search_attempts)
+register_strategy('galloping', galloping_search_strategy, galloping_search_probes)
+register_strategy('interpolation', interpolation_search_strategy, interpolation_search_probes)
+register_strategy('optimal_2_balls', optimal_two_ball_strategy, optimal_two_ball_strategy.probes,
+                  optimal_two_ball_strategy.attempts)
+register_strategy('optimal_3_balls', optimal_three_ball_strategy, optimal_three_ball_strategy.probes,
+                  optimal_three_ball_strategy.attempts)
+
+
+def register_strategy_factory(name, factory):
+    """
+    Make a strategy that depends on the simulated parameter ranges selectable by name. The strategies it builds carry
+    their probe search and vectorized attempt counter as probes and attempts methods, so worker processes can count
+    their attempts without a registry entry, and are rebuilt for every point of a sweep with their for_parameters
+    method.
+    :param name: Name to select the strategy by.
+    :param factory: Function taking (ball_weight_range, plate_strength_range, floor_height_range) and returning the
+    strategy.
+    """
+    STRATEGY_FACTORIES[name] = factory
+
+
+register_strategy_factory('prior_search', PriorSearchStrategy)
+
+
+def build_strategies(names, ball_weight_range, plate_strength_range, floor_height_range):
+    """
+    Look up strategies by name, building the ones that depend on the parameter ranges for the given ranges.
+    :param names: Names from STRATEGIES or STRATEGY_FACTORIES.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :return: List of strategy functions.
+    """
+    return [STRATEGY_FACTORIES[name](ball_weight_range, plate_strength_range, floor_height_range)
+            if name in STRATEGY_FACTORIES else STRATEGIES[name] for name in names]
+
+
+def probe_search_attempts(search, start_floors, breaking_floors, num_floors):
+    """
+    Count the attempts of a probe search for many (start floor, breaking floor) pairs, by replaying it against the
+    outcomes every breaking floor implies. Same interface as the vectorized counters after the search argument.
+    :param search: Probe search function.
+    :param start_floors: Integer array of starting floors.
+    :param breaking_floors: Integer array of true minimum breaking floors (0 if the plate never breaks), broadcastable
+    against start_floors.
+    :param num_floors: Number of floors in the building.
+    :return: Integer array of attempts for every (start floor, breaking floor) pair.
+    """
+    start_floors, breaking_floors = np.broadcast_arrays(start_floors, breaking_floors)
+    attempts = np.zeros(start_floors.shape, dtype=np.int64)
+    probed_breaking_floor = 0
+    probes = 0
+
+    def probe(floor):
+        nonlocal probes
+        probes += 1
+        return floor >= probed_breaking_floor
+
+    for index, (start_floor, breaking_floor) in enumerate(zip(start_floors.flat, breaking_floors.flat)):
+        # The engine exits before the first probe when no floor breaks the plate
+        if breaking_floor == 0:
+            continue
+        probed_breaking_floor, probes = int(breaking_floor), 0
+        search(probe, int(start_floor), num_floors)
+        attempts.flat[index] = probes
+    return attempts
+
+
+def attempt_counter(strategy):
+    """
+    Get the function counting a strategy's attempts for arrays of (start floor, breaking floor) pairs: its vectorized
+    counter, or else its replayed probe search.
+    :param strategy: Strategy function with a vectorized counter or a registered probe search.
+    :return: Function taking (start_floors, breaking_floors, num_floors).
+    """
+    vectorized_attempts = _vectorized_attempts(strategy)
+    if vectorized_attempts is not None:
+        return vectorized_attempts
+    return functools.partial(probe_search_attempts, PROBE_SEARCHES[strategy])
+
+
+def can_count_attempts(strategy, num_floors):
+    """
+    Check whether the attempts of a strategy can be counted without running it trial by trial.
+    :param strategy: Strategy function.
+    :param num_floors: Number of floors in the building.
+    :return: True if the strategy has a vectorized counter, or a probe search and a small enough building to tabulate.
+    """
+    if _vectorized_attempts(strategy) is not None:
+        return True
+    return strategy in PROBE_SEARCHES and num_floors <= PROBE_TABLE_MAX_FLOORS
+
+
+def _vectorized_attempts(strategy):
+    # Strategies built by a factory carry their own counter
+    return VECTORIZED_STRATEGY_ATTEMPTS.get(strategy, getattr(strategy, 'attempts', None))
+
+
+def _cache_file_name(stem, *sources):
+    """
+    Name a cached table after its contents and the code that computes it.
+    The name ends with a digest of ATTEMPT_TABLE_VERSION and the source code of the given functions or classes, so a
+    table cached by different code is never loaded.
+    :param stem: Name of the table's contents, without dots.
+    :param sources: Functions, methods or classes the table is computed with.
+    :return: Name of the table's npy file, or None if some source code is unavailable and the table can't be cached.
+    """
+    texts = [str(ATTEMPT_TABLE_VERSION)]
+    for source in sources:
+        try:
+            texts.append(inspect.getsource(source))
+        except (OSError, TypeError):
+            return None
+    digest = hashlib.sha1('\n'.join(texts).encode()).hexdigest()[:10]
+    return f'{stem}.{digest}.npy'
+
+
+def _load_cached_table(file_name, shape):
+    """
+    Load a table from the cache directory ATTEMPT_TABLE_CACHE_DIR.
+    :param file_name: Name of the table's npy file, or None if the table can't be cached.
+    :param shape: Expected shape of the table.
+    :return: The table, or None if it is not cached or does not have the expected shape.
+    """
+    if ATTEMPT_TABLE_CACHE_DIR is None or file_name is None:
+        return None
+    try:
+        table = np.load(os.path.join(ATTEMPT_TABLE_CACHE_DIR, file_name))
+    except (OSError, ValueError):
+        return None
+    return table if table.shape == shape else None
+
+
+def _save_cached_table(file_name, table):
+    """
+    Save a table to the cache directory ATTEMPT_TABLE_CACHE_DIR, if there is one, and discard the versions of it cached
+    by different code.
+    :param file_name: Name of the table's npy file from _cache_file_name, or None if the table can't be cached.
+    :param table: Array to save.
+    """
+    if ATTEMPT_TABLE_CACHE_DIR is None or file_name is None:
+        return
+    cache_path = os.path.join(ATTEMPT_TABLE_CACHE_DIR, file_name)
+    try:
+        os.makedirs(ATTEMPT_TABLE_CACHE_DIR, exist_ok=True)
+        # Write under a unique name and rename, so concurrent workers never read a partial table
+        temporary_path = f'{cache_path}.{os.getpid()}.tmp.npy'
+        np.save(temporary_path, table)
+        os.replace(temporary_path, cache_path)
+
+        stale_name = re.compile(re.escape(file_name.split('.')[0]) + r'\.[0-9a-f]{10}\.npy')
+        for cached_name in os.listdir(ATTEMPT_TABLE_CACHE_DIR):
+            if cached_name != file_name and stale_name.fullmatch(cached_name):
+                os.remove(os.path.join(ATTEMPT_TABLE_CACHE_DIR, cached_name))
+    except OSError as error:
+        logging.debug("Could not cache table %s: %s", cache_path, error)
+
+
+def _attempt_table_file_name(strategy, num_floors):
+    # Strategies built by a factory are versioned by their class, and every strategy by the code counting its attempts
+    # and any other code it lists in cache_sources, such as the functions building its decision tables
+    sources = [strategy if inspect.isroutine(strategy) else type(strategy)]
+    vectorized_attempts = _vectorized_attempts(strategy)
+    if vectorized_attempts is not None:
+        sources.append(vectorized_attempts)
+    else:
+        sources += [probe_search_attempts, PROBE_SEARCHES[strategy]]
+    sources += getattr(strategy, 'cache_sources', ())
+    return _cache_file_name(f'{strategy.__name__}_{num_floors}', *sources)
+
+
+def attempt_table(strategy, num_floors):
+    """
+    Get the attempts a strategy makes from every start floor for every possible breaking floor.
+    Attempts only depend on the start floor and the breaking floor, so the table is built once per building size from
+    the strategy's attempt counter, then memoized in memory and cached on disk under ATTEMPT_TABLE_CACHE_DIR, versioned
+    by the source code of the strategy and its counter.
+    :param strategy: Strategy function whose attempts can be counted, see can_count_attempts.
+    :param num_floors: Number of floors in the building.
+    :return: Read-only integer array of shape (floors, floors + 1), indexed by [start floor - 1, breaking floor].
+    """
+    key = (strategy, num_floors)
+    if key in _attempt_tables:
+        return _attempt_tables[key]
+
+    file_name = _attempt_table_file_name(strategy, num_floors)
+    table = _load_cached_table(file_name, (num_floors, num_floors + 1))
+    if table is None:
+        table = np.empty((num_floors, num_floors + 1), dtype=np.int32)
+        breaking_floors = np.arange(num_floors + 1)
+        # Build the table a band of start floors at a time to stay within the engine's memory budget
+        rows_per_band = max(1, BATCH_CELL_BUDGET // (num_floors + 1))
+        for first_row in range(0, num_floors, rows_per_band):
+            start_floors = np.arange(first_row + 1, min(first_row + rows_per_band, num_floors) + 1)
+            table[first_row:first_row + len(start_floors)] = attempt_counter(strategy)(
+                start_floors[:, None], breaking_floors[None, :], num_floors)
+        _save_cached_table(file_name, table)
+
+    table.setflags(write=False)
+    _attempt_tables[key] = table
+    return table
+
+
+def optimal_drop_table(balls, num_floors):
+    """
+    Get the decision table of the minimax-optimal drop schedule with a limited number of plates.
+    table[b, d] is the number of floors that b plates and d drops can always search, capped at num_floors + 1. It
+    follows from the drops-based recurrence table[b, d] = table[b - 1, d - 1] + 1 + table[b, d - 1]: drop from the
+    floor just above what one plate fewer can search with one drop fewer, then search below it if the plate breaks or
+    above it if it holds. Columns are only needed up to the fewest drops with which two plates search the whole
+    building, O(sqrt n), because a single plate is always used floor by floor. The table is memoized in memory and
+    cached on disk under ATTEMPT_TABLE_CACHE_DIR, versioned by the source code of this function.
+    :param balls: Number of plates.
+    :param num_floors: Number of floors in the building.
+    :return: Read-only integer array of shape (balls + 1, drops + 1), indexed by [plates, drops].
+    """
+    key = (balls, num_floors)
+    if key in _drop_tables:
+        return _drop_tables[key]
+
+    # Two plates search d (d + 1) / 2 floors with d drops
+    max_drops = 1 if balls < 2 else math.ceil((math.sqrt(8 * num_floors + 1) - 1) / 2)
+    file_name = _cache_file_name(f'optimal_drops_{balls}_{num_floors}', optimal_drop_table)
+    table = _load_cached_table(file_name, (balls + 1, max_drops + 1))
+    if table is None:
+        table = np.zeros((balls + 1, max_drops + 1), dtype=np.int64)
+        for drops in range(1, max_drops + 1):
+            table[1:, drops] = np.minimum(table[:-1, drops - 1] + 1 + table[1:, drops - 1], num_floors + 1)
+        _save_cached_table(file_name, table)
+
+    table.setflags(write=False)
+    _drop_tables[key] = table
+    return table
+
+
+def _optimal_drop_rows(balls, num_floors):
+    # The decision table as lists, for the scalar engine's per-probe lookups
+    key = (balls, num_floors)
+    if key not in _drop_table_rows:
+        _drop_table_rows[key] = optimal_drop_table(balls, num_floors).tolist()
+    return _drop_table_rows[key]
+
+
+def _parameter_digest(ball_weight_range, plate_strength_range, floor_height_range):
+    # Short stable name of a parameter set and of the settings its prior is computed with, for cache file names
+    parameters = repr((ATTEMPT_TABLE_VERSION, tuple(ball_weight_range), tuple(plate_strength_range),
+                       tuple(floor_height_range), PRIOR_SMOOTHING, EXACT_GRID_STEPS, EXACT_GRID_MAX_POINTS,
+                       EXACT_GRID_FLOORS, EXACT_SPREAD))
+    return hashlib.sha1(parameters.encode()).hexdigest()[:10]
+
+
+def _prior_cache_sources():
+    # The code computing the prior and its decision tree, which versions the trees and the tables built from them
+    return (prior_search_table, prior_cumulative_weights, breaking_floor_distribution, drop_height_cdf,
+            drop_height_threshold_cdf)
+
+
+def prior_cumulative_weights(num_floors, ball_weight_range, plate_strength_range, floor_height_range):
+    """
+    Get the cumulative prior probability of the breaking floors that searches are run for.
+    The engine only searches when some floor breaks the plate, so only floors 1 to num_floors are weighted, by their
+    probability from breaking_floor_distribution smoothed with PRIOR_SMOOTHING. The mass of the floors above low and up
+    to high is weights[high] - weights[low]. The weights are memoized in memory.
+    :param num_floors: Number of floors in the building.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :return: Read-only array of shape (floors + 1,), starting at 0.
+    """
+    key = (num_floors, tuple(ball_weight_range), tuple(plate_strength_range), tuple(floor_height_range))
+    if key not in _prior_weights:
+        probabilities = breaking_floor_distribution(num_floors, ball_weight_range, plate_strength_range,
+                                                    floor_height_range)[1:]
+        weights = np.concatenate([[0], np.cumsum(probabilities + PRIOR_SMOOTHING / num_floors)])
+        weights.setflags(write=False)
+        _prior_weights[key] = weights
+    return _prior_weights[key]
+
+
+def prior_search_table(num_floors, ball_weight_range, plate_strength_range, floor_height_range):
+    """
+    Get the decision tree of the search that needs the fewest attempts on average under the prior of the breaking floor.
+    table[low, high] is the floor to probe next when the breaking floor is above low and at most high. The tree is the
+    optimal alphabetic binary tree over the floors weighted by prior_cumulative_weights, built by dynamic programming
+    over the intervals of floors: searching an interval costs its probability mass plus the cost of the two intervals
+    its probe splits it into. Knuth's bound keeps the best probe of an interval between those of the two intervals one
+    floor narrower, so the table takes O(n^2) to build. It is memoized in memory and cached on disk under
+    ATTEMPT_TABLE_CACHE_DIR, versioned by the prior's settings and the source code computing the prior and the tree.
+    :param num_floors: Number of floors in the building, at most PRIOR_TREE_MAX_FLOORS.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :return: Read-only integer array of shape (floors + 1, floors + 1), indexed by [low, high].
+    """
+    key = (num_floors, tuple(ball_weight_range), tuple(plate_strength_range), tuple(floor_height_range))
+    if key in _prior_tables:
+        return _prior_tables[key]
+
+    digest = _parameter_digest(ball_weight_range, plate_strength_range, floor_height_range)
+    file_name = _cache_file_name(f'prior_search_tree_{digest}_{num_floors}', *_prior_cache_sources())
+    table = _load_cached_table(file_name, (num_floors + 1, num_floors + 1))
+    if table is None:
+        weights = prior_cumulative_weights(num_floors, ball_weight_range, plate_strength_range,
+                                           floor_height_range).tolist()
+        cost = [[0.0] * (num_floors + 1) for _ in range(num_floors + 1)]
+        best = [[0] * (num_floors + 1) for _ in range(num_floors + 1)]
+        for low in range(num_floors):
+            # A single candidate floor needs no probe, but bounds the probes of the intervals one floor wider
+            best[low][low + 1] = low + 1
+        for width in range(2, num_floors + 1):
+            for low in range(num_floors - width + 1):
+                high = low + width
+                low_costs = cost[low]
+                best_cost, best_floor = math.inf, 0
+                for floor in range(best[low][high - 1], min(best[low + 1][high], high - 1) + 1):
+                    split_cost = low_costs[floor] + cost[floor][high]
+                    if split_cost < best_cost:
+                        best_cost, best_floor = split_cost, floor
+                cost[low][high] = best_cost + weights[high] - weights[low]
+                best[low][high] = best_floor
+        table = np.array(best, dtype=np.int32)
+        _save_cached_table(file_name, table)
+
+    table.setflags(write=False)
+    _prior_tables[key] = table
+    return table
+
+
+def _prior_search_rows(num_floors, ball_weight_range, plate_strength_range, floor_height_range):
+    # The decision tree as lists, for the scalar engine's per-probe lookups
+    key = (num_floors, tuple(ball_weight_range), tuple(plate_strength_range), tuple(floor_height_range))
+    if key not in _prior_table_rows:
+        _prior_table_rows[key] = prior_search_table(num_floors, ball_weight_range, plate_strength_range,
+                                                    floor_height_range).tolist()
+    return _prior_table_rows[key]
+
+
+def draw_uniform_trials(num_trials, values_per_trial, rng=None):
+    """
+    Draw a block of uniform [0, 1) values in one vectorized call.
+    Without an rng the values come from the global random module: its Mersenne Twister state is handed to numpy and
+    back, so the values and the state afterwards are exactly those of calling random.random()
+    num_trials * values_per_trial times in a row.
+    :param num_trials: Number of trials (rows) to draw.
+    :param values_per_trial: Number of values (columns) per trial.
+    :param rng: Optional numpy Generator to draw from instead of the global random module.
+    :return: Array of shape (num_trials, values_per_trial).
+    """
+    if rng is not None:
+        return rng.random((num_trials, values_per_trial))
+
+    version, internal_state, gauss_next = random.getstate()
+    bit_generator = np.random.MT19937()
+    bit_generator.state = {'bit_generator': 'MT19937',
+                           'state': {'key': np.array(internal_state[:-1], dtype=np.uint32), 'pos': internal_state[-1]}}
+    uniforms = np.random.Generator(bit_generator).random((num_trials, values_per_trial))
+
+    mt_state = bit_generator.state['state']
+    random.setstate((version, tuple(mt_state['key'].tolist()) + (mt_state['pos'],), gauss_next))
+    return uniforms
+
+
+def scale_uniform(uniforms, value_range):
+    """
+    Scale uniform [0, 1) values onto a range the same way random.uniform does.
+    :param uniforms: Array of uniform values.
+    :param value_range: Tuple of (low, high).
+    :return: Array of values in the range.
+    """
+    low, high = value_range
+    return low + (high - low) * uniforms
+
+
+def breaking_floors_for_trials(floor_heights, ball_weights, plate_strengths):
+    """
+    Compute the true minimum breaking floor of many trials at once.
+    :param floor_heights: Array of shape (trials, floors) with the height of each floor.
+    :param ball_weights: Array of ball weights, one per trial.
+    :param plate_strengths: Array of plate strengths, one per trial.
+    :return: Integer array of minimum breaking floors, 0 where even the top floor does not break the plate.
+    """
+    heights = np.cumsum(floor_heights, axis=1)
+    forces = ball_weights[:, None] * np.sqrt(2 * GRAVITY * heights)
+    # Forces grow with the floor, so the number of floors that hold is the position of the breaking floor
+    intact_floors = np.count_nonzero(forces <= plate_strengths[:, None], axis=1)
+    return np.where(forces[:, -1] > plate_strengths, intact_floors + 1, 0)
+
+
+# Per-floor metrics exposed by the floor views of SimulationResults, in the order the results dicts used to have them
+FLOOR_RESULT_KEYS = ('attempts', 'breaks', 'average_attempts', 'break_percentage')
+
+
+class FloorResults(Mapping):
+    """
+    Read-only view of one floor of a SimulationResults, returning plain Python numbers.
+    """
+
+    __slots__ = ('_arrays', '_index')
+
+    def __init__(self, arrays, index):
+        """
+        :param arrays: Per-floor arrays of the results.
+        :param index: Index of the floor in the arrays (floor - 1).
+        """
+        self._arrays = arrays
+        self._index = index
+
+    def __getitem__(self, key):
+        if key not in FLOOR_RESULT_KEYS:
+            raise KeyError(key)
+        return self._arrays[key][self._index].item()
+
+    def __iter__(self):
+        return iter(FLOOR_RESULT_KEYS)
+
+    def __len__(self):
+        return len(FLOOR_RESULT_KEYS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class SimulationResults(Mapping):
+    """
+    Aggregated results of a simulation, held as one fixed-dtype array per metric indexed by floor - 1.
+
+    It reads like the dict of per-floor dicts it replaces, a mapping of floor number to that floor's attempts, breaks,
+    average attempts and break percentage, so code written against the dicts keeps working. The arrays themselves are
+    exposed read-only through arrays for vectorized post-processing, and cost a few bytes per floor instead of a dict.
+    """
+
+    def __init__(self, arrays):
+        """
+        :param arrays: Dictionary of equal-length per-floor arrays, as built by SimulationAggregator.result_arrays().
+        """
+        self.arrays = {}
+        for name, values in arrays.items():
+            values = np.array(values)
+            values.setflags(write=False)
+            self.arrays[name] = values
+        self.num_floors = len(self.arrays['attempts'])
+        self._analysis = None
+
+    def analysis(self):
+        """
+        Get the analysis of the results, computed on first use and then shared by everything that reports them.
+        :return: ResultsAnalysis.
+        """
+        if self._analysis is None:
+            self._analysis = ResultsAnalysis(self.arrays)
+        return self._analysis
+
+    def __getitem__(self, floor):
+        if not isinstance(floor, (int, np.integer)) or not 1 <= floor <= self.num_floors:
+            raise KeyError(floor)
+        return FloorResults(self.arrays, int(floor) - 1)
+
+    def __iter__(self):
+        return iter(range(1, self.num_floors + 1))
+
+    def __len__(self):
+        return self.num_floors
+
+    def __contains__(self, floor):
+        return isinstance(floor, (int, np.integer)) and 1 <= floor <= self.num_floors
+
+    def __repr__(self):
+        return f'{type(self).__name__}(num_floors={self.num_floors})'
+
+    def items(self):
+        return _FloorItemsView(self)
+
+    def values(self):
+        return _FloorValuesView(self)
+
+    def _floor_dicts(self, chunk_floors=65536):
+        # Bulk iteration converts the arrays a chunk at a time instead of going through a view per floor; the dicts
+        # are fresh copies, so changing them never changes the results
+        for first_index in range(0, self.num_floors, chunk_floors):
+            columns = [self.arrays[key][first_index:first_index + chunk_floors].tolist() for key in FLOOR_RESULT_KEYS]
+            for floor_values in zip(*columns):
+                yield dict(zip(FLOOR_RESULT_KEYS, floor_values))
+
+    def to_dict(self):
+        """
+        Convert the results to the plain dict of per-floor dicts, e.g. for printing.
+        :return: Dictionary of per-floor dictionaries keyed by floor.
+        """
+        return {floor: dict(floor_results) for floor, floor_results in self.items()}
+
+
+class ResultsAnalysis:
+    """
+    Derived metrics of a simulation's results, computed in one vectorized pass over the per-floor arrays: the efficiency
+    score of every floor, the most efficient floor and the floor with the most breaks, the floors tied with them, and
+    the top floors by any metric.
+    """
+
+    def __init__(self, arrays):
+        """
+        :param arrays: Per-floor arrays with floor, average_attempts, breaks and break_percentage, and optionally a
+        precomputed efficiency_score.
+        """
+        self.arrays = dict(arrays)
+        if 'efficiency_score' not in self.arrays:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                average_attempts = np.asarray(self.arrays['average_attempts'], dtype=np.float64)
+                break_percentage = np.asarray(self.arrays['break_percentage'], dtype=np.float64)
+                self.arrays['efficiency_score'] = np.where(break_percentage != 0, average_attempts / break_percentage,
+                                                           np.inf)
+
+        floors = self.arrays['floor']
+        efficiency_scores = self.arrays['efficiency_score']
+        breaks = self.arrays['breaks']
+
+        # argmin and argmax return the first of equal values, like the min() and strict > scans they replace
+        best_index = int(np.argmin(efficiency_scores))
+        self.most_efficient_floor = floors[best_index].item()
+        self.efficiency_score = efficiency_scores[best_index].item()
+        self.tied_efficient_floors = floors[efficiency_scores == efficiency_scores[best_index]]
+
+        most_breaks_index = int(np.argmax(breaks))
+        if breaks[most_breaks_index] > 0:
+            self.most_breaks_floor = floors[most_breaks_index].item()
+            self.most_breaks = breaks[most_breaks_index].item()
+            self.tied_most_breaks_floors = floors[breaks == breaks[most_breaks_index]]
+        else:
+            # Nothing broke anywhere
+            self.most_breaks_floor, self.most_breaks = None, 0
+            self.tied_most_breaks_floors = floors[:0]
+
+    def top_floors(self, count, metric='efficiency_score', lowest=True):
+        """
+        Rank the floors by a metric.
+        :param count: Number of floors to return.
+        :param metric: Name of a per-floor metric, e.g. efficiency_score or breaks.
+        :param lowest: Rank the lowest values first, as for the efficiency score; False ranks the highest first.
+        :return: Array of up to count floors, best first, with ties in floor order.
+        """
+        values = np.asarray(self.arrays[metric], dtype=np.float64)
+        values = values if lowest else -values
+        count = min(count, len(values))
+        if count <= 0:
+            return self.arrays['floor'][:0]
+
+        # Partition out the best floors first so ranking a few of a million floors stays linear
+        candidates = np.argpartition(values, count - 1)[:count] if count < len(values) else np.arange(len(values))
+        candidates = np.flatnonzero(values <= values[candidates].max())
+        ranked = candidates[np.lexsort((candidates, values[candidates]))]
+        return self.arrays['floor'][ranked[:count]]
+
+
+def analyze_results(simulation_results):
+    """
+    Analyze simulation results, reusing the cached analysis of SimulationResults.
+    :param simulation_results: SimulationResults or dictionary containing the results from the simulation.
+    :return: ResultsAnalysis.
+    """
+    if isinstance(simulation_results, SimulationResults):
+        return simulation_results.analysis()
+
+    floors = list(simulation_results)
+    arrays = {'floor': np.array(floors)}
+    for key in ['average_attempts', 'breaks', 'break_percentage']:
+        arrays[key] = np.array([simulation_results[floor][key] for floor in floors])
+    return ResultsAnalysis(arrays)
+
+
+class _FloorItemsView(ItemsView):
+
+    def __iter__(self):
+        return zip(self._mapping, self._mapping._floor_dicts())
+
+
+class _FloorValuesView(ValuesView):
+
+    def __iter__(self):
+        return self._mapping._floor_dicts()
+
+
+class SimulationAggregator:
+    """
+    Streaming, mergeable aggregate of simulation trials.
+
+    Trials are folded in as they complete: exact per-strategy integer counters of attempts per start floor and of
+    breaks per breaking floor, plus a running mean and sum of squared deviations (Welford / Chan et al.) of the attempts
+    of every strategy from every start floor. A single pass therefore gives every strategy's results as well as the
+    combined view. Every strategy runs on the same trials, so the same moments are kept of the per-trial difference
+    between each strategy's attempts and those of the first strategy in the roster, for paired comparisons. Memory is
+    constant in the number of trials, and partial aggregates from other processes or earlier runs can be merged in.
+    """
+
+    def __init__(self, num_floors, num_strategies, exact=False):
+        """
+        :param num_floors: Number of floors in the building.
+        :param num_strategies: Number of strategies in the roster.
+        :param exact: Hold expected values computed without sampling, so the counters are floats and the confidence
+        intervals have zero width.
+        """
+        self.num_floors = num_floors
+        self.num_strategies = num_strategies
+        self.exact = exact
+        self.trials = 0
+        # Arrays are (strategy, floor number), so floor 0 is unused for start floors and means "no break" for breaks
+        counter_dtype = np.float64 if exact else np.int64
+        self.strategy_attempts = np.zeros((num_strategies, num_floors + 1), dtype=counter_dtype)
+        self.strategy_breaks = np.zeros((num_strategies, num_floors + 1), dtype=counter_dtype)
+        self.attempts_mean = np.zeros((num_strategies, num_floors + 1))
+        self.attempts_m2 = np.zeros((num_strategies, num_floors + 1))
+        # Moments of each strategy's attempts minus the first strategy's in the same trial
+        self.difference_mean = np.zeros((num_strategies, num_floors + 1))
+        self.difference_m2 = np.zeros((num_strategies, num_floors + 1))
+
+    @property
+    def attempts(self):
+        """
+        Attempts per start floor summed over all strategies.
+        """
+        return self.strategy_attempts.sum(axis=0)
+
+    @property
+    def breaks(self):
+        """
+        Breaks per breaking floor summed over all strategies.
+        """
+        return self.strategy_breaks.sum(axis=0)
+
+    def update(self, attempts, trial_counts, breaks):
+        """
+        Fold a batch of trials into the aggregate.
+        :param attempts: Integer array of shape (strategies, floors, groups) with the attempts of every strategy from
+        every start floor, for groups of trials that behave identically.
+        :param trial_counts: Integer array with the number of trials in each group.
+        :param breaks: Integer array of shape (strategies, floors + 1) with the breaks per breaking floor each strategy
+        found in the batch.
+        """
+        batch_trials = int(trial_counts.sum())
+        if batch_trials == 0:
+            return
+
+        totals = attempts @ trial_counts
+        batch_mean = totals / batch_trials
+        batch_m2 = ((attempts - batch_mean[..., None]) ** 2) @ trial_counts
+        differences = attempts - attempts[:1]
+        difference_mean = batch_mean - batch_mean[:1]
+        difference_m2 = ((differences - difference_mean[..., None]) ** 2) @ trial_counts
+
+        self.strategy_attempts[:, 1:] += totals
+        self.strategy_breaks += breaks
+        self._merge_moments(batch_trials, batch_mean, batch_m2, self.attempts_mean[:, 1:], self.attempts_m2[:, 1:])
+        self._merge_moments(batch_trials, difference_mean, difference_m2, self.difference_mean[:, 1:],
+                            self.difference_m2[:, 1:])
+        self.trials += batch_trials
+
+    def merge(self, other):
+        """
+        Merge another partial aggregate of the same simulation into this one.
+        :param other: SimulationAggregator with the same number of floors and strategies.
+        :return: This aggregator.
+        """
+        if (other.num_floors, other.num_strategies) != (self.num_floors, self.num_strategies):
+            raise ValueError("Can only merge aggregates with the same number of floors and strategies.")
+        if other.exact or self.exact:
+            raise ValueError("Exact aggregates hold expected values and cannot be merged.")
+        if other.trials == 0:
+            return self
+
+        self.strategy_attempts += other.strategy_attempts
+        self.strategy_breaks += other.strategy_breaks
+        self._merge_moments(other.trials, other.attempts_mean, other.attempts_m2, self.attempts_mean,
+                            self.attempts_m2)
+        self._merge_moments(other.trials, other.difference_mean, other.difference_m2, self.difference_mean,
+                            self.difference_m2)
+        self.trials += other.trials
+        return self
+
+    def _merge_moments(self, other_trials, other_mean, other_m2, mean, m2):
+        # Chan et al. parallel update of the running mean and sum of squared deviations, in place
+        total_trials = self.trials + other_trials
+        delta = other_mean - mean
+        mean += delta * (other_trials / total_trials)
+        m2 += other_m2 + delta ** 2 * (self.trials * other_trials / total_trials)
+
+    def attempt_statistics(self, strategy_index=None, z_score=1.96):
+        """
+        Get the mean attempts per strategy execution from every start floor with its spread and confidence interval.
+        :param strategy_index: Position of a strategy in the roster, or None to pool all strategies.
+        :param z_score: Standard score of the confidence interval, 1.96 for 95%.
+        :return: Tuple of (count, mean, standard deviation, confidence interval half-width) arrays indexed by floor.
+        """
+        if strategy_index is None:
+            # Every strategy runs from every floor in every trial, so the strategies are strata of equal size rather
+            # than a source of noise: pool their within-strategy variances and leave out the spread between them
+            count = self.trials * self.num_strategies
+            mean = self.attempts_mean.mean(axis=0)
+            degrees_of_freedom = self.num_strategies * (self.trials - 1)
+            m2 = self.attempts_m2.sum(axis=0)
+        else:
+            count = self.trials
+            mean = self.attempts_mean[strategy_index]
+            degrees_of_freedom = self.trials - 1
+            m2 = self.attempts_m2[strategy_index]
+
+        if self.exact:
+            # Exact moments are those of the whole distribution rather than estimates, so there is nothing to bound
+            std = np.sqrt(m2 / count)
+            return count, mean, std, np.zeros_like(mean)
+
+        std = np.sqrt(m2 / degrees_of_freedom) if degrees_of_freedom > 0 else np.zeros_like(mean)
+        half_width = z_score * std / math.sqrt(count) if count > 0 else np.full_like(mean, np.inf)
+        return count, mean, std, half_width
+
+    def paired_difference_statistics(self, strategy_index, z_score=1.96):
+        """
+        Get the mean difference between a strategy's attempts and the first strategy's from every start floor, with its
+        spread and confidence interval.
+        Both strategies ran on the same trials, so the interval comes from the spread of the per-trial differences.
+        Trial-to-trial noise that both strategies share cancels out, which makes the interval much narrower than the
+        one that treats the two means as independent.
+        :param strategy_index: Position of a strategy in the roster.
+        :param z_score: Standard score of the confidence interval, 1.96 for 95%.
+        :return: Tuple of (mean, standard deviation, confidence interval half-width) arrays indexed by floor.
+        """
+        mean = self.difference_mean[strategy_index]
+        m2 = self.difference_m2[strategy_index]
+        if self.exact:
+            return mean, np.sqrt(m2 / self.trials), np.zeros_like(mean)
+
+        std = np.sqrt(m2 / (self.trials - 1)) if self.trials > 1 else np.zeros_like(mean)
+        half_width = z_score * std / math.sqrt(self.trials) if self.trials > 0 else np.full_like(mean, np.inf)
+        return mean, std, half_width
+
+    def results(self, strategy_index=None):
+        """
+        Build the aggregated results for each starting floor.
+        :param strategy_index: Position of a strategy in the roster to get only its results, as if it had been
+        simulated on its own, or None for all strategies combined.
+        :return: SimulationResults of attempts, average attempts, breaks and break percentage keyed by floor.
+        """
+        return SimulationResults(self.result_arrays(strategy_index))
+
+    def result_arrays(self, strategy_index=None):
+        """
+        Build the aggregated results as per-floor arrays, without going through a dict.
+        :param strategy_index: Position of a strategy in the roster to get only its results, or None for all strategies
+        combined.
+        :return: Dictionary of arrays indexed by floor - 1: floor, attempts, average_attempts, breaks, break_percentage
+        and efficiency_score (inf where nothing broke).
+        """
+        if strategy_index is None:
+            attempts, breaks, num_strategies = self.attempts[1:], self.breaks[1:], self.num_strategies
+        else:
+            attempts, breaks, num_strategies = (self.strategy_attempts[strategy_index, 1:],
+                                                self.strategy_breaks[strategy_index, 1:], 1)
+
+        total_attempts = attempts.sum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average_attempts = attempts / (self.trials * num_strategies)
+            break_percentage = breaks / total_attempts * 100 if total_attempts else np.zeros(self.num_floors)
+            efficiency_score = np.where(break_percentage != 0, average_attempts / break_percentage, np.inf)
+
+        return {
+            'floor': np.arange(1, self.num_floors + 1),
+            'attempts': attempts,
+            'average_attempts': average_attempts,
+            'breaks': breaks,
+            'break_percentage': break_percentage,
+            'efficiency_score': efficiency_score,
+        }
+
+    def save(self, path, **extra_arrays):
+        """
+        Save the aggregate to an npz file so a run can be resumed or merged later.
+        The file is written under a temporary name and renamed into place, so an interrupted save never leaves a
+        partial file behind.
+        :param path: File to write.
+        :param extra_arrays: Additional arrays to store alongside the aggregate, e.g. checkpoint metadata.
+        """
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'wb') as state_file:
+            np.savez(state_file, num_floors=self.num_floors, num_strategies=self.num_strategies, exact=self.exact,
+                     trials=self.trials, strategy_attempts=self.strategy_attempts,
+                     strategy_breaks=self.strategy_breaks, attempts_mean=self.attempts_mean,
+                     attempts_m2=self.attempts_m2, difference_mean=self.difference_mean,
+                     difference_m2=self.difference_m2, **extra_arrays)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an aggregate saved with save().
+        :param path: File to read.
+        :return: SimulationAggregator.
+        """
+        with np.load(path) as state:
+            exact = bool(state['exact']) if 'exact' in state else False
+            aggregator = cls(int(state['num_floors']), int(state['num_strategies']), exact=exact)
+            aggregator.trials = int(state['trials'])
+            for name in ['strategy_attempts', 'strategy_breaks', 'attempts_mean', 'attempts_m2']:
+                getattr(aggregator, name)[...] = state[name]
+            for name in ['difference_mean', 'difference_m2']:
+                # Aggregates saved before paired differences were kept cannot report them
+                getattr(aggregator, name)[...] = state[name] if name in state else np.nan
+        return aggregator
+
+
+def _run_vectorized_trials(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                           strategy_roster, aggregator, rng=None):
+    """
+    Run the trials in vectorized batches, folding each batch into the aggregator.
+    Batches are sized so that memory stays linear in the number of floors, whatever the number of iterations.
+    :param aggregator: SimulationAggregator to update.
+    :param rng: Optional numpy Generator to draw the trials from instead of the global random module.
+    :return: The updated aggregator.
+    """
+    num_floors = aggregator.num_floors
+    start_floors = np.arange(1, num_floors + 1)
+    batch_size = max(1, BATCH_CELL_BUDGET // num_floors)
+    tables = None
+    if num_floors <= ATTEMPT_TABLE_MAX_FLOORS:
+        tables = [attempt_table(strategy, num_floors) for strategy in strategy_roster]
+
+    for batch_start in range(0, num_iterations, batch_size):
+        num_trials = min(batch_size, num_iterations - batch_start)
+
+        # Each row holds a trial's floor heights, ball weight and plate strength in the order they used to be drawn
+        uniforms = draw_uniform_trials(num_trials, num_floors + 2, rng)
+        floor_heights = scale_uniform(uniforms[:, :num_floors], floor_height_range)
+        ball_weights = scale_uniform(uniforms[:, num_floors], ball_weight_range)
+        plate_strengths = scale_uniform(uniforms[:, num_floors + 1], plate_strength_range)
+
+        breaking_floors = breaking_floors_for_trials(floor_heights, ball_weights, plate_strengths)
+
+        # Attempts only depend on the start floor and the breaking floor, so take each distinct breaking floor once
+        # from the histogram and weight it by the number of trials that share it
+        histogram = np.bincount(breaking_floors, minlength=num_floors + 1)
+        distinct_floors = np.flatnonzero(histogram)
+        trial_counts = histogram[distinct_floors]
+        if tables is not None:
+            attempts = np.stack([table[:, distinct_floors] for table in tables])
+        else:
+            attempts = np.stack([attempt_counter(strategy)(start_floors[:, None], distinct_floors[None, :], num_floors)
+                                 for strategy in strategy_roster])
+
+        # Every strategy finds the breaking floor from every start floor
+        breaks = np.zeros((len(strategy_roster), num_floors + 1), dtype=np.int64)
+        breaks[:, distinct_floors] = trial_counts * num_floors
+        breaks[:, 0] = 0
+
+        aggregator.update(attempts, trial_counts, breaks)
+
+    return aggregator
+
+
+def _run_scalar_trials(num_iterations, ball_weight_range, plate_strength_range, floor_height_range, strategy_roster,
+                       aggregator, rng=None):
+    """
+    Run the trials one at a time, calling every strategy function for every start floor.
+    :param aggregator: SimulationAggregator to update.
+    :param rng: Optional numpy Generator to draw the trials from instead of the global random module.
+    :return: The updated aggregator.
+    """
+    num_floors = aggregator.num_floors
+    single_trial = np.ones(1, dtype=np.int64)
+
+    for _ in range(num_iterations):
+        if TRACE_ENABLED:
+            _tracer.start_trial()
+
+        if rng is None:
+            floor_heights = [random.uniform(*floor_height_range) for _ in range(num_floors)]
+            ball_weight = random.uniform(*ball_weight_range)
+            plate_strength = random.uniform(*plate_strength_range)
+        else:
+            # Same row layout as the vectorized engine, so both engines see identical trials from the same stream
+            uniforms = rng.random(num_floors + 2)
+            floor_heights = scale_uniform(uniforms[:num_floors], floor_height_range).tolist()
+            ball_weight = float(scale_uniform(uniforms[num_floors], ball_weight_range))
+            plate_strength = float(scale_uniform(uniforms[num_floors + 1], plate_strength_range))
+
+        # Index the trial's building once so every strategy and start floor shares the same prefix sums and forces
+        building = Building(floor_heights)
+
+        attempts = np.zeros((len(strategy_roster), num_floors, 1), dtype=np.int64)
+        breaks = np.zeros((len(strategy_roster), num_floors + 1), dtype=np.int64)
+        for floor in range(1, num_floors + 1):
+            for strategy_index, strategy in enumerate(strategy_roster):
+                strategy_attempts, did_break, breaking_floor = strategy(building, ball_weight, plate_strength, floor)
+                attempts[strategy_index, floor - 1, 0] = strategy_attempts
+                if did_break:
+                    breaks[strategy_index, breaking_floor] += 1
+
+        aggregator.update(attempts, single_trial, breaks)
+
+    return aggregator
+
+
+def can_vectorize(strategy_roster, floor_height_range, num_floors=DEFAULT_NUM_FLOORS):
+    """
+    Check whether the vectorized engine can reproduce the strategies exactly.
+    It needs to count the attempts of every strategy without running it (see can_count_attempts), and non-negative
+    floor heights so that the impact force never decreases going up the building.
+    :param strategy_roster: List of strategy functions to use in the simulation.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :param num_floors: Number of floors in the building.
+    :return: True if the vectorized engine can be used.
+    """
+    return min(floor_height_range) >= 0 and all(can_count_attempts(strategy, num_floors)
+                                                for strategy in strategy_roster)
+
+
+def select_trial_runner(strategy_roster, floor_height_range, num_floors=DEFAULT_NUM_FLOORS):
+    """
+    Pick the vectorized engine when it can reproduce the strategies exactly, otherwise the scalar one.
+    Tracing needs the individual probes, so it always gets the scalar engine.
+    :param strategy_roster: List of strategy functions to use in the simulation.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :param num_floors: Number of floors in the building.
+    :return: Trial runner function.
+    """
+    if not TRACE_ENABLED and can_vectorize(strategy_roster, floor_height_range, num_floors):
+        return _run_vectorized_trials
+    return _run_scalar_trials
+
+
+def block_rng(seed, block_index, skip_trials=0, num_floors=DEFAULT_NUM_FLOORS):
+    """
+    Create the independent random stream of one seeded block of trials.
+    :param seed: Seed of the whole simulation run.
+    :param block_index: Index of the block of SEED_BLOCK_SIZE trials.
+    :param skip_trials: Number of trials at the start of the block to jump over.
+    :param num_floors: Number of floors in the building, which sets how many values each trial draws.
+    :return: numpy Generator for the block.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block_index,)))
+    if skip_trials:
+        # Every uniform double consumes one 64-bit output, so the stream can jump straight to the first trial
+        rng.bit_generator.advance(skip_trials * (num_floors + 2))
+    return rng
+
 
-def calculate_impact_force(height, weight):
+def seeded_trial_uniforms(seed, first_trial, num_trials, num_floors=DEFAULT_NUM_FLOORS):
     """
-    Calculate the impact force of the ball.
-    :param height: Drop height in meters.
-    :param weight: Weight of the ball in kg.
-    :return: Impact force in Newtons.
+    Draw the uniform values of consecutive trials of a seeded run straight from the seed and the trial numbers.
+    Trial i is trial i % SEED_BLOCK_SIZE of block i // SEED_BLOCK_SIZE, whose stream jumps to it without drawing the
+    trials before it, so any trial can be generated on its own in O(log i). The rows are exactly the ones the seeded
+    engines draw for the same trials, for any number of workers.
+    :param seed: Seed of the whole simulation run.
+    :param first_trial: Index of the first trial to draw.
+    :param num_trials: Number of trials to draw.
+    :param num_floors: Number of floors in the building.
+    :return: Array of shape (trials, floors + 2): each row holds a trial's floor heights, ball weight and plate
+    strength as uniform [0, 1) values.
     """
-    g = 9.8  # Gravity in m/s^2
-    velocity = math.sqrt(2 * g * height)
-    force = weight * velocity
-    logging.debug(f"Calculated impact force: Height = {height} m, Weight = {weight} kg, Force = {force} N")
-    return force
+    blocks = []
+    trial = first_trial
+    end_trial = first_trial + num_trials
+    while trial < end_trial:
+        block_index, skip_trials = divmod(trial, SEED_BLOCK_SIZE)
+        block_trials = min(SEED_BLOCK_SIZE - skip_trials, end_trial - trial)
+        blocks.append(draw_uniform_trials(block_trials, num_floors + 2,
+                                          block_rng(seed, block_index, skip_trials, num_floors)))
+        trial += block_trials
+    return np.concatenate(blocks) if blocks else np.empty((0, num_floors + 2))
+
+
+def seeded_trial(seed, trial, ball_weight_range, plate_strength_range, floor_height_range,
+                 num_floors=DEFAULT_NUM_FLOORS):
+    """
+    Generate one trial of a seeded run on its own, e.g. to replay a trial that behaved unexpectedly.
+    :param seed: Seed of the whole simulation run.
+    :param trial: Index of the trial in the run.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :param num_floors: Number of floors in the building.
+    :return: Tuple of the trial's floor heights, ball weight and plate strength.
+    """
+    uniforms = seeded_trial_uniforms(seed, trial, 1, num_floors)[0]
+    return (scale_uniform(uniforms[:num_floors], floor_height_range).tolist(),
+            float(scale_uniform(uniforms[num_floors], ball_weight_range)),
+            float(scale_uniform(uniforms[num_floors + 1], plate_strength_range)))
 
 
-def cumulative_height(floor_heights, floor):
+def create_trial_set(path, num_trials, num_floors=DEFAULT_NUM_FLOORS, seed=None):
     """
-    Calculate the cumulative height up to a given floor.
-    :param floor_heights: List of heights for each floor.
-    :param floor: Target floor number.
-    :return: Cumulative height up to the given floor.
+    Store a set of trials in an npy file, to replay exactly the same trials in every run that is to be compared.
+    Every row holds a trial's uniform [0, 1) values in the engines' layout: a matrix of floor heights followed by the
+    ball weight and plate strength columns. Runs scale them to their own parameter ranges, so the trials stay paired
+    across parameter variants too. The trials are those of the seeded run with the same seed, and are written a block
+    at a time into a memory-mapped file, so sets larger than memory can be created.
+    :param path: npy file to write.
+    :param num_trials: Number of trials in the set.
+    :param num_floors: Number of floors in the building.
+    :param seed: Optional seed of the trials, derived from the global random module if not given.
+    :return: The trial set, memory-mapped read-only.
     """
-    cumulative_height_calc = sum(floor_heights[:floor])
-    logging.debug(f"Cumulative height calculated up to floor {floor}: {cumulative_height_calc} m")
-    return cumulative_height_calc
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    # Write under a temporary name and rename, so a trial set is never replayed half-written
+    temporary_path = f'{path}.tmp'
+    trials = np.lib.format.open_memmap(temporary_path, mode='w+', dtype=np.float64,
+                                       shape=(num_trials, num_floors + 2))
+    for first_trial in range(0, num_trials, SEED_BLOCK_SIZE):
+        block_trials = min(SEED_BLOCK_SIZE, num_trials - first_trial)
+        trials[first_trial:first_trial + block_trials] = seeded_trial_uniforms(seed, first_trial, block_trials,
+                                                                               num_floors)
+    trials.flush()
+    del trials
+    os.replace(temporary_path, path)
+    return load_trial_set(path)
+
+
+def load_trial_set(path):
+    """
+    Open a trial set written by create_trial_set without reading it into memory. Worker processes that open the same
+    file share its pages.
+    :param path: npy file of the trial set.
+    :return: Read-only memory-mapped array of shape (trials, floors + 2).
+    """
+    return np.load(path, mmap_mode='r')
 
 
-def linear_search_simulation_with_flag(floor_heights, ball_weight, plate_strength, start_floor):
+class TrialSetStream:
     """
-    Apply a linear search strategy to find the minimum breaking floor from a given start floor.
-    :param floor_heights: Heights of each floor.
-    :param ball_weight: Weight of the ball.
-    :param plate_strength: Strength of the plate.
-    :param start_floor: Starting floor for the simulation.
-    :return: Number of attempts to find the minimum breaking floor and a flag indicating if a break occurred.
+    Hands out the stored trials of a trial set in order, in place of the numpy Generator the trial runners draw from.
     """
-    logging.debug(f"Starting Linear Search Strategy from floor {start_floor}")
 
-    attempts = 0
-    did_break = False
-    breaking_floor = None
+    def __init__(self, trials, first_trial=0):
+        """
+        :param trials: Trial set array of shape (trials, floors + 2), e.g. from load_trial_set.
+        :param first_trial: Index of the first trial to hand out.
+        """
+        self.trials = trials
+        self.position = first_trial
+
+    def random(self, size):
+        """
+        Get the uniform values of the next trials, shaped like numpy's Generator.random.
+        :param size: Number of values of a single trial, or a (trials, values per trial) tuple.
+        :return: Array of the given size.
+        """
+        num_trials = size[0] if isinstance(size, tuple) else 1
+        if self.position + num_trials > len(self.trials):
+            raise ValueError(f"The trial set only holds {len(self.trials)} trials.")
+        uniforms = np.array(self.trials[self.position:self.position + num_trials])
+        self.position += num_trials
+        return uniforms.reshape(size)
+
+
+def _run_trial_block(task):
+    """
+    Run one seeded block of trials. Module level so a process pool can pickle it.
+    :param task: Tuple of (block_index, skip_trials, num_trials, seed, ball_weight_range, plate_strength_range,
+    floor_height_range, strategy_roster, num_floors, trial_set), where trial_set is the path of a trial set to replay
+    instead of drawing the block from the seed, or None.
+    :return: SimulationAggregator of the block.
+    """
+    (block_index, skip_trials, num_trials, seed, ball_weight_range, plate_strength_range, floor_height_range,
+     strategy_roster, num_floors, trial_set) = task
 
-    # Calculate the maximum possible force (at the highest floor)
-    max_force = calculate_impact_force(cumulative_height(floor_heights, len(floor_heights)), ball_weight)
-    if max_force <= plate_strength:
-        # If the max force doesn't break the plate, exit early
-        logging.debug("Maximum force doesn't break the plate. Exiting early.")
-        return attempts, did_break, breaking_floor
+    if trial_set is None:
+        rng = block_rng(seed, block_index, skip_trials, num_floors)
+    else:
+        rng = TrialSetStream(load_trial_set(trial_set), block_index * SEED_BLOCK_SIZE + skip_trials)
+    run_trials = select_trial_runner(strategy_roster, floor_height_range, num_floors)
+    return run_trials(num_trials, ball_weight_range, plate_strength_range, floor_height_range, strategy_roster,
+                      SimulationAggregator(num_floors, len(strategy_roster)), rng=rng)
 
-    floor = start_floor
 
-    # Initially check if the plate breaks or not at the starting floor
-    current_force = calculate_impact_force(cumulative_height(floor_heights, floor), ball_weight)
-    initial_break = current_force > plate_strength
-    attempts += 1
+def _worker_context():
+    """
+    Get the multiprocessing context to start worker pools with.
+    Forking copies only the calling thread, so a process forked while other threads run, like the simulation thread of
+    a live plot next to the GUI, can inherit locks held by those threads that are never released. Pools started then
+    spawn fresh interpreters instead; otherwise they use the platform's default.
+    :return: multiprocessing context.
+    """
+    if threading.current_thread() is threading.main_thread() and threading.active_count() == 1:
+        return multiprocessing.get_context()
+    return multiprocessing.get_context('spawn')
 
-    if initial_break:
-        # If it breaks, go down to find the minimum breaking floor
-        logging.debug("Initial break detected. Searching downwards for minimum breaking floor.")
-        while floor > 0:
-            attempts += 1
-            floor -= 1
-            current_force = calculate_impact_force(cumulative_height(floor_heights, floor), ball_weight)
 
-            if current_force <= plate_strength:
-                # Found the floor just before it stops breaking
-                did_break = True
-                floor += 1
-                breaking_floor = floor
-                break
+def _run_seeded_trials(num_iterations, ball_weight_range, plate_strength_range, floor_height_range, strategy_roster,
+                       aggregator, seed, workers, trial_set=None):
+    """
+    Run the trials as fixed-size seeded blocks, optionally sharded across a process pool.
+    Blocks, not workers, own the random streams, and their partial aggregates are merged in block order, so the result
+    is the same for any number of workers. Trials are numbered from the ones the aggregator already holds, so a run
+    continued in several calls draws the same trials as one uninterrupted run.
+    :param aggregator: SimulationAggregator to merge the blocks into.
+    :param trial_set: Optional path of a trial set whose trials the blocks replay instead of drawing them.
+    :return: The updated aggregator.
+    """
+    tasks = []
+    trial = aggregator.trials
+    end_trial = aggregator.trials + num_iterations
+    if trial_set is not None:
+        stored_trials, values_per_trial = load_trial_set(trial_set).shape
+        if values_per_trial != aggregator.num_floors + 2:
+            raise ValueError(f"Trial set {trial_set} is for {values_per_trial - 2} floors, not "
+                             f"{aggregator.num_floors}.")
+        if stored_trials < end_trial:
+            raise ValueError(f"Trial set {trial_set} only holds {stored_trials} of the {end_trial} trials needed.")
+    while trial < end_trial:
+        block_index, skip_trials = divmod(trial, SEED_BLOCK_SIZE)
+        num_trials = min(SEED_BLOCK_SIZE - skip_trials, end_trial - trial)
+        tasks.append((block_index, skip_trials, num_trials, seed, ball_weight_range, plate_strength_range,
+                      floor_height_range, strategy_roster, aggregator.num_floors, trial_set))
+        trial += num_trials
+
+    if workers > 1 and TRACE_ENABLED:
+        logging.warning("Tracing is enabled, running all blocks in the main process.")
+        workers = 1
+
+    if workers > 1 and len(tasks) > 1:
+        logging.info(f"Sharding {len(tasks)} blocks of trials across {workers} worker processes.")
+        with _worker_context().Pool(min(workers, len(tasks))) as pool:
+            for block_aggregator in pool.imap(_run_trial_block, tasks):
+                aggregator.merge(block_aggregator)
     else:
-        # If it doesn't break, go up to find the breaking floor
-        logging.debug("No initial break. Searching upwards for breaking floor.")
-        while floor < 100:
-
-            attempts += 1
-            current_force = calculate_impact_force(cumulative_height(floor_heights, floor + 1), ball_weight)
-            floor += 1
-            if current_force > plate_strength:
-                breaking_floor = floor
-                did_break = True
-                # Found the breaking floor
-                break
+        for task in tasks:
+            aggregator.merge(_run_trial_block(task))
 
-    logging.debug(
-        f"Linear Search Result: {attempts} attempts, Break occurred: {did_break}, Breaking floor: {breaking_floor}")
-    return attempts, did_break, breaking_floor
+    return aggregator
 
 
-def precise_halving_strategy_simulation_with_flag(floor_heights, ball_weight, plate_strength, start_floor):
+def run_streaming_simulation(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                             strategy_roster, num_floors=DEFAULT_NUM_FLOORS, workers=1, seed=None, aggregator=None,
+                             trial_set=None):
     """
-    Apply the precise halving strategy to find the minimum breaking floor from a given start floor.
-    :param floor_heights:
-    :param ball_weight:
-    :param plate_strength:
-    :param start_floor:
-    :return:
+    Run simulations with a dynamic number of strategies, streaming every trial into an aggregator.
+    :param num_iterations: Number of iterations to run the simulation.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :param strategy_roster: List of strategy functions to use in the simulation.
+    :param num_floors: Number of floors in the building.
+    :param workers: Number of worker processes to shard the trials across.
+    :param seed: Optional seed for reproducible runs. Seeded results are identical for any number of workers.
+    :param aggregator: Optional SimulationAggregator to continue from, e.g. one loaded from an earlier run.
+    :param trial_set: Optional path of a trial set from create_trial_set to replay instead of drawing trials, so that
+    runs of other strategies or parameter ranges see exactly the same trials. Overrides the seed.
+    :return: SimulationAggregator holding every trial.
     """
-    logging.debug(f"Starting Precise Halving Strategy from floor {start_floor}")
+    if aggregator is None:
+        aggregator = SimulationAggregator(num_floors, len(strategy_roster))
 
-    attempts = 0
-    did_break = False
-    breaking_floor = None
+    if trial_set is not None:
+        return _run_seeded_trials(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                                  strategy_roster, aggregator, None, workers, trial_set=trial_set)
 
-    # Calculate the maximum possible force (at the highest floor)
-    max_force = calculate_impact_force(cumulative_height(floor_heights, len(floor_heights)), ball_weight)
-    if max_force <= plate_strength:
-        # If the max force doesn't break the plate, exit early
-        logging.debug("Maximum force doesn't break the plate. Exiting early.")
-        return attempts, did_break, breaking_floor
+    if workers > 1 and seed is None:
+        # Derive the run's seed from the global random module so random.seed() still controls parallel runs
+        seed = random.getrandbits(64)
 
-    # Set initial high and low bounds for halving
-    low = 0
-    high = len(floor_heights)
-    floor = start_floor
+    if seed is not None:
+        return _run_seeded_trials(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                                  strategy_roster, aggregator, seed, workers)
 
-    # Halving strategy
-    while low < high:
-        attempts += 1
-        current_force = calculate_impact_force(cumulative_height(floor_heights, floor), ball_weight)
+    run_trials = select_trial_runner(strategy_roster, floor_height_range, aggregator.num_floors)
+    return run_trials(num_iterations, ball_weight_range, plate_strength_range, floor_height_range, strategy_roster,
+                      aggregator)
 
-        if current_force > plate_strength:
-            # If current force breaks the plate, decrease the high bound and set breaking_floor
-            high = floor - 1
-            did_break = True
-            breaking_floor = floor  # Set breaking_floor to the current floor
-        else:
-            # If current force doesn't break the plate, increase the low bound
-            low = floor + 1
 
-        # Update the floor based on new high and low
-        floor = (low + high) // 2
+def checkpoint_interval(checkpoint_every, num_floors, seeded):
+    """
+    Round a checkpoint interval up to whole units of the run's work, so a resumed run merges exactly the same partial
+    aggregates in the same order as an uninterrupted one and gives bit-identical results.
+    :param checkpoint_every: Requested number of iterations between checkpoints.
+    :param num_floors: Number of floors in the building.
+    :param seeded: Whether the run draws seeded blocks of trials.
+    :return: Number of iterations between checkpoints.
+    """
+    unit = SEED_BLOCK_SIZE if seeded else max(1, BATCH_CELL_BUDGET // num_floors)
+    return max(1, -(-checkpoint_every // unit)) * unit
 
-        logging.debug(f"Current floor: {floor}, Low bound: {low}, High bound: {high}")
 
-    # Check the floor if low and high have converged
-    if low == high:
-        attempts += 1
-        current_force = calculate_impact_force(cumulative_height(floor_heights, low), ball_weight)
-        if current_force > plate_strength:
-            did_break = True
-            breaking_floor = low
+def save_checkpoint(checkpoint_path, aggregator, run_parameters):
+    """
+    Save a checkpoint of a run: the aggregate, the parameters it was started with and the global random state.
+    :param checkpoint_path: File to write.
+    :param aggregator: SimulationAggregator of the trials so far.
+    :param run_parameters: JSON-serialisable dictionary identifying the run, including its seed.
+    """
+    version, internal_state, gauss_next = random.getstate()
+    aggregator.save(checkpoint_path, run_parameters=np.array(json.dumps(run_parameters)),
+                    random_state=np.array(internal_state, dtype=np.int64),
+                    random_extra=np.array(json.dumps([version, gauss_next])))
 
-    # If the halving strategy did not find a breaking floor, perform a linear search upwards
-    if not did_break:
-        logging.debug("No break found in halving strategy. Switching to linear search upwards.")
-        for f in range(start_floor, len(floor_heights)):
-            current_force = calculate_impact_force(cumulative_height(floor_heights, f), ball_weight)
-            attempts += 1
-            if current_force > plate_strength:
-                did_break = True
-                breaking_floor = f
-                break
 
-    logging.debug(
-        f"Precise Halving Strategy Result: {attempts} attempts, Break occurred: {did_break}, "
-        f"Breaking floor: {breaking_floor}")
-    return attempts, did_break, breaking_floor
+def load_checkpoint(checkpoint_path):
+    """
+    Load a checkpoint saved with save_checkpoint and restore the global random state it holds.
+    :param checkpoint_path: File to read.
+    :return: Tuple of (aggregator, run parameters).
+    """
+    aggregator = SimulationAggregator.load(checkpoint_path)
+    with np.load(checkpoint_path) as state:
+        run_parameters = json.loads(str(state['run_parameters']))
+        version, gauss_next = json.loads(str(state['random_extra']))
+        random.setstate((version, tuple(state['random_state'].tolist()), gauss_next))
+    return aggregator, run_parameters
+
+
+def run_checkpointed_simulation(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                                strategy_roster, checkpoint_path, checkpoint_every=1000000,
+                                num_floors=DEFAULT_NUM_FLOORS, workers=1, seed=None, resume=False,
+                                progress_callback=None, trial_set=None):
+    """
+    Run a streaming simulation that periodically saves a checkpoint, and can resume from one.
+    The results are identical to those of the same run without checkpoints, however many times it was interrupted.
+    :param num_iterations: Total number of iterations of the run.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :param strategy_roster: List of strategy functions to use in the simulation.
+    :param checkpoint_path: File to save checkpoints to, and to resume from.
+    :param checkpoint_every: Number of iterations between checkpoints, rounded up to whole blocks or batches.
+    :param num_floors: Number of floors in the building.
+    :param workers: Number of worker processes to shard the trials across.
+    :param seed: Optional seed for reproducible runs.
+    :param resume: Continue from the checkpoint instead of starting afresh.
+    :param progress_callback: Optional function called with the SimulationAggregator after every checkpoint.
+    :param trial_set: Optional path of a trial set to replay instead of drawing trials.
+    :return: SimulationAggregator holding every trial.
+    """
+    aggregator = checkpoint_parameters = None
+    if resume:
+        aggregator, checkpoint_parameters = load_checkpoint(checkpoint_path)
+        if seed is None:
+            # The seed of an unseeded parallel run was derived when it started, so take it from the checkpoint. An
+            # explicit seed is kept, so resuming with a different one is rejected below
+            seed = checkpoint_parameters['seed']
+    elif workers > 1 and seed is None and trial_set is None:
+        # Same derivation as run_streaming_simulation, so the checkpointed run draws the same trials
+        seed = random.getrandbits(64)
+
+    run_parameters = {'num_iterations': num_iterations, 'ball_weight_range': list(ball_weight_range),
+                      'plate_strength_range': list(plate_strength_range),
+                      'floor_height_range': list(floor_height_range), 'num_floors': num_floors,
+                      'strategies': [strategy.__name__ for strategy in strategy_roster], 'seed': seed}
+    if trial_set is not None:
+        run_parameters['trial_set'] = trial_set
+
+    if resume:
+        if checkpoint_parameters != run_parameters:
+            raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different run: {checkpoint_parameters}")
+        logging.info(f"Resuming from {checkpoint_path} after {aggregator.trials} of {num_iterations} iterations.")
+
+    def after_chunk(chunk_aggregator):
+        save_checkpoint(checkpoint_path, chunk_aggregator, run_parameters)
+        logging.info(f"Checkpoint of {chunk_aggregator.trials} of {num_iterations} iterations saved to "
+                     f"{checkpoint_path}.")
+        if progress_callback is not None:
+            progress_callback(chunk_aggregator)
+
+    return run_chunked_simulation(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                                  strategy_roster, after_chunk, chunk_iterations=checkpoint_every,
+                                  num_floors=num_floors, workers=workers, seed=seed, aggregator=aggregator,
+                                  trial_set=trial_set)
+
+
+def run_chunked_simulation(num_iterations, ball_weight_range, plate_strength_range, floor_height_range, strategy_roster,
+                           after_chunk, chunk_iterations=10000, num_floors=DEFAULT_NUM_FLOORS, workers=1, seed=None,
+                           aggregator=None, trial_set=None):
+    """
+    Run a streaming simulation in chunks, handing the aggregator to a callback after every chunk.
+    Chunks are rounded up to whole blocks or batches, so the results are identical to those of the same run in one go.
+    :param num_iterations: Total number of iterations of the run.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :param strategy_roster: List of strategy functions to use in the simulation.
+    :param after_chunk: Function called with the SimulationAggregator after every chunk.
+    :param chunk_iterations: Number of iterations between callbacks, rounded up to whole blocks or batches.
+    :param num_floors: Number of floors in the building.
+    :param workers: Number of worker processes to shard the trials across.
+    :param seed: Optional seed for reproducible runs.
+    :param aggregator: Optional SimulationAggregator to continue, e.g. one loaded from a checkpoint.
+    :param trial_set: Optional path of a trial set to replay instead of drawing trials.
+    :return: SimulationAggregator holding every trial.
+    """
+    if workers > 1 and seed is None and trial_set is None:
+        # Same derivation as run_streaming_simulation, so the chunked run draws the same trials
+        seed = random.getrandbits(64)
+    if aggregator is None:
+        aggregator = SimulationAggregator(num_floors, len(strategy_roster))
+
+    interval = checkpoint_interval(chunk_iterations, num_floors, seed is not None or trial_set is not None)
+    while aggregator.trials < num_iterations:
+        chunk = min(interval, num_iterations - aggregator.trials)
+        run_streaming_simulation(chunk, ball_weight_range, plate_strength_range, floor_height_range, strategy_roster,
+                                 num_floors=num_floors, workers=workers, seed=seed, aggregator=aggregator,
+                                 trial_set=trial_set)
+        after_chunk(aggregator)
 
+    return aggregator
 
-def binary_search_strategy(floor_heights, ball_weight, plate_strength, start_floor):
+
+def run_simulation_with_adjusted_parameters(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                                            strategy_roster, num_floors=DEFAULT_NUM_FLOORS, workers=1, seed=None):
     """
-    Apply the binary search strategy to find the minimum breaking floor.
-    :param floor_heights:
-    :param ball_weight:
-    :param plate_strength:
-    :param start_floor:
-    :return:
+    Run simulations with a dynamic number of strategies.
+    :param num_iterations: Number of iterations to run the simulation.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :param strategy_roster: List of strategy functions to use in the simulation.
+    :param num_floors: Number of floors in the building.
+    :param workers: Number of worker processes to shard the trials across.
+    :param seed: Optional seed for reproducible runs. Seeded results are identical for any number of workers.
+    :return: SimulationResults of every starting floor, combined over the strategies.
     """
-    logging.debug(f"Starting Binary Search Strategy from floor {start_floor}")
+    return run_streaming_simulation(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                                    strategy_roster, num_floors=num_floors, workers=workers, seed=seed).results()
 
-    attempts = 0
-    did_break = False
-    breaking_floor = None
 
-    # Calculate the maximum possible force (at the highest floor)
-    max_force = calculate_impact_force(cumulative_height(floor_heights, len(floor_heights)), ball_weight)
-    if max_force <= plate_strength:
-        # If the max force doesn't break the plate, exit early
-        logging.debug("Maximum force doesn't break the plate. Exiting early.")
-        return attempts, did_break, breaking_floor
+def check_distribution_ranges(ball_weight_range, plate_strength_range, floor_height_range):
+    """
+    Check that the breaking floor distribution can be computed for the parameter ranges, as exact mode and the
+    prior-aware searches need.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :raises ValueError: If a ball weight is not positive, or a plate strength or floor height is negative.
+    """
+    if min(ball_weight_range) <= 0 or min(plate_strength_range) < 0 or min(floor_height_range) < 0:
+        raise ValueError(f"The breaking floor distribution needs positive ball weights and non-negative plate "
+                         f"strengths and floor heights, not weights {tuple(ball_weight_range)}, strengths "
+                         f"{tuple(plate_strength_range)} and heights {tuple(floor_height_range)}.")
 
-    low = 0
-    high = len(floor_heights)
-    attempts = 0
-    did_break = False
-    breaking_floor = None
 
-    # Check if the starting floor breaks the plate
-    current_force = calculate_impact_force(cumulative_height(floor_heights, start_floor), ball_weight)
-    attempts += 1
-    if current_force > plate_strength:
-        did_break = True
-        breaking_floor = start_floor
-        # Since the plate broke at the starting floor, search downwards for the actual breaking floor
-        while breaking_floor > 1:
-            logging.debug(f"Searching between floors {low} and {high}, Current floor: {breaking_floor}")
-            breaking_floor -= 1
-            current_force = calculate_impact_force(cumulative_height(floor_heights, breaking_floor), ball_weight)
-            attempts += 1
-            if current_force <= plate_strength:
-                breaking_floor += 1
-                # Found the actual breaking floor
-                break
+def drop_height_threshold_cdf(drop_heights, ball_weight_range, plate_strength_range):
+    """
+    Probability that a plate breaks when the ball is dropped from a given height, P(T < h).
+    The ball breaks the plate when weight * sqrt(2 g h) > strength, i.e. when h is above the threshold
+    T = (strength / weight)^2 / (2 g). With a uniform weight and strength, the probability that this holds is the
+    average over the weight of a clipped linear function of the weight, which integrates in closed form.
+    :param drop_heights: Array of drop heights in meters.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg, with a positive minimum.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons, at least one of the ranges
+    not degenerate.
+    :return: Array of probabilities, one per drop height.
+    """
+    weight_low, weight_high = sorted(ball_weight_range)
+    strength_low, strength_high = sorted(plate_strength_range)
+    root_heights = np.sqrt(2 * GRAVITY * np.asarray(drop_heights, dtype=np.float64))
+
+    if strength_low == strength_high:
+        # Breaks when the weight is above strength / sqrt(2 g h)
+        with np.errstate(divide='ignore'):
+            weight_needed = strength_low / root_heights
+        return np.clip((weight_high - weight_needed) / (weight_high - weight_low), 0, 1)
+
+    # Fraction of the strength range a ball of weight w breaks through: clip(slope * w + intercept, 0, 1)
+    slope = root_heights / (strength_high - strength_low)
+    intercept = -strength_low / (strength_high - strength_low)
+    if weight_low == weight_high:
+        return np.clip(slope * weight_low + intercept, 0, 1)
+
+    def clipped_antiderivative(x):
+        return np.where(x < 0, 0, np.where(x <= 1, x ** 2 / 2, x - 0.5))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        averaged = ((clipped_antiderivative(slope * weight_high + intercept)
+                     - clipped_antiderivative(slope * weight_low + intercept)) / (slope * (weight_high - weight_low)))
+    # A zero drop height never breaks a plate of non-negative strength
+    return np.clip(np.where(slope > 0, averaged, 0), 0, 1)
+
+
+def drop_height_cdf(drop_heights, floors, floor_height_range):
+    """
+    Approximate probability that the drop height from a floor, a sum of uniform floor heights, is at most a given
+    height, by the second-order Edgeworth expansion of the sum around the normal distribution.
+    A uniform is symmetric, so only the even cumulants correct the expansion and its error falls with the cube of the
+    number of floors: it is below 2e-6 from EXACT_GRID_FLOORS floors up.
+    :param drop_heights: Array of drop heights in meters.
+    :param floors: Array of floor numbers, broadcast against the drop heights.
+    :param floor_height_range: Tuple representing the range of floor heights in meters, not degenerate.
+    :return: Array of probabilities.
+    """
+    height_low, height_high = sorted(floor_height_range)
+    floors = np.asarray(floors, dtype=np.float64)
+    drop_heights = np.asarray(drop_heights, dtype=np.float64)
+    z = (drop_heights - floors * (height_low + height_high) / 2) / (np.sqrt(floors / 12) * (height_high - height_low))
+
+    # Standardized fourth and sixth cumulants of the sum: those of a uniform, -6/5 and 48/7, over floors and floors^2
+    fourth_cumulant = -6 / 5 / floors
+    sixth_cumulant = 48 / 7 / floors ** 2
+    z_squared = z * z
+    hermite_3 = z * (z_squared - 3)
+    hermite_5 = z * (z_squared * (z_squared - 10) + 15)
+    hermite_7 = z * (z_squared * (z_squared * (z_squared - 21) + 105) - 105)
+    correction = fourth_cumulant / 24 * hermite_3 + sixth_cumulant / 720 * hermite_5 \
+        + fourth_cumulant ** 2 / 1152 * hermite_7
+
+    normal_cdf = _erfc(-z / math.sqrt(2)).astype(np.float64) / 2
+    cdf = normal_cdf - np.exp(-z_squared / 2) / math.sqrt(2 * math.pi) * correction
+    # The sum never leaves [floors * low, floors * high]
+    return np.where(drop_heights < floors * height_low, 0,
+                    np.where(drop_heights >= floors * height_high, 1, np.clip(cdf, 0, 1)))
+
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def breaking_floor_distribution(num_floors, ball_weight_range, plate_strength_range, floor_height_range):
+    """
+    Compute the probability of every breaking floor without sampling.
+    Floor f is the breaking floor at most when the drop height from it, a sum of f uniform floor heights, is above the
+    plate's threshold height. The distribution of the drop height is built floor by floor on a grid up to
+    EXACT_GRID_FLOORS: adding a uniform floor height is a moving average of the previous floor's CDF, done in O(grid)
+    with a cumulative integral. Higher floors use drop_height_cdf, all at once on a grid per floor spanning the drop
+    heights where the floor's CDF and the threshold probability both vary. Either is then integrated against the
+    closed-form threshold probabilities. Degenerate ranges are handled exactly, using the same strict comparison as the
+    strategies.
+    :param num_floors: Number of floors in the building.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :return: Array of shape (floors + 1,) with the probability of each breaking floor, index 0 for no break.
+    """
+    check_distribution_ranges(ball_weight_range, plate_strength_range, floor_height_range)
+    weight_low, weight_high = sorted(ball_weight_range)
+    strength_low, strength_high = sorted(plate_strength_range)
+    height_low, height_high = sorted(floor_height_range)
+
+    # The threshold height is fixed when it cannot vary with the weight or the strength
+    threshold_fixed = strength_low == strength_high and (weight_low == weight_high or strength_low == 0)
+    threshold_high = strength_high ** 2 / (2 * GRAVITY * weight_low ** 2)
+
+    if height_low == height_high:
+        # Every trial has the same building, summed the way the simulation sums it
+        drop_heights = np.cumsum(np.full(num_floors, height_low))
+        if threshold_fixed:
+            breaks_by_floor = weight_low * np.sqrt(2 * GRAVITY * drop_heights) > strength_low
+        else:
+            breaks_by_floor = drop_height_threshold_cdf(drop_heights, ball_weight_range, plate_strength_range)
     else:
-        # If the plate does not break at the starting floor, perform binary search upwards
-        low = start_floor + 1
-        while low <= high:
-            logging.debug(f"Searching between floors {low} and {high}")
-            mid = (low + high) // 2
-            attempts += 1
-            current_force = calculate_impact_force(cumulative_height(floor_heights, mid), ball_weight)
-
-            if current_force > plate_strength:
-                did_break = True
-                breaking_floor = mid
-                high = mid - 1
+        breaks_by_floor = np.ones(num_floors)
+        grid_floors = min(num_floors, EXACT_GRID_FLOORS)
+
+        # Grid over the drop heights that matter: above the highest threshold or the top of the grid floors, every
+        # plate breaks or the CDF of every grid floor is 1
+        grid_top = min(threshold_high, grid_floors * height_high)
+        grid_steps = EXACT_GRID_STEPS
+        if grid_top / ((height_high - height_low) / grid_steps) > EXACT_GRID_MAX_POINTS:
+            grid_steps = max(1, int(EXACT_GRID_MAX_POINTS * (height_high - height_low) / grid_top))
+        step = (height_high - height_low) / grid_steps
+        grid = np.arange(int(math.ceil(grid_top / step)) + 1) * step
+
+        # Moving the window [x - high, x - low] over the grid is a whole-index shift plus a fixed fraction
+        low_shift, shift_fraction = divmod(height_low / step, 1)
+        low_shift = int(low_shift)
+
+        def shifted(values, shift):
+            return np.concatenate([np.zeros(min(shift, len(values))), values[:len(values) - shift]])
+
+        if threshold_fixed:
+            threshold_cdf = None
+        else:
+            midpoints = (grid[:-1] + grid[1:]) / 2
+            threshold_cdf = drop_height_threshold_cdf(midpoints, ball_weight_range, plate_strength_range)
+
+        height_cdf = np.clip((grid - height_low) / (height_high - height_low), 0, 1)
+        for floor in range(1, grid_floors + 1):
+            if floor > 1:
+                # Cumulative trapezoid integral of the previous floor's CDF, averaged over one floor height
+                integral = step * (np.cumsum(height_cdf) - (height_cdf[0] + height_cdf) / 2)
+                window_top = (1 - shift_fraction) * shifted(integral, low_shift) \
+                    + shift_fraction * shifted(integral, low_shift + 1)
+                window_bottom = (1 - shift_fraction) * shifted(integral, low_shift + grid_steps) \
+                    + shift_fraction * shifted(integral, low_shift + grid_steps + 1)
+                height_cdf = np.clip((window_top - window_bottom) / (height_high - height_low), 0, 1)
+
+            if threshold_fixed:
+                breaks_by_floor[floor - 1] = 1 - np.interp(threshold_high, grid, height_cdf)
             else:
-                low = mid + 1
-
-    logging.debug(
-        f"Binary Search Result: {attempts} attempts, Break occurred: {did_break}, Breaking floor: {breaking_floor}")
-    return attempts, did_break, breaking_floor
+                # Drop heights above the grid always break the plate
+                breaks_by_floor[floor - 1] = threshold_cdf @ np.diff(height_cdf) + (1 - height_cdf[-1])
 
+            if height_cdf[-1] < 1e-15:
+                # Every higher floor is above the grid, so it always breaks the plate
+                break
 
-def run_simulation_with_adjusted_parameters(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
-                                            strategy_roster):
+        if num_floors > grid_floors:
+            floors = np.arange(grid_floors + 1, num_floors + 1)
+            if threshold_fixed:
+                breaks_by_floor[grid_floors:] = 1 - drop_height_cdf(threshold_high, floors, floor_height_range)
+            else:
+                # Integrate every floor at once over the drop heights where both the threshold probability and the
+                # floor's CDF vary: below them the plate never breaks or the CDF is 0, above them the plate always
+                # breaks or the CDF is 1
+                threshold_low = strength_low ** 2 / (2 * GRAVITY * weight_high ** 2)
+                spread = EXACT_SPREAD * np.sqrt(floors / 12) * (height_high - height_low)
+                bottom = np.maximum(threshold_low, np.maximum(floors * (height_low + height_high) / 2 - spread,
+                                                              floors * height_low))
+                top = np.maximum(bottom, np.minimum(threshold_high, np.minimum(
+                    floors * (height_low + height_high) / 2 + spread, floors * height_high)))
+                breaks_by_floor[grid_floors:] = 1 - drop_height_cdf(top, floors, floor_height_range)
+
+                # Integrate the floors a band at a time to stay within the engine's memory budget
+                varying = np.flatnonzero(top > bottom)
+                fractions = np.linspace(0, 1, EXACT_GRID_STEPS + 1)
+                rows_per_band = max(1, BATCH_CELL_BUDGET // len(fractions))
+                for first_row in range(0, len(varying), rows_per_band):
+                    band = varying[first_row:first_row + rows_per_band]
+                    drop_heights = bottom[band, None] + (top - bottom)[band, None] * fractions
+                    height_cdf = drop_height_cdf(drop_heights, floors[band, None], floor_height_range)
+                    threshold_cdf = drop_height_threshold_cdf((drop_heights[:, :-1] + drop_heights[:, 1:]) / 2,
+                                                              ball_weight_range, plate_strength_range)
+                    breaks_by_floor[grid_floors + band] += np.sum(threshold_cdf * np.diff(height_cdf), axis=1)
+
+    # P(breaking floor <= f) grows with f, so each floor's probability is the increase over the floor below
+    breaks_by_floor = np.maximum.accumulate(np.clip(breaks_by_floor, 0, 1))
+    probabilities = np.empty(num_floors + 1)
+    probabilities[1:] = np.diff(breaks_by_floor, prepend=0)
+    probabilities[0] = 1 - breaks_by_floor[-1]
+    return probabilities
+
+
+def expected_attempt_moments(strategy, probabilities, num_floors, baseline=None):
     """
-    Run simulations with a dynamic number of strategies.
-    :param num_iterations: Number of iterations to run the simulation.
+    Compute the mean and second moment of a strategy's attempts from every start floor.
+    :param strategy: Strategy function whose attempts can be counted, see can_count_attempts.
+    :param probabilities: Probability of each breaking floor, from breaking_floor_distribution.
+    :param num_floors: Number of floors in the building.
+    :param baseline: Optional strategy whose attempts in the same trial are subtracted, for the moments of the paired
+    difference between the two.
+    :return: Tuple of (mean, second moment) arrays indexed by start floor - 1.
+    """
+    if num_floors <= ATTEMPT_TABLE_MAX_FLOORS:
+        table = attempt_table(strategy, num_floors).astype(np.float64)
+        if baseline is not None:
+            table -= attempt_table(baseline, num_floors)
+        return table @ probabilities, table ** 2 @ probabilities
+
+    # Only breaking floors that can happen contribute, evaluated a band of start floors at a time
+    breaking_floors = np.flatnonzero(probabilities)
+    weights = probabilities[breaking_floors]
+    mean = np.empty(num_floors)
+    second_moment = np.empty(num_floors)
+    rows_per_band = max(1, BATCH_CELL_BUDGET // max(1, len(breaking_floors)))
+    for first_row in range(0, num_floors, rows_per_band):
+        start_floors = np.arange(first_row + 1, min(first_row + rows_per_band, num_floors) + 1)
+        attempts = attempt_counter(strategy)(start_floors[:, None], breaking_floors[None, :],
+                                             num_floors).astype(np.float64)
+        if baseline is not None:
+            attempts -= attempt_counter(baseline)(start_floors[:, None], breaking_floors[None, :], num_floors)
+        mean[first_row:first_row + len(start_floors)] = attempts @ weights
+        second_moment[first_row:first_row + len(start_floors)] = attempts ** 2 @ weights
+    return mean, second_moment
+
+
+def run_exact_simulation(num_iterations, ball_weight_range, plate_strength_range, floor_height_range, strategy_roster,
+                         num_floors=DEFAULT_NUM_FLOORS):
+    """
+    Compute the expected results of a simulation exactly, without sampling any trials.
+    :param num_iterations: Number of iterations to scale the expected counts to.
     :param ball_weight_range: Tuple representing the range of ball weight in kg.
     :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
     :param floor_height_range: Tuple representing the range of floor heights in meters.
-    :param strategy_roster: List of strategy functions to use in the simulation.
-    :return: Aggregated results for each starting floor and each strategy.
+    :param strategy_roster: List of strategy functions whose attempts can be counted, see can_count_attempts.
+    :param num_floors: Number of floors in the building.
+    :return: Exact SimulationAggregator with the expected counts of num_iterations trials.
+    """
+    if not can_vectorize(strategy_roster, floor_height_range, num_floors):
+        raise ValueError("Exact mode needs strategies whose attempts can be counted without running them.")
+
+    probabilities = breaking_floor_distribution(num_floors, ball_weight_range, plate_strength_range,
+                                                floor_height_range)
+
+    aggregator = SimulationAggregator(num_floors, len(strategy_roster), exact=True)
+    aggregator.trials = num_iterations
+    for strategy_index, strategy in enumerate(strategy_roster):
+        mean, second_moment = expected_attempt_moments(strategy, probabilities, num_floors)
+        aggregator.attempts_mean[strategy_index, 1:] = mean
+        aggregator.attempts_m2[strategy_index, 1:] = num_iterations * np.maximum(second_moment - mean ** 2, 0)
+        difference_mean, difference_second_moment = expected_attempt_moments(strategy, probabilities, num_floors,
+                                                                             baseline=strategy_roster[0])
+        aggregator.difference_mean[strategy_index, 1:] = difference_mean
+        aggregator.difference_m2[strategy_index, 1:] = num_iterations * np.maximum(
+            difference_second_moment - difference_mean ** 2, 0)
+        aggregator.strategy_attempts[strategy_index, 1:] = num_iterations * mean
+        # Every start floor finds the breaking floor whenever there is one
+        aggregator.strategy_breaks[strategy_index, 1:] = num_iterations * num_floors * probabilities[1:]
+    return aggregator
+
+
+def efficiency_confidence_intervals(aggregator, z_score=1.96):
+    """
+    Estimate the efficiency score of every floor with a confidence interval.
+    The score is average attempts divided by break percentage. Its relative error combines the standard error of the
+    average attempts with the binomial error of the floor's break frequency (delta method). The total attempts in the
+    break percentage sum over every floor and are treated as exact.
+    :param aggregator: SimulationAggregator of the run so far.
+    :param z_score: Standard score of the confidence interval, 1.96 for 95%.
+    :return: Tuple of (efficiency score, confidence interval half-width) arrays indexed by floor.
     """
-    aggregated_results = {floor: {'attempts': 0, 'breaks': 0} for floor in range(1, 101)}
-    break_results = {floor: {'breaks': 0} for floor in range(1, 101)}
-    total_strategy_executions = num_iterations * len(strategy_roster)
+    count, mean_attempts, _, attempts_half_width = aggregator.attempt_statistics(z_score=z_score)
+    breaks = aggregator.breaks.astype(float)
+    total_attempts = aggregator.attempts.sum()
 
-    for _ in range(num_iterations):
-        floor_heights = [random.uniform(*floor_height_range) for _ in range(100)]
-        ball_weight = random.uniform(*ball_weight_range)
-        plate_strength = random.uniform(*plate_strength_range)
-
-        for floor in range(1, 101):
-            for strategy in strategy_roster:
-                attempts, did_break, breaking_floor = strategy(floor_heights, ball_weight, plate_strength, floor)
-                aggregated_results[floor]['attempts'] += attempts
-                if did_break:
-                    break_results[breaking_floor]['breaks'] += 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        break_percentage = breaks / total_attempts * 100 if total_attempts else np.zeros_like(breaks)
+        scores = np.where(break_percentage > 0, mean_attempts / break_percentage, np.inf)
 
-    total_attempts = sum(data['attempts'] for floor, data in aggregated_results.items())
+        # Fraction of the strategy executions that ended on each breaking floor
+        break_frequency = breaks / (count * aggregator.num_floors) if count else np.zeros_like(breaks)
+        relative_attempts_error = attempts_half_width / (z_score * mean_attempts)
+        relative_break_error = np.sqrt((1 - break_frequency) / (aggregator.trials * break_frequency))
+        half_widths = z_score * scores * np.hypot(relative_attempts_error, relative_break_error)
 
-    # Calculate average attempts and break percentage for each floor
-    for floor in aggregated_results:
-        aggregated_results[floor]['average_attempts'] = aggregated_results[floor][
-                                                            'attempts'] / total_strategy_executions
+    half_widths = np.where(np.isfinite(scores), half_widths, np.inf)
+    scores[0] = half_widths[0] = np.inf
+    return scores, half_widths
 
-        aggregated_results[floor]['breaks'] = (break_results[floor]['breaks'])
 
-        try:
-            aggregated_results[floor]['break_percentage'] = (aggregated_results[floor]['breaks'] / total_attempts) * 100
-        except ZeroDivisionError:
-            aggregated_results[floor]['break_percentage'] = 0
+def has_converged(aggregator, target_relative_error, z_score=1.96):
+    """
+    Check whether the most efficient floor is settled.
+    That is the case once its efficiency score's confidence interval no longer overlaps the runner-up's, or is narrower
+    than the target relative error.
+    :param aggregator: SimulationAggregator of the run so far.
+    :param target_relative_error: Relative half-width of the winning floor's confidence interval to stop at.
+    :param z_score: Standard score of the confidence interval, 1.96 for 95%.
+    :return: True if the winning floor has converged.
+    """
+    scores, half_widths = efficiency_confidence_intervals(aggregator, z_score)
+    best_floor, runner_up_floor = np.argsort(scores, kind='stable')[:2] if aggregator.num_floors > 1 else (1, 0)
+    if not np.isfinite(scores[best_floor]):
+        return False
+
+    separated = (np.isfinite(scores[runner_up_floor]) and
+                 scores[best_floor] + half_widths[best_floor] < scores[runner_up_floor] - half_widths[runner_up_floor])
+    precise = half_widths[best_floor] <= target_relative_error * scores[best_floor]
+    return bool(separated or precise)
+
+
+def run_adaptive_simulation(max_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                            strategy_roster, num_floors=DEFAULT_NUM_FLOORS, batch_size=1000,
+                            target_relative_error=0.05, workers=1, seed=None, progress_callback=None,
+                            trial_set=None):
+    """
+    Run the simulation in batches until the most efficient floor has converged, or max_iterations is reached.
+    :param max_iterations: Upper bound on the number of iterations.
+    :param ball_weight_range: Tuple representing the range of ball weight in kg.
+    :param plate_strength_range: Tuple representing the range of plate strength in Newtons.
+    :param floor_height_range: Tuple representing the range of floor heights in meters.
+    :param strategy_roster: List of strategy functions to use in the simulation.
+    :param num_floors: Number of floors in the building.
+    :param batch_size: Number of iterations between convergence checks.
+    :param target_relative_error: Relative half-width of the winning floor's 95% confidence interval to stop at.
+    :param workers: Number of worker processes to shard each batch across.
+    :param seed: Optional seed for reproducible runs.
+    :param progress_callback: Optional function called with the SimulationAggregator after every batch.
+    :param trial_set: Optional path of a trial set to replay instead of drawing trials.
+    :return: Tuple of the SimulationAggregator and whether it converged. aggregator.trials is the number of iterations
+    actually needed.
+    """
+    aggregator = SimulationAggregator(num_floors, len(strategy_roster))
+    if workers > 1 and seed is None and trial_set is None:
+        seed = random.getrandbits(64)
 
-    return aggregated_results
+    while aggregator.trials < max_iterations:
+        run_streaming_simulation(min(batch_size, max_iterations - aggregator.trials), ball_weight_range,
+                                 plate_strength_range, floor_height_range, strategy_roster, num_floors=num_floors,
+                                 workers=workers, seed=seed, aggregator=aggregator, trial_set=trial_set)
+        if progress_callback is not None:
+            progress_callback(aggregator)
+        if has_converged(aggregator, target_relative_error):
+            return aggregator, True
+
+    return aggregator, False
 
 
 def find_most_efficient_floor_from_results(simulation_results_to_analyze):
     """
     Find the most efficient floor from the simulation results.
-    :param simulation_results_to_analyze: Dictionary containing the results from the simulation.
+    :param simulation_results_to_analyze: SimulationResults or dictionary containing the results from the simulation.
     :return: The most efficient floor and its efficiency score.
     """
-    efficiency_scores = {}
-
-    for floor, data in simulation_results_to_analyze.items():
-        try:
-            efficiency_score_calc = data['average_attempts'] / data['break_percentage']
-            efficiency_scores[floor] = efficiency_score_calc
-        except ZeroDivisionError:
-            efficiency_scores[floor] = float('inf')  # Set to infinity if no breaks
-
-    # Find the floor with the lowest efficiency score
-    most_efficient_floor_calc = min(efficiency_scores, key=efficiency_scores.get)
-    return most_efficient_floor_calc, efficiency_scores[most_efficient_floor_calc]
+    analysis = analyze_results(simulation_results_to_analyze)
+    return analysis.most_efficient_floor, analysis.efficiency_score
 
 
 def find_floor_with_most_breaks(aggregated_results):
     """
     Find the floor with the most breaks.
-    :param aggregated_results: Dictionary containing the results from the simulation.
+    :param aggregated_results: SimulationResults or dictionary containing the results from the simulation.
     :return: Floor with the most breaks and the number of breaks.
     """
-    max_breaks = 0
-    floor_with_most_breaks = None
+    analysis = analyze_results(aggregated_results)
+    return analysis.most_breaks_floor, analysis.most_breaks
+
+
+def parse_range(text):
+    """
+    Parse a range given on the command line as "low:high", or a single value for a fixed parameter.
+    :param text: Range text.
+    :return: Tuple of (low, high).
+    """
+    low, _, high = text.partition(':')
+    try:
+        return float(low), float(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a range like 0.5:1.5 or a single value, got {text!r}.")
+
+
+def sweep_grid(ball_weight_ranges, plate_strength_ranges, floor_height_ranges, zipped=False):
+    """
+    Build the parameter points of a sweep.
+    :param ball_weight_ranges: List of ball weight ranges.
+    :param plate_strength_ranges: List of plate strength ranges.
+    :param floor_height_ranges: List of floor height ranges.
+    :param zipped: Pair the lists up point by point instead of taking every combination. Lists of a single range are
+    repeated for every point.
+    :return: List of (ball weight range, plate strength range, floor height range) points.
+    """
+    range_lists = [ball_weight_ranges, plate_strength_ranges, floor_height_ranges]
+    if not zipped:
+        return list(product(*range_lists))
+
+    num_points = max(len(ranges) for ranges in range_lists)
+    if any(len(ranges) not in (1, num_points) for ranges in range_lists):
+        raise ValueError("Zipped sweeps need lists of ranges of the same length, or of a single range.")
+    return [tuple(ranges[point if len(ranges) > 1 else 0] for ranges in range_lists) for point in range(num_points)]
+
+
+def _run_sweep_point(task):
+    """
+    Run the simulation of one sweep point and summarise it. Module level so a process pool can pickle it.
+    :param task: Tuple of (ball_weight_range, plate_strength_range, floor_height_range, num_iterations,
+    strategy_roster, num_floors, seed, exact, trial_set).
+    :return: Dictionary of the point's metrics, with per-floor arrays indexed by floor - 1.
+    """
+    (ball_weight_range, plate_strength_range, floor_height_range, num_iterations, strategy_roster, num_floors, seed,
+     exact, trial_set) = task
+    # Strategies built for the parameter ranges are rebuilt for the point's own ranges
+    strategy_roster = [strategy.for_parameters(ball_weight_range, plate_strength_range, floor_height_range)
+                       if hasattr(strategy, 'for_parameters') else strategy for strategy in strategy_roster]
+
+    if exact:
+        aggregator = run_exact_simulation(num_iterations, ball_weight_range, plate_strength_range, floor_height_range,
+                                          strategy_roster, num_floors=num_floors)
+    else:
+        aggregator = run_streaming_simulation(num_iterations, ball_weight_range, plate_strength_range,
+                                              floor_height_range, strategy_roster, num_floors=num_floors, seed=seed,
+                                              trial_set=trial_set)
+    simulation_results = aggregator.results()
+
+    most_efficient_floor, efficiency_score = find_most_efficient_floor_from_results(simulation_results)
+    most_breaks_floor, most_breaks = find_floor_with_most_breaks(simulation_results)
+
+    return {
+        'most_efficient_floor': most_efficient_floor,
+        'efficiency_score': efficiency_score,
+        # A floor of 0 means that no floor broke the plate at all
+        'most_breaks_floor': most_breaks_floor or 0,
+        'most_breaks': most_breaks,
+        'average_attempts': simulation_results.arrays['average_attempts'],
+        'breaks': simulation_results.arrays['breaks'].astype(np.float64),
+        'break_percentage': simulation_results.arrays['break_percentage'],
+        'floor_efficiency_score': simulation_results.arrays['efficiency_score'],
+    }
+
+
+def run_parameter_sweep(num_iterations, parameter_grid, strategy_roster, num_floors=DEFAULT_NUM_FLOORS, workers=1,
+                        seed=None, exact=False, trial_set=None):
+    """
+    Run the simulation for every point of a parameter grid, scheduling the points on a process pool.
+    Every point draws its trials from the same seeded streams, so differences between points are not blurred by
+    different random trials. Attempt tables are built once up front and shared by every point.
+    :param num_iterations: Number of iterations per point.
+    :param parameter_grid: List of (ball weight range, plate strength range, floor height range) points.
+    :param strategy_roster: List of strategy functions to use in the simulation.
+    :param num_floors: Number of floors in the building.
+    :param workers: Number of worker processes to spread the points across.
+    :param seed: Optional seed for a reproducible sweep.
+    :param exact: Compute the expected results of every point instead of sampling them.
+    :param trial_set: Optional path of a trial set that every point replays instead of drawing trials.
+    :return: Dictionary of columns: one row per point, with per-floor metrics as (points, floors) arrays.
+    """
+    if seed is None:
+        # Derive the sweep's seed from the global random module so random.seed() still controls sweeps
+        seed = random.getrandbits(64)
+
+    if num_floors <= ATTEMPT_TABLE_MAX_FLOORS and all(can_count_attempts(strategy, num_floors)
+                                                      for strategy in strategy_roster):
+        # Forked workers inherit the memoized tables, spawned ones load them from the disk cache. Strategies rebuilt
+        # for every point build their own
+        for strategy in strategy_roster:
+            if not hasattr(strategy, 'for_parameters'):
+                attempt_table(strategy, num_floors)
+
+    tasks = [(ball_weight_range, plate_strength_range, floor_height_range, num_iterations, strategy_roster, num_floors,
+              seed, exact, trial_set) for ball_weight_range, plate_strength_range, floor_height_range in parameter_grid]
+    if workers > 1 and len(tasks) > 1:
+        logging.info(f"Sweeping {len(tasks)} parameter points across {workers} worker processes.")
+        with _worker_context().Pool(min(workers, len(tasks))) as pool:
+            point_metrics = list(pool.imap(_run_sweep_point, tasks))
+    else:
+        point_metrics = [_run_sweep_point(task) for task in tasks]
 
-    for floor, data in aggregated_results.items():
-        if data['breaks'] > max_breaks:
-            max_breaks = data['breaks']
-            floor_with_most_breaks = floor
+    sweep_results = {}
+    for column, index in [('ball_weight', 0), ('plate_strength', 1), ('floor_height', 2)]:
+        sweep_results[f'{column}_min'] = np.array([point[index][0] for point in parameter_grid], dtype=np.float64)
+        sweep_results[f'{column}_max'] = np.array([point[index][1] for point in parameter_grid], dtype=np.float64)
+    for name in point_metrics[0] if point_metrics else []:
+        sweep_results[name] = np.array([metrics[name] for metrics in point_metrics])
+    return sweep_results
 
-    return floor_with_most_breaks, max_breaks
+
+def save_sweep_results(sweep_results, path):
+    """
+    Write sweep results to one columnar file: npz with the per-floor metrics as (points, floors) arrays, or csv with
+    one row per point and floor.
+    :param sweep_results: Dictionary of columns from run_parameter_sweep.
+    :param path: File to write, csv if it ends in .csv and npz otherwise.
+    """
+    if not path.endswith('.csv'):
+        np.savez(path, **sweep_results)
+        return
+
+    point_columns = [name for name, values in sweep_results.items() if values.ndim == 1]
+    floor_columns = [name for name, values in sweep_results.items() if values.ndim == 2]
+    num_points = len(sweep_results[point_columns[0]])
+    num_floors = sweep_results[floor_columns[0]].shape[1] if floor_columns else 0
+
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(point_columns + ['floor'] + floor_columns)
+        for point in range(num_points):
+            point_values = [sweep_results[name][point].item() for name in point_columns]
+            for floor in range(num_floors):
+                writer.writerow(point_values + [floor + 1]
+                                + [sweep_results[name][point, floor].item() for name in floor_columns])
+
+
+def write_result_arrays(result_arrays, path, chunk_rows=65536):
+    """
+    Write per-floor result arrays to a columnar file, streaming them so large buildings never go through a dict or one
+    giant string. The format follows the extension: Parquet (needs pyarrow, otherwise falls back to csv next to the
+    requested file), npz, or csv.
+    :param result_arrays: Dictionary of equal-length arrays, e.g. from SimulationAggregator.result_arrays().
+    :param path: File to write.
+    :param chunk_rows: Number of rows written at a time.
+    :return: Path of the file actually written.
+    """
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            path = path[:-len('.parquet')] + '.csv'
+            logging.warning(f"pyarrow is not installed, writing the results as csv to {path} instead.")
+        else:
+            pyarrow.parquet.write_table(pyarrow.table(result_arrays), path, row_group_size=chunk_rows)
+            return path
+
+    if not path.endswith('.csv'):
+        np.savez(path, **result_arrays)
+        return path
+
+    columns = list(result_arrays)
+    num_rows = len(result_arrays[columns[0]])
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(columns)
+        for first_row in range(0, num_rows, chunk_rows):
+            # Only one chunk is converted to Python numbers at a time, and floats keep their shortest exact repr
+            writer.writerows(zip(*[result_arrays[column][first_row:first_row + chunk_rows].tolist()
+                                   for column in columns]))
+    return path
+
+
+def bin_floor_series(floors, values, num_bins):
+    """
+    Aggregate a per-floor series into bins of consecutive floors, so it can be drawn with a bounded number of points.
+    Non-finite values, like the infinite efficiency score of floors that never broke a plate, are left out of the bins,
+    and bins without any finite value are NaN.
+    :param floors: Array of floor numbers.
+    :param values: Array of per-floor values.
+    :param num_bins: Number of bins, capped at the number of floors.
+    :return: Tuple of (bin centre floor, minimum, maximum, mean) arrays, one entry per bin.
+    """
+    num_floors = len(values)
+    num_bins = min(num_bins, num_floors)
+    starts = np.arange(num_bins) * num_floors // num_bins
+    ends = np.append(starts[1:], num_floors)
+
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    finite_values = np.where(finite, values, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # fmin and fmax skip the NaNs, so only the finite values count
+        minima = np.fmin.reduceat(finite_values, starts)
+        maxima = np.fmax.reduceat(finite_values, starts)
+        means = np.add.reduceat(np.where(finite, values, 0), starts) / np.add.reduceat(finite.astype(np.int64), starts)
+    centres = (floors[starts] + floors[ends - 1]) / 2
+    return centres, minima, maxima, means
 
 
 def plot_simulation_results(simulation_results_to_plot, avg_ball_weight_to_plot, avg_plate_strength_to_plot,
                             avg_floor_height_to_plot,
-                            most_efficient_floor_to_plot, efficiency_score_to_plot, iterations):
+                            most_efficient_floor_to_plot, efficiency_score_to_plot, iterations, output='window',
+                            output_path=None):
     """
     Plot the simulation results and annotate with the most efficient floor.
-    :param simulation_results_to_plot: Dictionary containing the results from the simulation.
+    Matplotlib is only imported here, so importing this module or running headless never loads it or a GUI toolkit.
+    Buildings with more than PLOT_BINNED_FLOORS floors are drawn as the min/max envelope and mean of bins of floors
+    rather than a marker or bar per floor, so rendering takes the same time whatever the floor count.
+    :param simulation_results_to_plot: SimulationResults or dictionary containing the results from the simulation.
     :param avg_ball_weight_to_plot: Average weight of the ball used in the simulation.
     :param avg_plate_strength_to_plot: Average strength of the plate used in the simulation.
     :param avg_floor_height_to_plot: Average height of the floors used in the simulation.
     :param most_efficient_floor_to_plot: The most efficient starting floor determined from the simulation.
     :param efficiency_score_to_plot: The efficiency score of the most efficient floor.
     :param iterations: Number of iterations used in the simulation.
+    :param output: 'window' to show the plot in a maximised Qt window, or 'png' / 'svg' to render it to a file.
+    :param output_path: File to render to, defaults to simulation_results.<output>.
     """
-    # Extracting data from simulation_results
-    floors = list(simulation_results_to_plot.keys())
-    average_attempts = [simulation_results_to_plot[floor]['average_attempts'] for floor in floors]
-    break_percentages = [simulation_results_to_plot[floor]['break_percentage'] for floor in floors]
-    total_breaks_per_floor = [simulation_results_to_plot[floor]['breaks'] for floor in floors]
-    efficiency_scores = [
-        data['average_attempts'] / data['break_percentage'] if data['break_percentage'] > 0 else float('inf') for
-        floor, data in simulation_results_to_plot.items()]
+    import matplotlib
+
+    if output == 'window':
+        matplotlib.use('Qt5Agg')  # Or another backend like 'GTK3Agg', 'WXAgg', etc.
+    else:
+        matplotlib.use('Agg')  # Non-interactive backend, no display needed
+    import matplotlib.pyplot as plt
+
+    # Extracting data from the analysis of the simulation results
+    plot_arrays = analyze_results(simulation_results_to_plot).arrays
+    floors = plot_arrays['floor']
+    average_attempts = plot_arrays['average_attempts']
+    break_percentages = plot_arrays['break_percentage']
+    total_breaks_per_floor = plot_arrays['breaks']
+    efficiency_scores = plot_arrays['efficiency_score']
+
+    binned = len(floors) > PLOT_BINNED_FLOORS
+
+    def plot_series(values, color, bars=False):
+        if not binned:
+            if bars:
+                plt.bar(floors, values, color=color)
+            else:
+                plt.plot(floors, values, marker='o', color=color)
+            return
+        bin_floors, minima, maxima, means = bin_floor_series(floors, values, PLOT_MAX_POINTS)
+        plt.fill_between(bin_floors, minima, maxima, color=color, alpha=0.3, linewidth=0)
+        plt.plot(bin_floors, means, color=color, linewidth=1)
 
     # Creating a plot window with 4 subplots
     plt.figure(figsize=(15, 20))
@@ -351,7 +2951,7 @@ def plot_simulation_results(simulation_results_to_plot, avg_ball_weight_to_plot,
 
     # Plotting average attempts
     plt.subplot(4, 1, 1)
-    plt.plot(floors, average_attempts, marker='o', color='b')
+    plot_series(average_attempts, 'b')
     plt.title(
         f'Average Number of Attempts per Floor\n(Avg Ball Weight: {avg_ball_weight_to_plot} kg, Avg Plate Strength: '
         f'{avg_plate_strength_to_plot} N, Avg Floor Height: {avg_floor_height_to_plot} m)',
@@ -364,7 +2964,7 @@ def plot_simulation_results(simulation_results_to_plot, avg_ball_weight_to_plot,
 
     # Plotting break percentage
     plt.subplot(4, 1, 2)
-    plt.plot(floors, break_percentages, marker='o', color='r')
+    plot_series(break_percentages, 'r')
     plt.title(f'Break Percentage per Floor', fontsize=title_fontsize)
     plt.xlabel('Floor Number', fontsize=label_fontsize)
     plt.ylabel('Break Percentage (%)', fontsize=label_fontsize)
@@ -374,7 +2974,7 @@ def plot_simulation_results(simulation_results_to_plot, avg_ball_weight_to_plot,
 
     # Plotting total breaks per floor
     plt.subplot(4, 1, 3)
-    plt.bar(floors, total_breaks_per_floor, color='g')
+    plot_series(total_breaks_per_floor, 'g', bars=True)
     plt.title('Total Breaks per Actual Breaking Floor', fontsize=title_fontsize)
     plt.xlabel('Floor Number', fontsize=label_fontsize)
     plt.ylabel('Total Breaks', fontsize=label_fontsize)
@@ -384,7 +2984,7 @@ def plot_simulation_results(simulation_results_to_plot, avg_ball_weight_to_plot,
 
     # Plotting efficiency scores
     plt.subplot(4, 1, 4)
-    plt.plot(floors, efficiency_scores, marker='o', color='m')
+    plot_series(efficiency_scores, 'm')
     plt.title('Efficiency Score per Floor (lower is better)', fontsize=title_fontsize)
     plt.xlabel('Floor Number', fontsize=label_fontsize)
     plt.ylabel('Efficiency Score', fontsize=label_fontsize)
@@ -407,14 +3007,219 @@ def plot_simulation_results(simulation_results_to_plot, avg_ball_weight_to_plot,
                 f"Iterations: {iterations}", ha="center", fontsize=annotation_fontsize,
                 bbox={"facecolor": "white", "alpha": 0.5, "pad": 5})
 
-    # Display the plot
     plt.tight_layout()
+
+    if output != 'window':
+        # Render to a file instead of opening a window
+        output_path = output_path or f'simulation_results.{output}'
+        plt.savefig(output_path, format=output)
+        plt.close()
+        logging.info(f"Plot saved to {output_path}")
+        return
+
+    # Display the plot
     # Get the current figure's manager for Qt backend
     manager = plt.get_current_fig_manager()
     manager.window.showMaximized()  # Maximizes the window for Qt5
     plt.show()
 
 
+class LivePlot:
+    """
+    The four subplots of plot_simulation_results, redrawn from the state of a running simulation.
+
+    The figure and its artists are created once. A refresh only swaps the data of the lines, the bar heights and the
+    most efficient floor marker, rescales the axes and asks the canvas for an idle redraw, so it never rebuilds the
+    figure. Buildings with more than PLOT_BINNED_FLOORS floors are drawn as the mean of bins of floors.
+    """
+
+    def __init__(self, num_floors, avg_ball_weight, avg_plate_strength, avg_floor_height, output='window',
+                 output_path=None):
+        """
+        :param num_floors: Number of floors in the building.
+        :param avg_ball_weight: Average weight of the ball used in the simulation.
+        :param avg_plate_strength: Average strength of the plate used in the simulation.
+        :param avg_floor_height: Average height of the floors used in the simulation.
+        :param output: 'window' to show the plot in a maximised Qt window, or 'png' / 'svg' to render it to a file
+        once the run has finished.
+        :param output_path: File to render to, defaults to simulation_results.<output>.
+        """
+        import matplotlib
+
+        if output == 'window':
+            matplotlib.use('Qt5Agg')
+        else:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        self.output = output
+        self.output_path = output_path or f'simulation_results.{output}'
+        self.trials = 0
+        self._plt = plt
+
+        title_fontsize = 8
+        label_fontsize = 6
+        ticks_fontsize = 6
+        annotation_fontsize = 8
+
+        # Large buildings are plotted as the mean of bins of floors, like plot_simulation_results does
+        self.floors = np.arange(1, num_floors + 1)
+        self.binned = num_floors > PLOT_BINNED_FLOORS
+        plot_floors = bin_floor_series(self.floors, self.floors, PLOT_MAX_POINTS)[0] if self.binned else self.floors
+        empty = np.full(len(plot_floors), np.nan)
+        line_style = {'linewidth': 1} if self.binned else {'marker': 'o'}
+        self.figure, self.axes = plt.subplots(4, 1, figsize=(15, 20))
+        average_attempts_axes, break_percentage_axes, breaks_axes, efficiency_axes = self.axes
+
+        self.average_attempts_line, = average_attempts_axes.plot(plot_floors, empty, color='b', **line_style)
+        average_attempts_axes.set_title(
+            f'Average Number of Attempts per Floor\n(Avg Ball Weight: {avg_ball_weight} kg, Avg Plate Strength: '
+            f'{avg_plate_strength} N, Avg Floor Height: {avg_floor_height} m)', fontsize=title_fontsize)
+        average_attempts_axes.set_ylabel('Average Attempts', fontsize=label_fontsize)
+
+        self.break_percentage_line, = break_percentage_axes.plot(plot_floors, empty, color='r', **line_style)
+        break_percentage_axes.set_title('Break Percentage per Floor', fontsize=title_fontsize)
+        break_percentage_axes.set_ylabel('Break Percentage (%)', fontsize=label_fontsize)
+
+        if self.binned:
+            self.breaks_bars = None
+            self.breaks_line, = breaks_axes.plot(plot_floors, empty, color='g', **line_style)
+        else:
+            self.breaks_bars = breaks_axes.bar(plot_floors, np.zeros(num_floors), color='g')
+        breaks_axes.set_title('Total Breaks per Actual Breaking Floor', fontsize=title_fontsize)
+        breaks_axes.set_ylabel('Total Breaks', fontsize=label_fontsize)
+
+        self.efficiency_line, = efficiency_axes.plot(plot_floors, empty, color='m', **line_style)
+        efficiency_axes.set_title('Efficiency Score per Floor (lower is better)', fontsize=title_fontsize)
+        efficiency_axes.set_ylabel('Efficiency Score', fontsize=label_fontsize)
+
+        self.efficient_floor_markers = []
+        for axes in self.axes:
+            axes.set_xlabel('Floor Number', fontsize=label_fontsize)
+            axes.tick_params(labelsize=ticks_fontsize)
+            axes.grid(True)
+            self.efficient_floor_markers.append(axes.axvline(x=1, color='k', linestyle='--', visible=False))
+
+        self.status_text = self.figure.text(0.5, 0.02, 'Waiting for the first trials...', ha='center',
+                                            fontsize=annotation_fontsize,
+                                            bbox={"facecolor": "white", "alpha": 0.5, "pad": 5})
+        self.figure.tight_layout()
+
+        if output == 'window':
+            plt.ion()
+            self.figure.canvas.manager.window.showMaximized()
+            plt.show(block=False)
+
+    def refresh(self, trials, result_arrays):
+        """
+        Update the plot to a snapshot of the simulation.
+        :param trials: Number of iterations the snapshot holds.
+        :param result_arrays: Per-floor arrays from SimulationAggregator.result_arrays().
+        """
+        analysis = ResultsAnalysis(result_arrays)
+        arrays = analysis.arrays
+        self.trials = trials
+
+        self.average_attempts_line.set_ydata(self._series(arrays['average_attempts']))
+        self.break_percentage_line.set_ydata(self._series(arrays['break_percentage']))
+        if self.breaks_bars is None:
+            self.breaks_line.set_ydata(self._series(arrays['breaks']))
+        else:
+            for bar, height in zip(self.breaks_bars, arrays['breaks'].tolist()):
+                bar.set_height(height)
+        # Floors that never broke a plate have an infinite score, which is left out of the line
+        efficiency_scores = arrays['efficiency_score']
+        self.efficiency_line.set_ydata(self._series(np.where(np.isfinite(efficiency_scores), efficiency_scores,
+                                                             np.nan)))
+
+        for marker in self.efficient_floor_markers:
+            marker.set_xdata([analysis.most_efficient_floor, analysis.most_efficient_floor])
+            marker.set_visible(np.isfinite(analysis.efficiency_score))
+        self.status_text.set_text(f"Most Efficient Floor: {analysis.most_efficient_floor}, Efficiency Score: "
+                                  f"{analysis.efficiency_score:.6f}, Iterations: {trials}")
+
+        for axes in self.axes:
+            axes.relim()
+            axes.autoscale_view()
+        self.figure.canvas.draw_idle()
+        self.poll()
+
+    def _series(self, values):
+        # Per-floor values as plotted: unchanged, or the mean of each bin of floors in large buildings
+        if not self.binned:
+            return values
+        return bin_floor_series(self.floors, values, PLOT_MAX_POINTS)[3]
+
+    def poll(self):
+        """
+        Let the window process its pending events, including any idle redraw, so it stays responsive.
+        """
+        self.figure.canvas.flush_events()
+
+    def finish(self):
+        """
+        Keep the window open until it is closed, or render the final state to the output file.
+        """
+        plt = self._plt
+        if self.output != 'window':
+            self.figure.savefig(self.output_path, format=self.output)
+            plt.close(self.figure)
+            logging.info(f"Plot saved to {self.output_path}")
+            return
+
+        plt.ioff()
+        plt.show()
+
+
+def run_with_live_plot(live_plot, simulate, refresh_interval=0.2):
+    """
+    Run a simulation in a background thread while the live plot redraws from its latest progress in this thread.
+    The simulation only hands over a snapshot of the per-floor results at each progress report and never waits for the
+    plot. Snapshots that arrive faster than the plot can redraw are skipped, so redrawing does not hold the run back.
+    Worker pools the simulation starts spawn their processes rather than fork them, see _worker_context.
+    :param live_plot: LivePlot to refresh.
+    :param simulate: Function running the simulation, called with a progress callback that it calls with the
+    SimulationAggregator as the run progresses.
+    :param refresh_interval: Seconds between checks for a new snapshot.
+    :return: The return value of simulate.
+    """
+    latest_snapshot = queue.Queue(maxsize=1)
+    outcome = {}
+
+    def report_progress(aggregator):
+        snapshot = (aggregator.trials, aggregator.result_arrays())
+        try:
+            # Drop a snapshot the plot has not picked up yet in favour of the newer one
+            latest_snapshot.get_nowait()
+        except queue.Empty:
+            pass
+        latest_snapshot.put_nowait(snapshot)
+
+    def run_simulation():
+        try:
+            outcome['result'] = simulate(report_progress)
+        except BaseException as error:
+            outcome['error'] = error
+
+    simulation = threading.Thread(target=run_simulation, name='live-simulation', daemon=True)
+    simulation.start()
+    while simulation.is_alive():
+        simulation.join(refresh_interval)
+        try:
+            live_plot.refresh(*latest_snapshot.get_nowait())
+        except queue.Empty:
+            live_plot.poll()
+
+    if 'error' in outcome:
+        raise outcome['error']
+    try:
+        # The final snapshot may have arrived after the last check
+        live_plot.refresh(*latest_snapshot.get_nowait())
+    except queue.Empty:
+        pass
+    return outcome['result']
+
+
 if __name__ == '__main__':
     # Set up argument parsing
     parser = argparse.ArgumentParser(description="Run the plate break simulation.")
@@ -426,8 +3231,80 @@ if __name__ == '__main__':
     parser.add_argument("--plate_strength_max", type=float, default=70, help="Maximum plate strength in Newtons.")
     parser.add_argument("--floor_height_min", type=float, default=1, help="Minimum floor height in meters.")
     parser.add_argument("--floor_height_max", type=float, default=3, help="Maximum floor height in meters.")
+    parser.add_argument("--num_floors", type=int, default=DEFAULT_NUM_FLOORS, help="Number of floors in the building.")
+    parser.add_argument("--strategies", nargs='+', choices=list(STRATEGIES) + list(STRATEGY_FACTORIES),
+                        default=DEFAULT_STRATEGIES, help="Strategies to simulate.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes to shard the simulation across.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for a reproducible run. Results are identical for any number of workers.")
+    parser.add_argument("--trace", type=str, default=None,
+                        help="Write structured per-probe trace events to this JSON lines file (slows the run down).")
+    parser.add_argument("--output", choices=['window', 'png', 'svg', 'none'], default='window',
+                        help="Show the plot in a window, render it to a png or svg file, or skip plotting.")
+    parser.add_argument("--plot_file", type=str, default=None,
+                        help="File to render the plot to with --output png/svg. Defaults to simulation_results.<ext>.")
+    parser.add_argument("--no-plot", action='store_true', help="Skip plotting, same as --output none.")
+    parser.add_argument("--adaptive", action='store_true',
+                        help="Stop early once the most efficient floor has converged, treating --num_iterations as "
+                             "the maximum.")
+    parser.add_argument("--batch_size", type=int, default=1000,
+                        help="Number of iterations between convergence checks in adaptive mode.")
+    parser.add_argument("--target_relative_error", type=float, default=0.05,
+                        help="Relative 95%% confidence interval of the winning efficiency score to stop at in "
+                             "adaptive mode.")
+    parser.add_argument("--exact", action='store_true',
+                        help="Compute the expected results of --num_iterations iterations analytically instead of "
+                             "sampling them.")
+
+    parser.add_argument("--top_k", type=int, default=5, help="Number of top floors to report by efficiency score.")
+    parser.add_argument("--checkpoint", type=str, default=None,
+                        help="Periodically save the run's progress to this file so it can be resumed.")
+    parser.add_argument("--checkpoint_every", type=int, default=1000000,
+                        help="Number of iterations between checkpoints, rounded up to whole blocks of trials.")
+    parser.add_argument("--resume", action='store_true', help="Continue the run saved in --checkpoint.")
+    parser.add_argument("--results-out", dest='results_out', type=str, default=None,
+                        help="Write the per-floor results to a columnar file (.parquet, .npz or .csv) instead of "
+                             "printing them.")
+    parser.add_argument("--trial_set", type=str, default=None,
+                        help="Replay the trials stored in this npy file, so runs comparing strategies or parameter "
+                             "ranges see the same trials. It is created with --num_iterations trials from --seed if it "
+                             "does not exist yet.")
+    parser.add_argument("--show_trial", type=int, default=None,
+                        help="Generate only this trial of the seeded run and report its parameters and each "
+                             "strategy's attempts on it, without running the simulation. Combine with --trace to "
+                             "record its probes.")
+    parser.add_argument("--live", action='store_true',
+                        help="Redraw the plot while the simulation runs instead of only at the end.")
+    parser.add_argument("--live_every", type=int, default=10000,
+                        help="Number of iterations between live plot updates, rounded up to whole blocks of trials.")
+
+    subparsers = parser.add_subparsers(dest='command')
+    sweep_parser = subparsers.add_parser('sweep', help="Run the simulation over a grid of parameter ranges.")
+    sweep_parser.add_argument("--ball_weight_ranges", type=parse_range, nargs='+', default=None,
+                              help="Ball weight ranges to sweep, e.g. 0.5:1.5 1:2. Defaults to the single range above.")
+    sweep_parser.add_argument("--plate_strength_ranges", type=parse_range, nargs='+', default=None,
+                              help="Plate strength ranges to sweep, e.g. 40:70 50:60.")
+    sweep_parser.add_argument("--floor_height_ranges", type=parse_range, nargs='+', default=None,
+                              help="Floor height ranges to sweep, e.g. 1:3 2:2.")
+    sweep_parser.add_argument("--zip", action='store_true',
+                              help="Pair the range lists up point by point instead of sweeping every combination.")
+    sweep_parser.add_argument("--sweep_output", type=str, default='sweep_results.npz',
+                              help="Columnar file to write the sweep to, csv if it ends in .csv and npz otherwise.")
 
     args = parser.parse_args()
+    if args.num_floors < 1:
+        parser.error("--num_floors needs at least one floor.")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint.")
+    if args.checkpoint and (args.adaptive or args.exact):
+        parser.error("--checkpoint only applies to fixed-length sampled runs, not --adaptive or --exact.")
+    if args.live and (args.exact or args.no_plot or args.output == 'none'):
+        parser.error("--live needs a sampled run with a plot, not --exact, --no-plot or --output none.")
+    if args.trial_set and args.exact:
+        parser.error("--trial_set replays sampled trials, --exact does not sample any.")
+    if args.show_trial is not None and args.seed is None:
+        parser.error("--show_trial needs --seed, the trial is generated from the seed and its number.")
 
     # Extract values from args
     NUM_ITERATIONS = args.num_iterations
@@ -436,17 +3313,131 @@ if __name__ == '__main__':
     FLOOR_HEIGHT_RANGE = (args.floor_height_min, args.floor_height_max)
 
     # List of strategies
-    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
-                  binary_search_strategy]
+    # Exact mode and the prior-aware strategies compute the breaking floor distribution of every parameter point
+    if args.exact or any(name in STRATEGY_FACTORIES for name in args.strategies):
+        parameter_points = [(BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE, FLOOR_HEIGHT_RANGE)]
+        if args.command == 'sweep':
+            parameter_points = sweep_grid(args.ball_weight_ranges or [BALL_WEIGHT_RANGE],
+                                          args.plate_strength_ranges or [PLATE_STRENGTH_RANGE],
+                                          args.floor_height_ranges or [FLOOR_HEIGHT_RANGE], zipped=args.zip)
+        try:
+            for parameter_point in parameter_points:
+                check_distribution_ranges(*parameter_point)
+        except ValueError as error:
+            parser.error(str(error))
+
+    strategies = build_strategies(args.strategies, BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE, FLOOR_HEIGHT_RANGE)
+    if args.exact:
+        uncounted = [strategy.__name__ for strategy in strategies
+                     if not can_count_attempts(strategy, args.num_floors)]
+        if uncounted:
+            parser.error(f"--exact needs strategies whose attempts can be counted for {args.num_floors} floors, which "
+                         f"{', '.join(uncounted)} can't; run them without --exact.")
+
+    if args.trial_set and not os.path.exists(args.trial_set):
+        logging.info(f"Storing {NUM_ITERATIONS} trials in {args.trial_set}.")
+        create_trial_set(args.trial_set, NUM_ITERATIONS, num_floors=args.num_floors, seed=args.seed)
+
+    if args.command == 'sweep':
+        grid = sweep_grid(args.ball_weight_ranges or [BALL_WEIGHT_RANGE],
+                          args.plate_strength_ranges or [PLATE_STRENGTH_RANGE],
+                          args.floor_height_ranges or [FLOOR_HEIGHT_RANGE], zipped=args.zip)
+        logging.info(f"Starting a sweep of {len(grid)} parameter points.")
+        sweep = run_parameter_sweep(NUM_ITERATIONS, grid, strategies, num_floors=args.num_floors,
+                                    workers=args.workers, seed=args.seed, exact=args.exact, trial_set=args.trial_set)
+        save_sweep_results(sweep, args.sweep_output)
+        logging.info(f"Sweep of {len(grid)} parameter points written to {args.sweep_output}.")
+        sys.exit()
+
+    if args.trace:
+        enable_tracing(args.trace)
+
+    if args.show_trial is not None:
+        # Any trial of a seeded run can be generated on its own, so there is no need to run the trials before it
+        floor_heights, ball_weight, plate_strength = seeded_trial(args.seed, args.show_trial, BALL_WEIGHT_RANGE,
+                                                                  PLATE_STRENGTH_RANGE, FLOOR_HEIGHT_RANGE,
+                                                                  num_floors=args.num_floors)
+        building = Building(floor_heights)
+        breaking_floor = building.oracle(ball_weight, plate_strength).breaking_floor
+        logging.info(f"Trial {args.show_trial}: Ball Weight: {ball_weight:.4f}, Plate Strength: {plate_strength:.4f}, "
+                     f"Building Height: {building.height_at(args.num_floors):.4f}, Breaking Floor: "
+                     f"{breaking_floor if breaking_floor <= args.num_floors else None}")
+        if TRACE_ENABLED:
+            _tracer.start_trial(args.show_trial)
+        for strategy in strategies:
+            trial_attempts = np.array([strategy(building, ball_weight, plate_strength, floor)[0]
+                                       for floor in range(1, args.num_floors + 1)])
+            logging.info(f"{strategy.__name__}: Average Attempts: {trial_attempts.mean():.4f}, Most Attempts: "
+                         f"{trial_attempts.max()} from Floor {trial_attempts.argmax() + 1}")
+        disable_tracing()
+        sys.exit()
+
+    # Calculate the average ball weight and floor height used in the simulation
+    avg_ball_weight = sum(BALL_WEIGHT_RANGE) / 2  # Average of the BALL_WEIGHT_RANGE
+    avg_plate_strength = sum(PLATE_STRENGTH_RANGE) / 2  # Average of the FLOOR_HEIGHT_RANGE
+    avg_floor_height = sum(FLOOR_HEIGHT_RANGE) / 2  # Average of the FLOOR_HEIGHT_RANGE
+
+    live_plot = None
+    if args.live:
+        live_plot = LivePlot(args.num_floors, avg_ball_weight, avg_plate_strength, avg_floor_height,
+                             output=args.output, output_path=args.plot_file)
+
+    def simulate(progress_callback=None):
+        """
+        Run the simulation in the selected mode, reporting progress to the live plot if there is one.
+        :param progress_callback: Optional function called with the SimulationAggregator as the run progresses.
+        :return: SimulationAggregator of the run.
+        """
+        if args.exact:
+            return run_exact_simulation(NUM_ITERATIONS, BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE, FLOOR_HEIGHT_RANGE,
+                                        strategies, num_floors=args.num_floors)
+        if args.adaptive:
+            aggregator, converged = run_adaptive_simulation(NUM_ITERATIONS, BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE,
+                                                            FLOOR_HEIGHT_RANGE, strategies,
+                                                            num_floors=args.num_floors, batch_size=args.batch_size,
+                                                            target_relative_error=args.target_relative_error,
+                                                            workers=args.workers, seed=args.seed,
+                                                            progress_callback=progress_callback,
+                                                            trial_set=args.trial_set)
+            if converged:
+                logging.info(f"Converged after {aggregator.trials} of at most {NUM_ITERATIONS} iterations.")
+            else:
+                logging.warning(f"Did not converge within {NUM_ITERATIONS} iterations.")
+            return aggregator
+        if args.checkpoint:
+            return run_checkpointed_simulation(NUM_ITERATIONS, BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE,
+                                               FLOOR_HEIGHT_RANGE, strategies, args.checkpoint,
+                                               checkpoint_every=args.checkpoint_every, num_floors=args.num_floors,
+                                               workers=args.workers, seed=args.seed, resume=args.resume,
+                                               progress_callback=progress_callback, trial_set=args.trial_set)
+        if progress_callback is not None:
+            return run_chunked_simulation(NUM_ITERATIONS, BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE,
+                                          FLOOR_HEIGHT_RANGE, strategies, progress_callback,
+                                          chunk_iterations=args.live_every, num_floors=args.num_floors,
+                                          workers=args.workers, seed=args.seed, trial_set=args.trial_set)
+        return run_streaming_simulation(NUM_ITERATIONS, BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE, FLOOR_HEIGHT_RANGE,
+                                        strategies, num_floors=args.num_floors, workers=args.workers, seed=args.seed,
+                                        trial_set=args.trial_set)
 
     logging.info("Starting the simulation.")
     # Run the simulation
-    simulation_results = run_simulation_with_adjusted_parameters(NUM_ITERATIONS, BALL_WEIGHT_RANGE,
-                                                                 PLATE_STRENGTH_RANGE,
-                                                                 FLOOR_HEIGHT_RANGE, strategies)
-
-    # Pretty-print the results
-    pprint(simulation_results)
+    if live_plot is not None:
+        simulation_aggregate = run_with_live_plot(live_plot, simulate)
+    else:
+        simulation_aggregate = simulate()
+    if args.exact:
+        logging.info(f"Computed the expected results of {NUM_ITERATIONS} iterations exactly.")
+    elif args.adaptive:
+        NUM_ITERATIONS = simulation_aggregate.trials
+    disable_tracing()
+    simulation_results = simulation_aggregate.results()
+
+    if args.results_out:
+        results_path = write_result_arrays(simulation_results.arrays, args.results_out)
+        logging.info(f"Per-floor results written to {results_path}.")
+    else:
+        # Pretty-print the results
+        pprint(simulation_results.to_dict())
 
     # Calculate the floor with the most breaks and its number of breaks
     most_breaks_floor, most_breaks = find_floor_with_most_breaks(simulation_results)
@@ -456,13 +3447,43 @@ if __name__ == '__main__':
     most_efficient_floor, efficiency_score = find_most_efficient_floor_from_results(simulation_results)
     logging.info(f"Most Efficient Floor: {most_efficient_floor}, Efficiency Score: {efficiency_score}")
 
-    # Calculate the average ball weight and floor height used in the simulation
-    avg_ball_weight = sum(BALL_WEIGHT_RANGE) / 2  # Average of the BALL_WEIGHT_RANGE
-    avg_plate_strength = sum(PLATE_STRENGTH_RANGE) / 2  # Average of the FLOOR_HEIGHT_RANGE
-    avg_floor_height = sum(FLOOR_HEIGHT_RANGE) / 2  # Average of the FLOOR_HEIGHT_RANGE
+    # The analysis behind both lookups above is cached with the results, so ranking and ties cost one more pass at most
+    results_analysis = simulation_results.analysis()
+    if len(results_analysis.tied_efficient_floors) > 1:
+        logging.info(f"Floors Tied for Most Efficient: {results_analysis.tied_efficient_floors.tolist()}")
+    logging.info(f"Top {args.top_k} Floors by Efficiency Score: {results_analysis.top_floors(args.top_k).tolist()}")
+
+    # Report the converged estimate of the attempts from the most efficient floor with its error bar
+    _, attempts_mean, attempts_std, attempts_half_width = simulation_aggregate.attempt_statistics()
+    logging.info(f"Average Attempts from Floor {most_efficient_floor}: {attempts_mean[most_efficient_floor]:.4f} "
+                 f"+/- {attempts_half_width[most_efficient_floor]:.4f} "
+                 f"(95% CI, std {attempts_std[most_efficient_floor]:.4f})")
+
+    # Break the same run down per strategy
+    for strategy_index, strategy in enumerate(strategies):
+        strategy_floor, strategy_score = find_most_efficient_floor_from_results(
+            simulation_aggregate.results(strategy_index))
+        _, strategy_mean, _, strategy_half_width = simulation_aggregate.attempt_statistics(strategy_index)
+        logging.info(f"{strategy.__name__}: Most Efficient Floor: {strategy_floor}, Efficiency Score: "
+                     f"{strategy_score}, Average Attempts: {strategy_mean[strategy_floor]:.4f} "
+                     f"+/- {strategy_half_width[strategy_floor]:.4f}")
+        if strategy_index > 0:
+            # Every strategy ran on the same trials, so compare it to the first one trial by trial
+            difference_mean, _, difference_half_width = simulation_aggregate.paired_difference_statistics(
+                strategy_index)
+            _, _, _, baseline_half_width = simulation_aggregate.attempt_statistics(0)
+            unpaired_half_width = math.hypot(strategy_half_width[strategy_floor], baseline_half_width[strategy_floor])
+            logging.info(f"{strategy.__name__} vs {strategies[0].__name__} from Floor {strategy_floor}: "
+                         f"{difference_mean[strategy_floor]:+.4f} Attempts +/- "
+                         f"{difference_half_width[strategy_floor]:.4f} paired "
+                         f"(+/- {unpaired_half_width:.4f} unpaired)")
 
     # Plot the results
-    plot_simulation_results(simulation_results, avg_ball_weight, avg_plate_strength, avg_floor_height,
-                            most_efficient_floor, efficiency_score, NUM_ITERATIONS)
+    if live_plot is not None:
+        live_plot.finish()
+    elif not args.no_plot and args.output != 'none':
+        plot_simulation_results(simulation_results, avg_ball_weight, avg_plate_strength, avg_floor_height,
+                                most_efficient_floor, efficiency_score, NUM_ITERATIONS, output=args.output,
+                                output_path=args.plot_file)
 
     logging.info("Simulation completed.")
@@ -0,0 +1,237 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from run import Building, STRATEGIES, DEFAULT_STRATEGIES, VECTORIZED_STRATEGY_ATTEMPTS, SimulationAggregator, \
+    run_streaming_simulation, _run_scalar_trials
+
+# Strategies benchmarked, by the registered name used in the metric names
+BENCHMARK_STRATEGIES = STRATEGIES
+
+BUILDING_SIZES = [100, 1000, 10000, 100000, 1000000]
+QUICK_BUILDING_SIZES = [100, 1000, 10000]
+
+BALL_WEIGHT_RANGE = (0.5, 1.5)
+PLATE_STRENGTH_RANGE = (40, 70)
+FLOOR_HEIGHT_RANGE = (1, 3)
+
+
+def best_time(function, repeats=5):
+    """
+    Time a function, keeping the fastest of several runs to filter out scheduling noise.
+    :param function: Function to call without arguments.
+    :param repeats: Number of timed runs.
+    :return: Fastest run time in seconds.
+    """
+    fastest = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest
+
+
+def benchmark_building(num_floors, rng):
+    """
+    Build a benchmark building whose plate breaks part way up, so every strategy has to search for it.
+    :param num_floors: Number of floors in the building.
+    :param rng: numpy Generator for the floor heights.
+    :return: Tuple of (building, ball weight, plate strength).
+    """
+    building = Building(rng.uniform(*FLOOR_HEIGHT_RANGE, num_floors).tolist())
+    ball_weight = 1.0
+    # Put the breaking point about a third of the way up
+    plate_strength = building.impact_forces(ball_weight)[num_floors // 3]
+    return building, ball_weight, plate_strength
+
+
+def benchmark_probe_cost(rng):
+    """
+    Measure the cost of a single probe, the unit of work of the scalar strategies.
+    :param rng: numpy Generator for the benchmark building.
+    :return: Dictionary of metrics.
+    """
+    building, ball_weight, plate_strength = benchmark_building(100, rng)
+    building.impact_forces(ball_weight)
+    metrics = {}
+
+    for name, strategy in BENCHMARK_STRATEGIES.items():
+        total_attempts = sum(strategy(building, ball_weight, plate_strength, floor)[0] for floor in range(1, 101))
+        elapsed = best_time(lambda: [strategy(building, ball_weight, plate_strength, floor)
+                                     for floor in range(1, 101)])
+        metrics[f'probe_ns/{name}'] = {'value': elapsed / total_attempts * 1e9, 'unit': 'ns', 'better': 'lower'}
+
+    return metrics
+
+
+def benchmark_strategy_cost(building_sizes, rng):
+    """
+    Measure the per-call cost of every strategy across building sizes, on both engines.
+    :param building_sizes: Numbers of floors to benchmark.
+    :param rng: numpy Generator for the benchmark buildings.
+    :return: Dictionary of metrics.
+    """
+    metrics = {}
+
+    for num_floors in building_sizes:
+        building, ball_weight, plate_strength = benchmark_building(num_floors, rng)
+        building.impact_forces(ball_weight)
+        start_floors = np.unique(rng.integers(1, num_floors + 1, 20)).tolist()
+        breaking_floors = np.unique(rng.integers(0, num_floors + 1, 8))
+
+        for name, strategy in BENCHMARK_STRATEGIES.items():
+            elapsed = best_time(lambda: [strategy(building, ball_weight, plate_strength, floor)
+                                         for floor in start_floors], repeats=3)
+            metrics[f'strategy_call_us/{name}/floors={num_floors}'] = {
+                'value': elapsed / len(start_floors) * 1e6, 'unit': 'us', 'better': 'lower'}
+
+            if strategy not in VECTORIZED_STRATEGY_ATTEMPTS:
+                continue
+            # The vectorized engine evaluates every start floor against a batch's distinct breaking floors
+            attempts_function = VECTORIZED_STRATEGY_ATTEMPTS[strategy]
+            all_start_floors = np.arange(1, num_floors + 1)[:, None]
+            elapsed = best_time(lambda: attempts_function(all_start_floors, breaking_floors[None, :], num_floors),
+                                repeats=3)
+            metrics[f'vectorized_cell_ns/{name}/floors={num_floors}'] = {
+                'value': elapsed / (num_floors * len(breaking_floors)) * 1e9, 'unit': 'ns', 'better': 'lower'}
+
+    return metrics
+
+
+def benchmark_throughput(num_iterations, scalar_iterations):
+    """
+    Measure the end-to-end throughput of the simulation driver in trials per second.
+    :param num_iterations: Iterations for the vectorized engine.
+    :param scalar_iterations: Iterations for the scalar engine, which is far slower.
+    :return: Dictionary of metrics.
+    """
+    strategies = [STRATEGIES[name] for name in DEFAULT_STRATEGIES]
+
+    elapsed = best_time(lambda: run_streaming_simulation(num_iterations, BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE,
+                                                         FLOOR_HEIGHT_RANGE, strategies, seed=1), repeats=3)
+    metrics = {'throughput_trials_per_s/vectorized': {'value': num_iterations / elapsed, 'unit': 'trials/s',
+                                                      'better': 'higher'}}
+
+    random.seed(1)
+    elapsed = best_time(lambda: _run_scalar_trials(scalar_iterations, BALL_WEIGHT_RANGE, PLATE_STRENGTH_RANGE,
+                                                   FLOOR_HEIGHT_RANGE, strategies,
+                                                   SimulationAggregator(100, len(strategies))), repeats=3)
+    metrics['throughput_trials_per_s/scalar'] = {'value': scalar_iterations / elapsed, 'unit': 'trials/s',
+                                                 'better': 'higher'}
+    return metrics
+
+
+def run_benchmarks(quick=False):
+    """
+    Run the whole benchmark suite.
+    :param quick: Use smaller buildings and fewer iterations.
+    :return: Benchmark report with environment metadata and metrics.
+    """
+    rng = np.random.default_rng(0)
+    metrics = {}
+    metrics.update(benchmark_probe_cost(rng))
+    metrics.update(benchmark_strategy_cost(QUICK_BUILDING_SIZES if quick else BUILDING_SIZES, rng))
+    metrics.update(benchmark_throughput(10000 if quick else 100000, 20 if quick else 100))
+
+    return {
+        'metadata': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+                     'machine': platform.machine(), 'processor': platform.processor(), 'cpus': os.cpu_count(),
+                     'quick': quick},
+        'metrics': metrics,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    Compare a benchmark report against a stored baseline.
+    :param report: Benchmark report from run_benchmarks.
+    :param baseline: Earlier benchmark report.
+    :param tolerance: Allowed relative slowdown, e.g. 0.25 for 25%.
+    :return: Tuple of a list of (metric name, baseline value, current value, relative change) for every regression,
+    and a list of the names of the report's metrics missing from the baseline, which could not be compared.
+    """
+    regressions = []
+    missing = []
+    for name, metric in report['metrics'].items():
+        if name not in baseline['metrics']:
+            missing.append(name)
+            continue
+        baseline_value = baseline['metrics'][name]['value']
+        value = metric['value']
+
+        # Express the change so that positive always means slower
+        if metric['better'] == 'lower':
+            change = value / baseline_value - 1
+        else:
+            change = baseline_value / value - 1
+
+        if change > tolerance:
+            regressions.append((name, baseline_value, value, change))
+
+    return regressions, missing
+
+
+def environment_differences(report, baseline):
+    """
+    Find the environment settings a baseline was recorded with that differ from the current report's.
+    :param report: Benchmark report from run_benchmarks.
+    :param baseline: Earlier benchmark report.
+    :return: List of (setting, baseline value, current value) for every differing setting.
+    """
+    return [(setting, baseline['metadata'].get(setting), value) for setting, value in report['metadata'].items()
+            if baseline['metadata'].get(setting) != value]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Benchmark the strategies and the simulation driver.")
+    parser.add_argument("--quick", action='store_true', help="Use smaller buildings and fewer iterations.")
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", type=str, default=None, help="Compare against this stored JSON report.")
+    parser.add_argument("--save_baseline", type=str, default=None, help="Store the report as a new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown before a metric counts as a regression.")
+
+    args = parser.parse_args()
+
+    benchmark_report = run_benchmarks(quick=args.quick)
+    report_json = json.dumps(benchmark_report, indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(report_json + '\n')
+    else:
+        print(report_json)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline_file:
+            baseline_file.write(report_json + '\n')
+        logging.info(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline_report = json.load(baseline_file)
+
+        # Timings are only comparable on the machine and settings the baseline was recorded with
+        for setting, baseline_setting, current_setting in environment_differences(benchmark_report, baseline_report):
+            logging.warning(f"The baseline was recorded with {setting} {baseline_setting}, not {current_setting}; "
+                            f"regenerate it with --save_baseline on this machine.")
+
+        found_regressions, missing_metrics = compare_to_baseline(benchmark_report, baseline_report, args.tolerance)
+        for metric_name in missing_metrics:
+            logging.warning(f"{metric_name} is not in the baseline and was not compared.")
+        for metric_name, baseline_metric, current_metric, relative_change in found_regressions:
+            logging.error(f"Regression in {metric_name}: {baseline_metric:.6g} -> {current_metric:.6g} "
+                          f"({relative_change:+.0%} slower)")
+        if found_regressions:
+            sys.exit(1)
+        compared_metrics = len(benchmark_report['metrics']) - len(missing_metrics)
+        logging.info(f"No regressions against {args.baseline} in {compared_metrics} compared metrics.")
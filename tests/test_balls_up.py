@@ -1,8 +1,25 @@
+import csv
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 
+import numpy as np
+
+import run
 from run import calculate_impact_force, linear_search_simulation_with_flag, \
     precise_halving_strategy_simulation_with_flag, binary_search_strategy, find_most_efficient_floor_from_results, \
-    cumulative_height, run_simulation_with_adjusted_parameters, find_floor_with_most_breaks
+    cumulative_height, run_simulation_with_adjusted_parameters, find_floor_with_most_breaks, Building, \
+    draw_uniform_trials, _run_scalar_trials, _run_vectorized_trials, enable_tracing, disable_tracing, \
+    plot_simulation_results, SimulationAggregator, run_streaming_simulation, run_adaptive_simulation, \
+    efficiency_confidence_intervals
 
 
 class TestBallDropSimulation(unittest.TestCase):
@@ -20,6 +37,58 @@ class TestBallDropSimulation(unittest.TestCase):
         self.assertAlmostEqual(cumulative_height(floor_heights, 5), 23.4,
                                places=2)
 
+    def test_debug_logging_follows_the_log_level(self):
+        # Debug messages are logged whenever the log level allows, with probe tracing switched off
+        self.assertFalse(run.TRACE_ENABLED)
+        with self.assertLogs(level='DEBUG') as logs:
+            calculate_impact_force(10, 1)
+            cumulative_height([1, 2], 2)
+            binary_search_strategy([1, 2, 3], 1, 5, 1)
+        messages = [record.getMessage() for record in logs.records]
+        self.assertIn("Calculated impact force: Height = 10 m, Weight = 1 kg, Force = 14.0 N", messages)
+        self.assertIn("Cumulative height calculated up to floor 2: 3 m", messages)
+        self.assertIn("Starting binary_search strategy from floor 1", messages)
+        self.assertIn("binary_search Result: 2 attempts, Break occurred: True, Breaking floor: 2", messages)
+
+        with self.assertNoLogs(level='INFO'):
+            calculate_impact_force(10, 1)
+            binary_search_strategy([1, 2, 3], 1, 5, 1)
+
+    def test_building_prefix_sums(self):
+        floor_heights = [0.1, 1.2, 5, 7.1, 10]
+        building = Building(floor_heights)
+
+        # Prefix sums and forces should match the scalar helpers for every floor, including the ground
+        for floor in range(len(floor_heights) + 1):
+            self.assertEqual(cumulative_height(floor_heights, floor), building.height_at(floor))
+            self.assertEqual(calculate_impact_force(cumulative_height(floor_heights, floor), 0.5),
+                             building.impact_forces(0.5)[floor])
+
+        self.assertEqual(len(floor_heights), len(building))
+        self.assertEqual(cumulative_height(floor_heights, 3), cumulative_height(building, 3))
+
+    def test_break_oracle_matches_impact_forces(self):
+        # The second building has a negative floor height, so its outcomes cannot come from a single threshold
+        for floor_heights in [[0.1, 1.2, 5, 7.1, 10], [3, -1, 2, 0.5, 4]]:
+            building = Building(floor_heights)
+            for plate_strength in [0, 4, 9, 20, 100]:
+                oracle = building.oracle(0.5, plate_strength)
+                expected = [force > plate_strength for force in building.impact_forces(0.5)]
+
+                self.assertEqual(expected, oracle.outcomes)
+                self.assertEqual(expected.index(True) if True in expected else 6, oracle.breaking_floor)
+                self.assertIs(oracle, building.oracle(0.5, plate_strength))
+
+    def test_strategies_accept_building(self):
+        floor_heights = [1 for _ in range(100)]  # All floors are 1 meter high
+        building = Building(floor_heights)
+
+        for strategy in [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                         binary_search_strategy]:
+            for start_floor in range(1, 101):
+                self.assertEqual(strategy(floor_heights, 1, 31, start_floor),
+                                 strategy(building, 1, 31, start_floor))
+
     def test_linear_search_simulation_with_flag_low_break(self):
         # Set up a test case
         floor_heights = [1 for _ in range(100)]  # All floors are 1 meter high
@@ -522,5 +591,1085 @@ class TestBallDropSimulation(unittest.TestCase):
         self.assertEqual(float('inf'), efficiency_score)
 
 
+class TestVectorizedEngine(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def test_draw_uniform_trials_matches_random_stream(self):
+        random.seed(42)
+        expected = [random.random() for _ in range(3 * 102)]
+        expected_next = random.random()
+
+        random.seed(42)
+        self.assertEqual(expected, draw_uniform_trials(3, 102).ravel().tolist())
+        # The global stream should carry on exactly where the scalar draws would have left it
+        self.assertEqual(expected_next, random.random())
+
+    def test_vectorized_trials_match_scalar_trials(self):
+        for ranges in [((0.5, 1.5), (40, 70), (1, 3)), ((0.1, 3), (1, 200), (0, 2))]:
+            random.seed(7)
+            scalar = _run_scalar_trials(50, *ranges, self.strategies, SimulationAggregator(100, 3))
+            random.seed(7)
+            vectorized = _run_vectorized_trials(50, *ranges, self.strategies, SimulationAggregator(100, 3))
+
+            self.assertEqual(scalar.attempts.tolist(), vectorized.attempts.tolist())
+            self.assertEqual(scalar.breaks.tolist(), vectorized.breaks.tolist())
+            np.testing.assert_allclose(scalar.attempts_mean, vectorized.attempts_mean)
+            np.testing.assert_allclose(scalar.attempts_m2, vectorized.attempts_m2)
+
+    def test_full_simulation_matches_for_fixed_seed(self):
+        random.seed(3)
+        vectorized_results = run_simulation_with_adjusted_parameters(20, (0.5, 1.5), (40, 70), (1, 3),
+                                                                     self.strategies)
+        # A plain lambda has no vectorized counterpart, which forces the scalar engine
+        scalar_roster = [lambda *args, strategy=strategy: strategy(*args) for strategy in self.strategies]
+        random.seed(3)
+        scalar_results = run_simulation_with_adjusted_parameters(20, (0.5, 1.5), (40, 70), (1, 3), scalar_roster)
+
+        self.assertEqual(scalar_results, vectorized_results)
+
+
+class TestBuildingSize(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def test_linear_search_beyond_one_hundred_floors(self):
+        floor_heights = [1 for _ in range(500)]  # All floors are 1 meter high
+        # Breaks once the drop height exceeds 450 meters
+        ball_weight = 1
+        plate_strength = math.sqrt(2 * 9.8 * 450.5)
+
+        self.assertEqual((52, True, 451), linear_search_simulation_with_flag(floor_heights, ball_weight,
+                                                                             plate_strength, 400))
+
+    def test_results_cover_every_floor(self):
+        for num_floors in [10, 250]:
+            simulation_results = run_simulation_with_adjusted_parameters(3, (0.5, 1.5), (40, 70), (0.1, 0.5),
+                                                                         self.strategies, num_floors=num_floors,
+                                                                         seed=2)
+            self.assertEqual(list(range(1, num_floors + 1)), list(simulation_results))
+
+    def test_vectorized_trials_match_scalar_trials_for_any_size(self):
+        for num_floors in [1, 10, 333]:
+            random.seed(num_floors)
+            scalar = _run_scalar_trials(20, (0.5, 1.5), (4, 70), (0.1, 1), self.strategies,
+                                        SimulationAggregator(num_floors, 3))
+            random.seed(num_floors)
+            vectorized = _run_vectorized_trials(20, (0.5, 1.5), (4, 70), (0.1, 1), self.strategies,
+                                                SimulationAggregator(num_floors, 3))
+
+            self.assertEqual(scalar.attempts.tolist(), vectorized.attempts.tolist())
+            self.assertEqual(scalar.breaks.tolist(), vectorized.breaks.tolist())
+
+    def test_attempt_tables_match_strategies_and_are_cached(self):
+        num_floors = 12
+        floor_heights = [1 for _ in range(num_floors)]  # Floor f breaks the plate once its force passes the strength
+        forces = Building(floor_heights).impact_forces(1)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            original_cache_dir, run.ATTEMPT_TABLE_CACHE_DIR = run.ATTEMPT_TABLE_CACHE_DIR, cache_dir
+            try:
+                for strategy in self.strategies:
+                    table = run.attempt_table(strategy, num_floors)
+                    for breaking_floor in range(num_floors + 1):
+                        plate_strength = (forces[breaking_floor - 1] if breaking_floor else forces[-1]) + 1e-9
+                        for start_floor in range(1, num_floors + 1):
+                            self.assertEqual(strategy(floor_heights, 1, plate_strength, start_floor)[0],
+                                             table[start_floor - 1, breaking_floor])
+
+                    # Once memoized the table is reused, and a fresh process would load it from disk
+                    self.assertIs(table, run.attempt_table(strategy, num_floors))
+                    cached = np.load(os.path.join(cache_dir, run._attempt_table_file_name(strategy, num_floors)))
+                    self.assertEqual(table.tolist(), cached.tolist())
+            finally:
+                run.ATTEMPT_TABLE_CACHE_DIR = original_cache_dir
+                for strategy in self.strategies:
+                    run._attempt_tables.pop((strategy, num_floors), None)
+
+    def test_changed_strategies_do_not_load_stale_tables(self):
+        def old_attempts(start_floors, breaking_floors, num_floors):
+            return start_floors + 0 * breaking_floors
+
+        def new_attempts(start_floors, breaking_floors, num_floors):
+            return breaking_floors + 0 * start_floors
+
+        # Two versions of the same strategy, as if its counter was edited between runs
+        versions = []
+        for attempts in (old_attempts, new_attempts):
+            def edited_strategy(building, ball_weight, plate_strength, start_floor):
+                raise NotImplementedError
+            edited_strategy.attempts = attempts
+            versions.append(edited_strategy)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            original_cache_dir, run.ATTEMPT_TABLE_CACHE_DIR = run.ATTEMPT_TABLE_CACHE_DIR, cache_dir
+            try:
+                old_table = run.attempt_table(versions[0], 5)
+                self.assertEqual([[start_floor] * 6 for start_floor in range(1, 6)], old_table.tolist())
+
+                new_table = run.attempt_table(versions[1], 5)
+                self.assertEqual([list(range(6))] * 5, new_table.tolist())
+                # Only the table of the current code is kept
+                self.assertEqual([run._attempt_table_file_name(versions[1], 5)], os.listdir(cache_dir))
+            finally:
+                run.ATTEMPT_TABLE_CACHE_DIR = original_cache_dir
+                for strategy in versions:
+                    run._attempt_tables.pop((strategy, 5), None)
+
+    def test_strategies_list_the_code_their_tables_depend_on(self):
+        def old_table():
+            return 1
+
+        def new_table():
+            return 2
+
+        def tabulated_strategy(building, ball_weight, plate_strength, start_floor):
+            raise NotImplementedError
+        tabulated_strategy.attempts = lambda start_floors, breaking_floors, num_floors: start_floors + breaking_floors
+
+        # Editing a function the strategy's tables are built with gives its attempt tables a new name
+        tabulated_strategy.cache_sources = (old_table,)
+        old_name = run._attempt_table_file_name(tabulated_strategy, 5)
+        tabulated_strategy.cache_sources = (new_table,)
+        self.assertNotEqual(old_name, run._attempt_table_file_name(tabulated_strategy, 5))
+
+        strategy = run.PriorSearchStrategy((0.5, 1.5), (40, 70), (1, 3))
+        prior_name = run._attempt_table_file_name(strategy, 5)
+        original_distribution, run.breaking_floor_distribution = run.breaking_floor_distribution, new_table
+        try:
+            self.assertNotEqual(prior_name, run._attempt_table_file_name(strategy, 5))
+        finally:
+            run.breaking_floor_distribution = original_distribution
+
+    def test_cli_rejects_buildings_without_floors(self):
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for num_floors in ['0', '-3']:
+            completed = subprocess.run([sys.executable, 'run.py', '--num_floors', num_floors, '--no-plot'],
+                                       cwd=repo_root, capture_output=True, text=True, timeout=60)
+            self.assertEqual(2, completed.returncode)
+            self.assertIn("--num_floors needs at least one floor", completed.stderr)
+
+    def test_large_buildings_evaluate_attempts_per_batch(self):
+        original_max_floors, run.ATTEMPT_TABLE_MAX_FLOORS = run.ATTEMPT_TABLE_MAX_FLOORS, 10
+        try:
+            random.seed(4)
+            per_batch = _run_vectorized_trials(50, (0.5, 1.5), (4, 70), (0.1, 1), self.strategies,
+                                               SimulationAggregator(40, 3))
+        finally:
+            run.ATTEMPT_TABLE_MAX_FLOORS = original_max_floors
+        random.seed(4)
+        tabulated = _run_vectorized_trials(50, (0.5, 1.5), (4, 70), (0.1, 1), self.strategies,
+                                           SimulationAggregator(40, 3))
+
+        self.assertEqual(per_batch.strategy_attempts.tolist(), tabulated.strategy_attempts.tolist())
+        self.assertTrue(np.allclose(per_batch.attempts_m2, tabulated.attempts_m2))
+
+
+class TestStreamingAggregator(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def test_welford_moments_match_direct_statistics(self):
+        aggregator = SimulationAggregator(2, 1)
+        samples = [[3, 7], [5, 1], [4, 4], [10, 2]]
+        for floor_attempts in samples:
+            attempts = np.array(floor_attempts).reshape(1, 2, 1)
+            aggregator.update(attempts, np.ones(1, dtype=np.int64), np.zeros((1, 3), dtype=np.int64))
+
+        count, mean, std, half_width = aggregator.attempt_statistics(0)
+        self.assertEqual(4, count)
+        np.testing.assert_allclose(np.mean(samples, axis=0), mean[1:])
+        np.testing.assert_allclose(np.std(samples, axis=0, ddof=1), std[1:])
+        np.testing.assert_allclose(1.96 * std[1:] / 2, half_width[1:])
+
+    def test_merged_partial_states_match_single_run(self):
+        random.seed(4)
+        whole = run_streaming_simulation(40, (0.5, 1.5), (40, 70), (1, 3), self.strategies)
+
+        random.seed(4)
+        first = run_streaming_simulation(15, (0.5, 1.5), (40, 70), (1, 3), self.strategies)
+        second = run_streaming_simulation(25, (0.5, 1.5), (40, 70), (1, 3), self.strategies)
+        merged = SimulationAggregator(100, 3).merge(first).merge(second)
+
+        self.assertEqual(whole.results(), merged.results())
+        for strategy_index in [None, 0, 1, 2]:
+            for whole_stat, merged_stat in zip(whole.attempt_statistics(strategy_index)[1:],
+                                               merged.attempt_statistics(strategy_index)[1:]):
+                np.testing.assert_allclose(whole_stat, merged_stat)
+
+    def test_resume_from_saved_state(self):
+        random.seed(8)
+        whole = run_streaming_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies)
+
+        random.seed(8)
+        partial = run_streaming_simulation(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies)
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_path = os.path.join(state_dir, 'state.npz')
+            partial.save(state_path)
+            resumed = run_streaming_simulation(20, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                               aggregator=SimulationAggregator.load(state_path))
+
+        self.assertEqual(whole.results(), resumed.results())
+        np.testing.assert_allclose(whole.attempts_m2, resumed.attempts_m2)
+
+    def test_per_strategy_results_match_single_strategy_runs(self):
+        combined = run_streaming_simulation(25, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=6)
+
+        for strategy_index, strategy in enumerate(self.strategies):
+            alone = run_streaming_simulation(25, (0.5, 1.5), (40, 70), (1, 3), [strategy], seed=6)
+            self.assertEqual(alone.results(), combined.results(strategy_index))
+            np.testing.assert_allclose(alone.attempt_statistics()[1], combined.attempt_statistics(strategy_index)[1])
+
+        # The combined view is the sum of the per-strategy counters
+        self.assertEqual(combined.strategy_attempts.sum(axis=0).tolist(), combined.attempts.tolist())
+        self.assertEqual(sum(combined.results(index)[50]['attempts'] for index in range(3)),
+                         combined.results()[50]['attempts'])
+
+    def test_result_arrays_match_results(self):
+        aggregator = run_streaming_simulation(40, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=8)
+
+        for strategy_index in [None, 1]:
+            simulation_results = aggregator.results(strategy_index)
+            result_arrays = aggregator.result_arrays(strategy_index)
+            for name in ['attempts', 'average_attempts', 'breaks', 'break_percentage']:
+                self.assertEqual([data[name] for data in simulation_results.values()], result_arrays[name].tolist())
+            most_efficient_floor, efficiency_score = find_most_efficient_floor_from_results(simulation_results)
+            self.assertEqual(efficiency_score, result_arrays['efficiency_score'][most_efficient_floor - 1])
+
+    def test_results_are_a_read_only_array_backed_mapping(self):
+        simulation_results = run_streaming_simulation(15, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                      seed=2).results()
+        plain_results = simulation_results.to_dict()
+
+        self.assertEqual(plain_results, simulation_results)
+        self.assertEqual(list(range(1, 101)), list(simulation_results))
+        self.assertEqual(100, len(simulation_results))
+        self.assertEqual(list(plain_results.items()), list(simulation_results.items()))
+        self.assertEqual(plain_results[42], simulation_results[np.int64(42)])
+        self.assertIs(int, type(simulation_results[42]['attempts']))
+        self.assertIs(float, type(simulation_results[42]['average_attempts']))
+        self.assertNotIn(0, simulation_results)
+        with self.assertRaises(KeyError):
+            simulation_results[101]
+        with self.assertRaises(KeyError):
+            simulation_results[42]['efficiency_score']
+
+        # Neither the floor views nor the dicts from bulk iteration can change the results
+        with self.assertRaises(TypeError):
+            simulation_results[42]['attempts'] = 0
+        for floor, data in simulation_results.items():
+            data['attempts'] = 0
+        self.assertEqual(plain_results, simulation_results)
+        with self.assertRaises(ValueError):
+            simulation_results.arrays['breaks'][0] = 1
+
+    def test_results_analysis(self):
+        simulation_results = run_streaming_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                      seed=4).results()
+        analysis = simulation_results.analysis()
+        self.assertIs(analysis, simulation_results.analysis())
+
+        # The cached analysis agrees with a plain scan of the same results as dicts
+        plain_results = simulation_results.to_dict()
+        scores = {floor: data['average_attempts'] / data['break_percentage'] if data['break_percentage'] else math.inf
+                  for floor, data in plain_results.items()}
+        self.assertEqual(scores, dict(zip(range(1, 101), analysis.arrays['efficiency_score'].tolist())))
+        self.assertEqual((analysis.most_efficient_floor, analysis.efficiency_score),
+                         find_most_efficient_floor_from_results(plain_results))
+        self.assertEqual((analysis.most_breaks_floor, analysis.most_breaks),
+                         find_floor_with_most_breaks(plain_results))
+        self.assertEqual(sorted(scores, key=lambda floor: (scores[floor], floor))[:7], analysis.top_floors(7).tolist())
+        self.assertEqual(sorted(plain_results, key=lambda floor: (-plain_results[floor]['breaks'], floor))[:3],
+                         analysis.top_floors(3, 'breaks', lowest=False).tolist())
+
+    def test_results_analysis_ties(self):
+        # Two floors share the lowest score and the most breaks, and a floor without breaks scores inf
+        analysis = run.analyze_results({
+            1: {'attempts': 10, 'breaks': 0, 'average_attempts': 10.0, 'break_percentage': 0},
+            2: {'attempts': 4, 'breaks': 5, 'average_attempts': 4.0, 'break_percentage': 20.0},
+            3: {'attempts': 2, 'breaks': 5, 'average_attempts': 2.0, 'break_percentage': 10.0},
+            4: {'attempts': 3, 'breaks': 1, 'average_attempts': 3.0, 'break_percentage': 5.0},
+        })
+
+        self.assertEqual((2, 0.2), (analysis.most_efficient_floor, analysis.efficiency_score))
+        self.assertEqual([2, 3], analysis.tied_efficient_floors.tolist())
+        self.assertEqual((2, 5), (analysis.most_breaks_floor, analysis.most_breaks))
+        self.assertEqual([2, 3], analysis.tied_most_breaks_floors.tolist())
+        self.assertEqual([2, 3, 4, 1], analysis.top_floors(10).tolist())
+        self.assertEqual([2, 3], analysis.top_floors(2).tolist())
+
+    def test_write_result_arrays(self):
+        result_arrays = run_streaming_simulation(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                 seed=8).result_arrays()
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            npz_path = run.write_result_arrays(result_arrays, os.path.join(output_dir, 'results.npz'))
+            with np.load(npz_path) as saved:
+                self.assertEqual(result_arrays['break_percentage'].tolist(), saved['break_percentage'].tolist())
+
+            # Small chunks so the streamed csv is written in several pieces
+            csv_path = run.write_result_arrays(result_arrays, os.path.join(output_dir, 'results.csv'), chunk_rows=7)
+            with open(csv_path) as csv_file:
+                rows = list(csv.DictReader(csv_file))
+            self.assertEqual(100, len(rows))
+            self.assertEqual(result_arrays['average_attempts'].tolist(),
+                             [float(row['average_attempts']) for row in rows])
+            self.assertEqual(result_arrays['attempts'].tolist(), [int(row['attempts']) for row in rows])
+
+            # Parquet needs pyarrow, and falls back to csv without it
+            parquet_path = run.write_result_arrays(result_arrays, os.path.join(output_dir, 'results.parquet'))
+            self.assertTrue(os.path.exists(parquet_path))
+            self.assertIn(os.path.splitext(parquet_path)[1], ['.parquet', '.csv'])
+
+
+class TestCheckpoints(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def setUp(self):
+        # Small blocks and batches so a short run spans several checkpoints
+        self.original_sizes = run.SEED_BLOCK_SIZE, run.BATCH_CELL_BUDGET
+        run.SEED_BLOCK_SIZE, run.BATCH_CELL_BUDGET = 7, 500
+
+    def tearDown(self):
+        run.SEED_BLOCK_SIZE, run.BATCH_CELL_BUDGET = self.original_sizes
+
+    def run_interrupted(self, checkpoint_path, seed):
+        # Stop the run right after its second checkpoint, as if the node had been preempted
+        original_save_checkpoint = run.save_checkpoint
+        saves = []
+
+        def preempted_save_checkpoint(*args):
+            original_save_checkpoint(*args)
+            saves.append(args)
+            if len(saves) == 2:
+                raise KeyboardInterrupt
+
+        run.save_checkpoint = preempted_save_checkpoint
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                run.run_checkpointed_simulation(40, (0.5, 1.5), (40, 70), (1, 3), self.strategies, checkpoint_path,
+                                                checkpoint_every=6, seed=seed)
+        finally:
+            run.save_checkpoint = original_save_checkpoint
+
+    def test_resumed_runs_match_uninterrupted_runs(self):
+        for seed in [None, 12]:
+            random.seed(3)
+            uninterrupted = run_streaming_simulation(40, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=seed)
+
+            with tempfile.TemporaryDirectory() as checkpoint_dir:
+                checkpoint_path = os.path.join(checkpoint_dir, 'run.ckpt')
+                random.seed(3)
+                self.run_interrupted(checkpoint_path, seed)
+                self.assertLess(SimulationAggregator.load(checkpoint_path).trials, 40)
+
+                # The checkpoint restores the random state, whatever happened to it in between
+                random.seed(99)
+                resumed = run.run_checkpointed_simulation(40, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                          checkpoint_path, checkpoint_every=6, seed=seed,
+                                                          resume=True)
+
+            self.assertEqual(40, resumed.trials)
+            self.assertEqual(uninterrupted.results(), resumed.results())
+            self.assertEqual(uninterrupted.attempts_m2.tolist(), resumed.attempts_m2.tolist())
+
+    def test_resume_rejects_a_different_run(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            checkpoint_path = os.path.join(checkpoint_dir, 'run.ckpt')
+            run.run_checkpointed_simulation(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies, checkpoint_path,
+                                            seed=1)
+            with self.assertRaises(ValueError):
+                run.run_checkpointed_simulation(10, (0.5, 1.5), (40, 80), (1, 3), self.strategies, checkpoint_path,
+                                                seed=1, resume=True)
+            # Another explicit seed would draw other trials, so it is a different run too
+            with self.assertRaises(ValueError):
+                run.run_checkpointed_simulation(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies, checkpoint_path,
+                                                seed=2, resume=True)
+            self.assertEqual([], [name for name in os.listdir(checkpoint_dir) if name.endswith('.tmp')])
+
+
+class TestExactMode(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def test_degenerate_ranges_match_simulation_exactly(self):
+        for ranges in [((1, 1), (31, 31), (1, 1)), ((0.91, 0.91), (4, 4), (1, 1)), ((1, 1), (1000, 1000), (2, 2))]:
+            exact = run.run_exact_simulation(3, *ranges, self.strategies)
+            simulated = run_streaming_simulation(3, *ranges, self.strategies, seed=0)
+
+            self.assertEqual(simulated.results(), exact.results())
+            self.assertEqual(simulated.results(1), exact.results(1))
+
+    def test_breaking_floor_distribution_matches_sampling(self):
+        for ranges in [((0.5, 1.5), (40, 70), (1, 3)), ((1, 1), (20, 30), (0, 2)), ((0.5, 1.5), (25, 25), (1, 3))]:
+            probabilities = run.breaking_floor_distribution(20, *ranges)
+            simulated = run_streaming_simulation(20000, *ranges, [linear_search_simulation_with_flag],
+                                                 num_floors=20, seed=1)
+            sampled = simulated.breaks / (simulated.trials * 20)
+            sampled[0] = 1 - sampled[1:].sum()
+
+            self.assertAlmostEqual(1, probabilities.sum())
+            self.assertLess(np.abs(probabilities - sampled).max(), 0.01)
+
+            exact = run.run_exact_simulation(20000, *ranges, [linear_search_simulation_with_flag], num_floors=20)
+            self.assertTrue(np.allclose(simulated.attempts_mean, exact.attempts_mean, rtol=0.05, atol=0.05))
+
+    def test_cli_rejects_strategies_exact_mode_cannot_count(self):
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        completed = subprocess.run([sys.executable, 'run.py', '--exact', '--num_floors', '1000', '--strategies',
+                                    'binary_search', 'galloping', '--no-plot'],
+                                   cwd=repo_root, capture_output=True, text=True, timeout=60)
+        self.assertEqual(2, completed.returncode)
+        self.assertIn("galloping_search_strategy can't", completed.stderr)
+        self.assertNotIn("Traceback", completed.stderr)
+
+    def test_high_floors_match_the_grid(self):
+        for ranges in [((0.5, 1.5), (40, 70), (1, 3)), ((0.1, 1.5), (40, 70), (0.1, 0.5)),
+                       ((0.5, 1.5), (25, 25), (1, 3))]:
+            probabilities = run.breaking_floor_distribution(60, *ranges)
+            # Building every floor's distribution on the grid is the slow reference
+            original_grid_floors, run.EXACT_GRID_FLOORS = run.EXACT_GRID_FLOORS, 60
+            try:
+                reference = run.breaking_floor_distribution(60, *ranges)
+            finally:
+                run.EXACT_GRID_FLOORS = original_grid_floors
+
+            self.assertLess(np.abs(probabilities - reference).max(), 1e-4)
+
+    def test_large_buildings_are_computed_quickly(self):
+        # Light balls and short floors leave the plate's fate uncertain on nearly every floor
+        start = time.perf_counter()
+        probabilities = run.breaking_floor_distribution(1000, (0.1, 1.5), (40, 70), (0.1, 0.5))
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertAlmostEqual(1, probabilities.sum())
+
+    def test_large_buildings_skip_attempt_tables(self):
+        original_max_floors, run.ATTEMPT_TABLE_MAX_FLOORS = run.ATTEMPT_TABLE_MAX_FLOORS, 10
+        try:
+            banded = run.run_exact_simulation(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies, num_floors=40)
+        finally:
+            run.ATTEMPT_TABLE_MAX_FLOORS = original_max_floors
+        tabulated = run.run_exact_simulation(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies, num_floors=40)
+
+        self.assertTrue(np.allclose(banded.attempts_mean, tabulated.attempts_mean))
+        self.assertTrue(np.allclose(banded.attempts_m2, tabulated.attempts_m2))
+
+    def test_exact_mode_rejects_unsupported_simulations(self):
+        with self.assertRaises(ValueError):
+            run.run_exact_simulation(10, (0.5, 1.5), (40, 70), (1, 3), [lambda *args: (1, False, None)])
+        with self.assertRaises(ValueError):
+            run.run_exact_simulation(10, (0, 1.5), (40, 70), (1, 3), self.strategies)
+
+
+class TestParameterSweep(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def test_sweep_grid(self):
+        self.assertEqual(4, len(run.sweep_grid([(0.5, 1.5), (1, 2)], [(40, 70)], [(1, 3), (2, 2)])))
+        self.assertEqual([((0.5, 1.5), (40, 70), (1, 3)), ((1, 2), (40, 70), (2, 2))],
+                         run.sweep_grid([(0.5, 1.5), (1, 2)], [(40, 70)], [(1, 3), (2, 2)], zipped=True))
+        with self.assertRaises(ValueError):
+            run.sweep_grid([(0.5, 1.5), (1, 2)], [(40, 70), (30, 50), (20, 30)], [(1, 3)], zipped=True)
+
+    def test_sweep_matches_single_runs_for_any_worker_count(self):
+        grid = run.sweep_grid([(0.5, 1.5), (1, 2)], [(40, 70), (20, 30)], [(1, 3)])
+        sweep = run.run_parameter_sweep(200, grid, self.strategies, num_floors=30, seed=5)
+        parallel_sweep = run.run_parameter_sweep(200, grid, self.strategies, num_floors=30, workers=2, seed=5)
+
+        for name, values in sweep.items():
+            self.assertEqual(values.tolist(), parallel_sweep[name].tolist())
+
+        for point, (ball_weight_range, plate_strength_range, floor_height_range) in enumerate(grid):
+            simulation_results = run_simulation_with_adjusted_parameters(200, ball_weight_range, plate_strength_range,
+                                                                         floor_height_range, self.strategies,
+                                                                         num_floors=30, seed=5)
+            self.assertEqual(find_most_efficient_floor_from_results(simulation_results),
+                             (sweep['most_efficient_floor'][point], sweep['efficiency_score'][point]))
+            self.assertEqual(find_floor_with_most_breaks(simulation_results),
+                             (sweep['most_breaks_floor'][point], sweep['most_breaks'][point]))
+            self.assertEqual([data['average_attempts'] for data in simulation_results.values()],
+                             sweep['average_attempts'][point].tolist())
+
+    def test_sweep_output_files(self):
+        grid = run.sweep_grid([(0.5, 1.5)], [(40, 70), (20, 30)], [(1, 3)])
+        sweep = run.run_parameter_sweep(20, grid, self.strategies, num_floors=10, seed=1, exact=True)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            run.save_sweep_results(sweep, os.path.join(output_dir, 'sweep.npz'))
+            with np.load(os.path.join(output_dir, 'sweep.npz')) as saved:
+                self.assertEqual(sweep['breaks'].tolist(), saved['breaks'].tolist())
+
+            run.save_sweep_results(sweep, os.path.join(output_dir, 'sweep.csv'))
+            with open(os.path.join(output_dir, 'sweep.csv')) as csv_file:
+                rows = csv_file.read().splitlines()
+            self.assertEqual(1 + 2 * 10, len(rows))
+            self.assertTrue(rows[0].startswith('ball_weight_min,ball_weight_max,'))
+
+
+class TestAdaptiveSimulation(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def test_efficiency_scores_match_results(self):
+        aggregator = run_streaming_simulation(50, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=3)
+        scores, half_widths = efficiency_confidence_intervals(aggregator)
+
+        most_efficient_floor, efficiency_score = find_most_efficient_floor_from_results(aggregator.results())
+        self.assertEqual(most_efficient_floor, int(np.argmin(scores)))
+        self.assertAlmostEqual(efficiency_score, scores[most_efficient_floor])
+        self.assertTrue(0 < half_widths[most_efficient_floor] < np.inf)
+
+    def test_deterministic_trials_converge_after_one_batch(self):
+        aggregator, converged = run_adaptive_simulation(1000, (1, 1), (31, 31), (1, 1), self.strategies,
+                                                        batch_size=10)
+        self.assertTrue(converged)
+        self.assertEqual(10, aggregator.trials)
+
+    def test_stops_at_max_iterations_without_convergence(self):
+        aggregator, converged = run_adaptive_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                        batch_size=10, target_relative_error=0, seed=1)
+        self.assertFalse(converged)
+        self.assertEqual(30, aggregator.trials)
+
+        # Batches of a seeded adaptive run draw the same trials as one plain run
+        self.assertEqual(run_simulation_with_adjusted_parameters(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                                 seed=1),
+                         aggregator.results())
+
+
+class TestParallelRunner(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def setUp(self):
+        # Small blocks so a short run is split into several independently seeded streams
+        self.original_block_size = run.SEED_BLOCK_SIZE
+        run.SEED_BLOCK_SIZE = 7
+
+    def tearDown(self):
+        run.SEED_BLOCK_SIZE = self.original_block_size
+
+    def test_seeded_results_identical_for_any_worker_count(self):
+        expected = run_simulation_with_adjusted_parameters(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                           workers=1, seed=1234)
+        for workers in [2, 3]:
+            self.assertEqual(expected, run_simulation_with_adjusted_parameters(30, (0.5, 1.5), (40, 70), (1, 3),
+                                                                               self.strategies, workers=workers,
+                                                                               seed=1234))
+
+    def test_seeded_run_continued_in_several_calls_matches_single_call(self):
+        whole = run_streaming_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=77)
+
+        continued = run_streaming_simulation(4, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=77)
+        for num_iterations in [9, 1, 16]:
+            run_streaming_simulation(num_iterations, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=77,
+                                     workers=2, aggregator=continued)
+
+        self.assertEqual(whole.results(), continued.results())
+
+    def test_seeded_results_ignore_global_random_state(self):
+        random.seed(1)
+        first = run_simulation_with_adjusted_parameters(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=99)
+        random.seed(2)
+        second = run_simulation_with_adjusted_parameters(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=99)
+        self.assertEqual(first, second)
+
+    def test_seeded_scalar_engine_matches_vectorized_engine(self):
+        scalar_roster = [lambda *args, strategy=strategy: strategy(*args) for strategy in self.strategies]
+        self.assertEqual(
+            run_simulation_with_adjusted_parameters(10, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=5),
+            run_simulation_with_adjusted_parameters(10, (0.5, 1.5), (40, 70), (1, 3), scalar_roster, seed=5))
+
+    def test_any_trial_can_be_generated_on_its_own(self):
+        uniforms = run.seeded_trial_uniforms(21, 0, 30)
+        self.assertEqual(uniforms[5:25].tolist(), run.seeded_trial_uniforms(21, 5, 20).tolist())
+        self.assertEqual((0, 102), run.seeded_trial_uniforms(21, 3, 0).shape)
+
+        # The trial is the one the seeded simulation runs, even when it is not the first of its block
+        before = run_streaming_simulation(9, (0.5, 1.5), (10, 30), (1, 3), self.strategies, seed=21)
+        after = run_streaming_simulation(10, (0.5, 1.5), (10, 30), (1, 3), self.strategies, seed=21)
+        floor_heights, ball_weight, plate_strength = run.seeded_trial(21, 9, (0.5, 1.5), (10, 30), (1, 3))
+        breaking_floor = Building(floor_heights).oracle(ball_weight, plate_strength).breaking_floor
+        trial_breaks = after.result_arrays()['breaks'] - before.result_arrays()['breaks']
+        self.assertEqual({breaking_floor: 3 * 100}, {floor + 1: breaks for floor, breaks in enumerate(trial_breaks)
+                                                     if breaks})
+
+
+class TestCommonRandomNumbers(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def setUp(self):
+        # Small blocks so a short run is split into several blocks of the trial set
+        self.original_block_size = run.SEED_BLOCK_SIZE
+        run.SEED_BLOCK_SIZE = 7
+        self.trial_set_dir = tempfile.TemporaryDirectory()
+        self.trial_set = os.path.join(self.trial_set_dir.name, 'trials.npy')
+
+    def tearDown(self):
+        run.SEED_BLOCK_SIZE = self.original_block_size
+        self.trial_set_dir.cleanup()
+
+    def test_trial_sets_replay_the_seeded_trials(self):
+        trials = run.create_trial_set(self.trial_set, 30, seed=12)
+        self.assertIsInstance(trials, np.memmap)
+        self.assertEqual(run.seeded_trial_uniforms(12, 0, 30).tolist(), trials.tolist())
+
+        seeded = run_streaming_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=12)
+        for workers in [1, 3]:
+            replayed = run_streaming_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies, workers=workers,
+                                                trial_set=self.trial_set)
+            self.assertEqual(seeded.results(), replayed.results())
+
+        # Scalar and chunked runs replay the same trials
+        scalar_roster = [lambda *args, strategy=strategy: strategy(*args) for strategy in self.strategies]
+        self.assertEqual(seeded.results(), run_streaming_simulation(30, (0.5, 1.5), (40, 70), (1, 3), scalar_roster,
+                                                                    trial_set=self.trial_set).results())
+        chunked = run.run_chunked_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies, lambda aggregator: None,
+                                             chunk_iterations=1, trial_set=self.trial_set)
+        self.assertEqual(seeded.results(), chunked.results())
+
+    def test_trial_sets_must_fit_the_run(self):
+        run.create_trial_set(self.trial_set, 10, seed=1)
+        with self.assertRaises(ValueError):
+            run_streaming_simulation(11, (0.5, 1.5), (40, 70), (1, 3), self.strategies, trial_set=self.trial_set)
+        with self.assertRaises(ValueError):
+            run_streaming_simulation(5, (0.5, 1.5), (40, 70), (1, 3), self.strategies, num_floors=50,
+                                     trial_set=self.trial_set)
+
+    def test_paired_differences_match_per_trial_differences(self):
+        trials = run.create_trial_set(self.trial_set, 40, seed=3)
+        ranges = ((0.5, 1.5), (20, 70), (1, 3))
+        aggregator = run_streaming_simulation(40, *ranges, self.strategies, workers=2, trial_set=self.trial_set)
+
+        breaking_floors = run.breaking_floors_for_trials(run.scale_uniform(trials[:, :100], ranges[2]),
+                                                         run.scale_uniform(trials[:, 100], ranges[0]),
+                                                         run.scale_uniform(trials[:, 101], ranges[1]))
+        baseline_attempts = run.attempt_table(self.strategies[0], 100)[:, breaking_floors]
+        for strategy_index, strategy in enumerate(self.strategies):
+            differences = run.attempt_table(strategy, 100)[:, breaking_floors] - baseline_attempts
+            mean, std, half_width = aggregator.paired_difference_statistics(strategy_index)
+            np.testing.assert_allclose(differences.mean(axis=1), mean[1:], atol=1e-9)
+            np.testing.assert_allclose(differences.std(axis=1, ddof=1), std[1:], atol=1e-9)
+            np.testing.assert_allclose(1.96 * std / math.sqrt(40), half_width)
+
+        # Pairing removes the noise both strategies share, so the comparison is much tighter than unpaired
+        _, _, _, binary_half_width = aggregator.attempt_statistics(2)
+        _, _, _, linear_half_width = aggregator.attempt_statistics(0)
+        _, _, paired_half_width = aggregator.paired_difference_statistics(2)
+        self.assertTrue(np.all(paired_half_width[1:] < np.hypot(binary_half_width, linear_half_width)[1:]))
+
+    def test_paired_differences_survive_saving(self):
+        aggregator = run_streaming_simulation(20, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=2)
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_path = os.path.join(state_dir, 'state.npz')
+            aggregator.save(state_path)
+            loaded = SimulationAggregator.load(state_path)
+        for statistic, loaded_statistic in zip(aggregator.paired_difference_statistics(1),
+                                               loaded.paired_difference_statistics(1)):
+            self.assertEqual(statistic.tolist(), loaded_statistic.tolist())
+
+    def test_exact_paired_differences(self):
+        ranges = ((1, 1), (31, 31), (1, 1))
+        exact = run.run_exact_simulation(3, *ranges, self.strategies)
+        simulated = run_streaming_simulation(3, *ranges, self.strategies, seed=0)
+        for strategy_index in range(3):
+            exact_mean, _, exact_half_width = exact.paired_difference_statistics(strategy_index)
+            simulated_mean, _, _ = simulated.paired_difference_statistics(strategy_index)
+            self.assertEqual(simulated_mean.tolist(), exact_mean.tolist())
+            self.assertFalse(exact_half_width.any())
+
+
+class TestProbeTracing(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def test_trace_records_every_probe(self):
+        untraced_results = run_simulation_with_adjusted_parameters(2, (0.5, 1.5), (4, 20), (1, 3), self.strategies,
+                                                                   seed=11)
+
+        with tempfile.TemporaryDirectory() as trace_dir:
+            trace_path = os.path.join(trace_dir, 'trace.jsonl')
+            enable_tracing(trace_path)
+            try:
+                traced_results = run_simulation_with_adjusted_parameters(2, (0.5, 1.5), (4, 20), (1, 3),
+                                                                         self.strategies, seed=11)
+            finally:
+                disable_tracing()
+
+            with open(trace_path) as trace_file:
+                events = [json.loads(line) for line in trace_file]
+
+        # Tracing must not change the results, and there is one event per counted attempt
+        self.assertEqual(untraced_results, traced_results)
+        self.assertEqual(sum(data['attempts'] for data in traced_results.values()), len(events))
+        self.assertEqual({0, 1}, {event['trial'] for event in events})
+        self.assertEqual({'binary_search', 'linear_search', 'precise_halving'}, {event['strategy'] for event in events})
+        self.assertEqual({'strategy', 'trial', 'start_floor', 'floor', 'force', 'outcome'}, set(events[0]))
+
+
+class TestHeadlessMode(unittest.TestCase):
+
+    def test_import_does_not_load_matplotlib(self):
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        loaded = subprocess.run([sys.executable, '-c', 'import sys, run; print("matplotlib" in sys.modules)'],
+                                cwd=repo_root, capture_output=True, text=True, check=True)
+        self.assertEqual('False', loaded.stdout.strip())
+
+    def test_plot_renders_to_file(self):
+        simulation_results = run_simulation_with_adjusted_parameters(1, (1, 1), (31, 31), (1, 1),
+                                                                     [binary_search_strategy])
+        most_efficient_floor, efficiency_score = find_most_efficient_floor_from_results(simulation_results)
+
+        with tempfile.TemporaryDirectory() as plot_dir:
+            for output in ['png', 'svg']:
+                plot_path = os.path.join(plot_dir, f'results.{output}')
+                plot_simulation_results(simulation_results, 1, 31, 1, most_efficient_floor, efficiency_score, 1,
+                                        output=output, output_path=plot_path)
+                self.assertGreater(os.path.getsize(plot_path), 0)
+
+    def test_bin_floor_series(self):
+        floors = np.arange(1, 8)
+        values = np.array([1, 5, np.inf, 2, np.inf, np.inf, np.inf])
+        centres, minima, maxima, means = run.bin_floor_series(floors, values, 3)
+        self.assertEqual([1.5, 3.5, 6.0], centres.tolist())
+        self.assertEqual([1, 2], minima[:2].tolist())
+        self.assertEqual([5, 2], maxima[:2].tolist())
+        self.assertEqual([3, 2], means[:2].tolist())
+        self.assertTrue(np.isnan([minima[2], maxima[2], means[2]]).all())
+        self.assertEqual(values[:2].tolist(), run.bin_floor_series(floors[:2], values[:2], 3)[3].tolist())
+
+    def test_large_buildings_plot_binned_envelopes(self):
+        num_floors = run.PLOT_MAX_POINTS * 20
+        aggregator = run.run_exact_simulation(10, (0.5, 1.5), (40, 70), (1, 3), [binary_search_strategy],
+                                              num_floors=num_floors)
+        simulation_results = aggregator.results()
+        most_efficient_floor, efficiency_score = find_most_efficient_floor_from_results(simulation_results)
+
+        with tempfile.TemporaryDirectory() as plot_dir:
+            plot_path = os.path.join(plot_dir, 'results.svg')
+            plot_simulation_results(simulation_results, 1, 55, 2, most_efficient_floor, efficiency_score, 10,
+                                    output='svg', output_path=plot_path)
+            # A marker or bar per floor would write tens of megabytes of svg
+            self.assertLess(os.path.getsize(plot_path), 2 * 10 ** 6)
+
+
+class TestStrategyRegistry(unittest.TestCase):
+
+    def test_registered_strategies_find_the_breaking_floor(self):
+        building = Building([random.uniform(1, 3) for _ in range(60)])
+        for plate_strength in [5, 20, 40]:
+            true_breaking_floor = building.oracle(1, plate_strength).breaking_floor
+            for name, strategy in run.STRATEGIES.items():
+                if name in run.DEFAULT_STRATEGIES:
+                    continue
+                for start_floor in range(1, 61):
+                    attempts, did_break, breaking_floor = strategy(building, 1, plate_strength, start_floor)
+                    self.assertTrue(did_break)
+                    self.assertEqual(true_breaking_floor, breaking_floor, (name, start_floor))
+
+    def test_replayed_probe_searches_match_vectorized_counters(self):
+        start_floors = np.arange(1, 41)[:, None]
+        breaking_floors = np.arange(41)[None, :]
+        for name in run.DEFAULT_STRATEGIES:
+            strategy = run.STRATEGIES[name]
+            replayed = run.probe_search_attempts(run.PROBE_SEARCHES[strategy], start_floors, breaking_floors, 40)
+            vectorized = run.VECTORIZED_STRATEGY_ATTEMPTS[strategy](start_floors, breaking_floors, 40)
+            self.assertEqual(vectorized.tolist(), replayed.tolist(), name)
+
+    def test_tabulated_strategies_match_scalar_runs(self):
+        strategies = [run.STRATEGIES['galloping'], run.STRATEGIES['interpolation']]
+        self.assertIs(_run_vectorized_trials, run.select_trial_runner(strategies, (1, 3), 50))
+        scalar_roster = [lambda *args, strategy=strategy: strategy(*args) for strategy in strategies]
+        self.assertEqual(run_simulation_with_adjusted_parameters(10, (0.5, 1.5), (10, 40), (1, 3), strategies,
+                                                                 num_floors=50, seed=4),
+                         run_simulation_with_adjusted_parameters(10, (0.5, 1.5), (10, 40), (1, 3), scalar_roster,
+                                                                 num_floors=50, seed=4))
+
+    def test_large_buildings_run_probe_strategies_on_the_scalar_engine(self):
+        strategies = [run.STRATEGIES['galloping']]
+        self.assertIs(_run_scalar_trials,
+                      run.select_trial_runner(strategies, (1, 3), run.PROBE_TABLE_MAX_FLOORS + 1))
+        self.assertIs(_run_vectorized_trials,
+                      run.select_trial_runner([binary_search_strategy], (1, 3), run.PROBE_TABLE_MAX_FLOORS + 1))
+
+
+class TestOptimalDropStrategy(unittest.TestCase):
+
+    def test_drop_table_is_cached(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            original_cache_dir, run.ATTEMPT_TABLE_CACHE_DIR = run.ATTEMPT_TABLE_CACHE_DIR, cache_dir
+            try:
+                table = run.optimal_drop_table(3, 100)
+                self.assertEqual((4, 15), table.shape)
+                # Two plates search d (d + 1) / 2 floors with d drops, three plates d (d^2 + 5) / 6
+                self.assertEqual([min(d * (d + 1) // 2, 101) for d in range(15)], table[2].tolist())
+                self.assertEqual([min(d * (d * d + 5) // 6, 101) for d in range(15)], table[3].tolist())
+                self.assertFalse(table.flags.writeable)
+
+                self.assertIs(table, run.optimal_drop_table(3, 100))
+                file_name = run._cache_file_name('optimal_drops_3_100', run.optimal_drop_table)
+                cached = np.load(os.path.join(cache_dir, file_name))
+                self.assertEqual(table.tolist(), cached.tolist())
+
+                # A table cached by different code is discarded rather than loaded
+                os.remove(os.path.join(cache_dir, file_name))
+                np.save(os.path.join(cache_dir, file_name.replace(file_name.split('.')[1], '0' * 10)), 0 * table)
+                run._drop_tables.pop((3, 100))
+                self.assertEqual(table.tolist(), run.optimal_drop_table(3, 100).tolist())
+                self.assertEqual([file_name], os.listdir(cache_dir))
+            finally:
+                run.ATTEMPT_TABLE_CACHE_DIR = original_cache_dir
+                run._drop_tables.pop((3, 100), None)
+
+    def test_worst_case_drops(self):
+        start_floors = np.arange(1, 101)[:, None]
+        breaking_floors = np.arange(101)[None, :]
+        for strategy, first_drop, worst_case in [(run.optimal_two_ball_strategy, 14, 14),
+                                                 (run.optimal_three_ball_strategy, 37, 9)]:
+            attempts = strategy.attempts(start_floors, breaking_floors, 100)
+            self.assertEqual(worst_case, attempts.max(axis=1).min())
+            self.assertEqual(worst_case, attempts[first_drop - 1].max())
+            replayed = run.probe_search_attempts(strategy.probes, start_floors, breaking_floors, 100)
+            self.assertEqual(replayed.tolist(), attempts.tolist())
+
+    def test_attempt_tables_follow_the_drop_table_code(self):
+        table_name = run._attempt_table_file_name(run.optimal_two_ball_strategy, 5)
+        original_drop_table, run.optimal_drop_table = run.optimal_drop_table, run._optimal_drop_rows
+        try:
+            self.assertNotEqual(table_name, run._attempt_table_file_name(run.optimal_two_ball_strategy, 5))
+        finally:
+            run.optimal_drop_table = original_drop_table
+
+    def test_strategies_can_be_sent_to_workers(self):
+        self.assertEqual(run.OptimalDropStrategy(2), pickle.loads(pickle.dumps(run.optimal_two_ball_strategy)))
+        self.assertIs(run.optimal_two_ball_strategy, run.STRATEGIES['optimal_2_balls'])
+        strategies = [run.optimal_two_ball_strategy, run.optimal_three_ball_strategy]
+        self.assertEqual(run_simulation_with_adjusted_parameters(12, (0.5, 1.5), (10, 40), (1, 3), strategies,
+                                                                 seed=2),
+                         run_simulation_with_adjusted_parameters(12, (0.5, 1.5), (10, 40), (1, 3), strategies,
+                                                                 seed=2, workers=2))
+
+
+class TestPriorSearchStrategy(unittest.TestCase):
+    parameters = ((0.5, 1.5), (40, 70), (1, 3))
+
+    def test_decision_tree_is_optimal_and_cached(self):
+        num_floors = 9
+        with tempfile.TemporaryDirectory() as cache_dir:
+            original_cache_dir, run.ATTEMPT_TABLE_CACHE_DIR = run.ATTEMPT_TABLE_CACHE_DIR, cache_dir
+            try:
+                weights = run.prior_cumulative_weights(num_floors, *self.parameters)
+                table = run.prior_search_table(num_floors, *self.parameters)
+
+                def tree_cost(low, high):
+                    if high - low <= 1:
+                        return 0
+                    floor = table[low, high]
+                    self.assertTrue(low < floor < high)
+                    return weights[high] - weights[low] + tree_cost(low, floor) + tree_cost(floor, high)
+
+                def optimal_cost(low, high):
+                    if high - low <= 1:
+                        return 0
+                    return weights[high] - weights[low] + min(optimal_cost(low, floor) + optimal_cost(floor, high)
+                                                              for floor in range(low + 1, high))
+
+                for low in range(num_floors):
+                    for high in range(low + 1, num_floors + 1):
+                        self.assertAlmostEqual(optimal_cost(low, high), tree_cost(low, high), places=12)
+
+                self.assertIs(table, run.prior_search_table(num_floors, *self.parameters))
+                digest = run._parameter_digest(*self.parameters)
+                cached_names = os.listdir(cache_dir)
+                self.assertEqual(1, len(cached_names))
+                self.assertTrue(cached_names[0].startswith(f'prior_search_tree_{digest}_{num_floors}.'))
+                cached = np.load(os.path.join(cache_dir, cached_names[0]))
+                self.assertEqual(table.tolist(), cached.tolist())
+            finally:
+                run.ATTEMPT_TABLE_CACHE_DIR = original_cache_dir
+                run._prior_tables.pop((num_floors,) + self.parameters, None)
+
+    def test_ranges_without_a_prior_are_rejected(self):
+        with self.assertRaises(ValueError) as raised:
+            run.build_strategies(['prior_search'], (0, 1.5), (40, 70), (1, 3))
+        self.assertNotIn("Exact mode", str(raised.exception))
+
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for options in [['--ball_weight_min', '0', '--strategies', 'prior_search'],
+                        ['--ball_weight_min', '0', '--exact'],
+                        ['--strategies', 'prior_search', '--seed', '1', 'sweep', '--ball_weight_ranges', '0.5:1.5',
+                         '0:1']]:
+            completed = subprocess.run([sys.executable, 'run.py', '--no-plot'] + options, cwd=repo_root,
+                                       capture_output=True, text=True, timeout=60)
+            self.assertEqual(2, completed.returncode)
+            self.assertIn("needs positive ball weights", completed.stderr)
+            self.assertNotIn("Traceback", completed.stderr)
+
+    def test_cache_names_cover_the_prior_settings(self):
+        digest = run._parameter_digest(*self.parameters)
+        for setting, value in [('PRIOR_SMOOTHING', 1e-3), ('EXACT_GRID_STEPS', 64), ('EXACT_GRID_FLOORS', 8),
+                               ('ATTEMPT_TABLE_VERSION', -1)]:
+            original_value = getattr(run, setting)
+            setattr(run, setting, value)
+            try:
+                self.assertNotEqual(digest, run._parameter_digest(*self.parameters))
+                self.assertNotEqual(run.PriorSearchStrategy(*self.parameters).__name__,
+                                    f'prior_search_strategy_{digest}')
+            finally:
+                setattr(run, setting, original_value)
+
+    def test_vectorized_counter_matches_probe_search(self):
+        strategy = run.PriorSearchStrategy(*self.parameters)
+        start_floors = np.arange(1, 61)[:, None]
+        breaking_floors = np.arange(61)[None, :]
+        original_max_floors = run.PRIOR_TREE_MAX_FLOORS
+        try:
+            # Both the decision tree and the bisection of the probability mass used for larger buildings
+            for run.PRIOR_TREE_MAX_FLOORS in [original_max_floors, 59]:
+                self.assertEqual(run.probe_search_attempts(strategy.probes, start_floors, breaking_floors, 60).tolist(),
+                                 strategy.attempts(start_floors, breaking_floors, 60).tolist())
+        finally:
+            run.PRIOR_TREE_MAX_FLOORS = original_max_floors
+
+    def test_fewer_expected_attempts_than_uninformed_strategies(self):
+        probabilities = run.breaking_floor_distribution(100, *self.parameters)
+        prior_mean, _ = run.expected_attempt_moments(run.PriorSearchStrategy(*self.parameters), probabilities, 100)
+        building = Building([random.uniform(1, 3) for _ in range(100)])
+        for plate_strength in [5, 20, 40, 60]:
+            true_breaking_floor = building.oracle(1, plate_strength).breaking_floor
+            for start_floor in range(1, 101):
+                self.assertEqual(true_breaking_floor,
+                                 run.PriorSearchStrategy(*self.parameters)(building, 1, plate_strength,
+                                                                           start_floor)[2])
+        for name in ['binary_search', 'interpolation']:
+            mean, _ = run.expected_attempt_moments(run.STRATEGIES[name], probabilities, 100)
+            self.assertLess(prior_mean.min(), mean.min(), name)
+
+    def test_strategies_are_built_for_the_simulated_ranges(self):
+        strategies = run.build_strategies(['binary_search', 'prior_search'], *self.parameters)
+        self.assertIs(binary_search_strategy, strategies[0])
+        self.assertEqual(run.PriorSearchStrategy(*self.parameters), pickle.loads(pickle.dumps(strategies[1])))
+        self.assertNotEqual(strategies[1].__name__, strategies[1].for_parameters((1, 2), (40, 70), (1, 3)).__name__)
+        self.assertIs(_run_vectorized_trials, run.select_trial_runner(strategies, (1, 3), 100))
+
+        # Every sweep point searches with its own prior
+        grid = [self.parameters, ((1, 2), (20, 30), (1, 3))]
+        sweep = run.run_parameter_sweep(10, grid, strategies[1:], seed=6)
+        for point, parameters in enumerate(grid):
+            single = run.run_streaming_simulation(10, *parameters, [run.PriorSearchStrategy(*parameters)], seed=6)
+            self.assertEqual(single.result_arrays()['average_attempts'].tolist(),
+                             sweep['average_attempts'][point].tolist())
+
+
+class TestLivePlot(unittest.TestCase):
+    strategies = [linear_search_simulation_with_flag, precise_halving_strategy_simulation_with_flag,
+                  binary_search_strategy]
+
+    def test_chunked_runs_match_single_runs(self):
+        for seed in [None, 5]:
+            random.seed(8)
+            single = run_streaming_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=seed)
+            random.seed(8)
+            chunk_trials = []
+            chunked = run.run_chunked_simulation(30, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                 lambda aggregator: chunk_trials.append(aggregator.trials),
+                                                 chunk_iterations=1, seed=seed)
+            self.assertEqual(single.results(), chunked.results())
+            self.assertEqual(30, chunk_trials[-1])
+
+    def test_live_plot_shows_the_final_state(self):
+        with tempfile.TemporaryDirectory() as plot_dir:
+            plot_path = os.path.join(plot_dir, 'live.png')
+            live_plot = run.LivePlot(100, 1, 55, 2, output='png', output_path=plot_path)
+
+            def simulate(progress_callback):
+                return run.run_chunked_simulation(20, (0.5, 1.5), (40, 70), (1, 3), self.strategies,
+                                                  progress_callback, chunk_iterations=1, seed=3)
+
+            aggregator = run.run_with_live_plot(live_plot, simulate, refresh_interval=0.01)
+            result_arrays = aggregator.result_arrays()
+            self.assertEqual(20, live_plot.trials)
+            self.assertEqual(result_arrays['average_attempts'].tolist(),
+                             live_plot.average_attempts_line.get_ydata().tolist())
+            self.assertEqual(result_arrays['breaks'].tolist(), [bar.get_height() for bar in live_plot.breaks_bars])
+
+            live_plot.finish()
+            self.assertGreater(os.path.getsize(plot_path), 0)
+
+    def test_live_runs_spawn_their_workers(self):
+        self.assertEqual(multiprocessing.get_context(), run._worker_context())
+
+        def simulate(progress_callback):
+            self.assertEqual('spawn', run._worker_context().get_start_method())
+            return run.run_chunked_simulation(25, (0.5, 1.5), (40, 70), (1, 3), self.strategies, progress_callback,
+                                              chunk_iterations=15, workers=2, seed=3)
+
+        original_block_size, run.SEED_BLOCK_SIZE = run.SEED_BLOCK_SIZE, 5
+        try:
+            single = run_streaming_simulation(25, (0.5, 1.5), (40, 70), (1, 3), self.strategies, seed=3)
+            live = run.run_with_live_plot(run.LivePlot(100, 1, 55, 2, output='png'), simulate, refresh_interval=0.01)
+        finally:
+            run.SEED_BLOCK_SIZE = original_block_size
+        self.assertEqual(single.results(), live.results())
+
+    def test_live_mode_with_workers(self):
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with tempfile.TemporaryDirectory() as output_dir:
+            results = {}
+            # Each live update runs two blocks of trials, so the workers start while the plot is up
+            for mode, options in [('single', []), ('live', ['--live', '--live_every', '20000', '--workers', '2'])]:
+                results_path = os.path.join(output_dir, f'{mode}.npz')
+                subprocess.run([sys.executable, 'run.py', '--num_iterations', '20000', '--num_floors', '50', '--seed',
+                                '1', '--output', 'png', '--plot_file', os.path.join(output_dir, f'{mode}.png'),
+                                '--results-out', results_path] + options,
+                               cwd=repo_root, capture_output=True, check=True, timeout=300)
+                with np.load(results_path) as result_arrays:
+                    results[mode] = {name: result_arrays[name].tolist() for name in result_arrays.files}
+
+            self.assertGreater(os.path.getsize(os.path.join(output_dir, 'live.png')), 0)
+            self.assertEqual(results['single'], results['live'])
+
+    def test_simulation_errors_reach_the_caller(self):
+        def simulate(progress_callback):
+            raise ValueError("bad parameters")
+
+        live_plot = run.LivePlot(10, 1, 55, 2, output='png')
+        with self.assertRaises(ValueError):
+            run.run_with_live_plot(live_plot, simulate, refresh_interval=0.01)
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_compare_to_baseline_flags_slowdowns(self):
+        from run_benchmarks import compare_to_baseline
+
+        baseline = {'metrics': {'probe_ns/linear_search': {'value': 100.0, 'unit': 'ns', 'better': 'lower'},
+                                'throughput_trials_per_s/vectorized': {'value': 1000.0, 'unit': 'trials/s',
+                                                                       'better': 'higher'}}}
+        report = {'metrics': {'probe_ns/linear_search': {'value': 120.0, 'unit': 'ns', 'better': 'lower'},
+                              'throughput_trials_per_s/vectorized': {'value': 500.0, 'unit': 'trials/s',
+                                                                     'better': 'higher'},
+                              'probe_ns/new_strategy': {'value': 1.0, 'unit': 'ns', 'better': 'lower'}}}
+
+        regressions, missing = compare_to_baseline(report, baseline, tolerance=0.25)
+        self.assertEqual(['throughput_trials_per_s/vectorized'], [name for name, _, _, _ in regressions])
+        self.assertAlmostEqual(1.0, regressions[0][3])
+        # Metrics the baseline predates are reported rather than silently passing
+        self.assertEqual(['probe_ns/new_strategy'], missing)
+        self.assertEqual(([], ['probe_ns/new_strategy']), compare_to_baseline(report, baseline, tolerance=1.0))
+
+    def test_environment_differences(self):
+        from run_benchmarks import environment_differences
+
+        baseline = {'metadata': {'python': '3.11.7', 'numpy': '1.26.2', 'quick': False}}
+        report = {'metadata': {'python': '3.11.7', 'numpy': '2.0.0', 'quick': True}}
+        self.assertEqual([('numpy', '1.26.2', '2.0.0'), ('quick', False, True)],
+                         environment_differences(report, baseline))
+        self.assertEqual([], environment_differences(report, report))
+
+
 if __name__ == '__main__':
     unittest.main()